@@ -0,0 +1,36 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from utils.tenant import TenantContext, tenant_claims_are_current
+from rest_framework.permissions import SAFE_METHODS
+from .tokens import TenantTokenUser
+
+class TenantJWTAuthentication(JWTAuthentication):
+    """
+    Autenticación JWT que, en peticiones de solo lectura a vistas con tenant,
+    construye el usuario y el tenant a partir de los claims sin tocar la BD.
+    Si los claims no están vigentes (p.ej. cambió el almacén por defecto) se usa la ruta normal.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+
+        if self.allows_stateless(request) and tenant_claims_are_current(validated_token):
+            user = TenantTokenUser(validated_token)
+            http_request = getattr(request, '_request', request)
+            http_request.tenant = TenantContext(http_request, claims=user.tenant_claims)
+            return user, validated_token
+
+        return self.get_user(validated_token), validated_token
+
+    def allows_stateless(self, request):
+        if request.method not in SAFE_METHODS:
+            return False
+        view = (getattr(request, 'parser_context', None) or {}).get('view')
+        return getattr(view, 'stateless_tenant_auth', False)
@@ -0,0 +1,16 @@
+from django.core.checks import Warning, register, Tags
+from utils.tenant import stateless_auth_enabled
+
+
+@register(Tags.caches, deploy=True)
+def check_stateless_auth_cache(app_configs, **kwargs):
+    """
+    Sin una caché compartida (Redis, Memcached, BD...) las lecturas con JWT vuelven a consultar la BD.
+    """
+    if stateless_auth_enabled():
+        return []
+    return [Warning(
+        'La caché por defecto es local al proceso: la autenticación sin BD de las lecturas está desactivada.',
+        hint='Define CACHE_BACKEND/CACHE_LOCATION con una caché compartida entre workers (p.ej. Redis).',
+        id='accounts.W001',
+    )]
@@ -1,5 +1,8 @@
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework import serializers
 from .models import User, Role, Permission
+from .tokens import TenantRefreshToken
 from apps.stores.models import Store, GeneralSetting, Plan, Rubro
 from apps.warehouse.models import Warehouse, UserWarehouseAccess
 import random
@@ -157,3 +160,21 @@ class UserOnboardingSerializer(serializers.Serializer):
 
         return user
 
+class TenantTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = TenantRefreshToken
+
+class TenantTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Al refrescar se vuelven a leer tienda, almacén y rol: el nuevo access token
+    refleja siempre el almacén por defecto vigente.
+    """
+    token_class = TenantRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        user = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        if user is not None:
+            refresh.set_tenant_claims(user)
+        # El refresh re-firmado conserva jti y expiración; solo cambian los claims de tenant
+        return super().validate({**attrs, 'refresh': str(refresh)})
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_save, post_delete
+from apps.warehouse.models import UserWarehouseAccess
+from utils.tenant import forget_tenant_claims
+from django.dispatch import receiver
+from .models import User
+
+# Cualquier cambio de tienda, rol o almacén por defecto invalida los claims del JWT
+
+@receiver([post_save, post_delete], sender=UserWarehouseAccess)
+def invalidate_claims_on_access_change(sender, instance, **kwargs):
+    forget_tenant_claims(instance.user_id)
+
+@receiver(post_save, sender=User)
+def invalidate_claims_on_user_change(sender, instance, **kwargs):
+    forget_tenant_claims(instance.pk)
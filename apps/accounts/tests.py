@@ -1,3 +1,57 @@
-from django.test import TestCase
+from django.core.checks import run_checks
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from apps.product.models import Product
+from apps.warehouse.models import Warehouse, UserWarehouseAccess
+from utils.tenant import tenant_claims_are_current
+from utils.testing import make_tenant, SHARED_CACHE, LOCAL_CACHE
+from .tokens import TenantRefreshToken
 
-# Create your tests here.
+
+class StatelessAuthTest(TestCase):
+    def setUp(self):
+        self.store, self.warehouse, self.user, self.products = make_tenant(products=1)
+        self.client = APIClient()
+
+    def login(self):
+        token = TenantRefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return token
+
+    @override_settings(CACHES=LOCAL_CACHE)
+    def test_process_local_cache_always_checks_database(self):
+        token = self.login()
+
+        self.assertFalse(tenant_claims_are_current(token))
+        self.assertIn('accounts.W001', [check.id for check in run_checks(include_deployment_checks=True)])
+
+    @override_settings(CACHES=SHARED_CACHE)
+    def test_deactivated_user_is_rejected_on_next_read(self):
+        token = self.login()
+        self.assertTrue(tenant_claims_are_current(token))
+        self.assertEqual(self.client.get('/api/p/products/').status_code, 200)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertFalse(tenant_claims_are_current(token))
+        self.assertEqual(self.client.get('/api/p/products/').status_code, 401)
+
+    @override_settings(CACHES=SHARED_CACHE)
+    def test_warehouse_change_applies_on_next_read(self):
+        token = self.login()
+        self.assertEqual(self.client.get('/api/p/products/').status_code, 200)
+
+        other = Warehouse.objects.create(name='Sucursal', code=f'S{self.store.code}', store=self.store)
+        moved = Product.objects.create(
+            name='Solo en sucursal', code=f'S{self.store.code}', store=self.store, warehouse=other,
+            unit=self.products[0].unit, stock=1, sale_price=1, purchase_price=1,
+        )
+        UserWarehouseAccess.objects.filter(user=self.user).update(is_default=False)
+        UserWarehouseAccess.objects.create(user=self.user, warehouse=other, role=self.user.role, is_default=True)
+
+        self.assertFalse(tenant_claims_are_current(token))
+        response = self.client.get('/api/p/products/')
+        self.assertEqual(response.status_code, 200)
+        ids = [item['id'] for item in response.json()['results']]
+        self.assertEqual(ids, [str(moved.id)])
@@ -0,0 +1,45 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.models import TokenUser
+from django.utils.functional import cached_property
+from utils.tenant import build_tenant_claims, remember_tenant_claims, TENANT_CLAIMS
+
+class TenantRefreshToken(RefreshToken):
+    """
+    Refresh token que incluye tienda, almacén por defecto y rol del usuario.
+    El access token derivado copia estos claims.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.set_tenant_claims(user)
+        return token
+
+    def set_tenant_claims(self, user):
+        claims = build_tenant_claims(user)
+        for name, value in claims.items():
+            self[name] = value
+        remember_tenant_claims(user.pk, claims)
+        return claims
+
+class TenantTokenUser(TokenUser):
+    """
+    Usuario liviano construido solo con los claims del JWT (sin consultar la BD).
+    """
+
+    @cached_property
+    def store_id(self):
+        return self.token.get('store_id')
+
+    @cached_property
+    def role_name(self):
+        return self.token.get('role')
+
+    @cached_property
+    def store(self):
+        from apps.stores.models import Store
+        return Store.objects.filter(pk=self.store_id).first() if self.store_id else None
+
+    @property
+    def tenant_claims(self):
+        return {name: self.token.get(name) for name in TENANT_CLAIMS}
@@ -3,7 +3,7 @@ from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from dj_rest_auth.registration.views import SocialLoginView
 from apps.stores.models import Plan, Store, GeneralSetting
-from rest_framework_simplejwt.tokens import RefreshToken
+from .tokens import TenantRefreshToken
 from .models import Role, EmailVerificationCode, User
 from rest_framework.response import Response
 from rest_framework import status, generics
@@ -69,7 +69,7 @@ class VerifyCodeAndRegister(APIView):
             # Eliminar todos los códigos del email
             EmailVerificationCode.objects.filter(email=email).delete()
 
-            refresh = RefreshToken.for_user(user)
+            refresh = TenantRefreshToken.for_user(user)
             return Response({
                 "message": "Usuario creado y autenticado",
                 "user_id": user.id,
@@ -0,0 +1,17 @@
+from django.core.checks import Warning, register, Tags
+from utils.cache import cache_is_shared
+
+
+@register(Tags.caches, deploy=True)
+def check_tenant_cache(app_configs, **kwargs):
+    """
+    La invalidación por versión del almacén solo llega a todos los workers con una caché compartida.
+    """
+    if cache_is_shared():
+        return []
+    return [Warning(
+        'La caché por defecto es local al proceso: los demás workers pueden servir dashboards '
+        'e inventario desactualizados hasta TENANT_CACHE_TIMEOUT segundos después de cada escritura.',
+        hint='Define CACHE_BACKEND/CACHE_LOCATION con una caché compartida entre workers (p.ej. Redis).',
+        id='analytics.W001',
+    )]
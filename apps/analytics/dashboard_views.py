@@ -2,265 +2,185 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models.functions import TruncMonth
-from django.utils.timezone import now, timedelta
-from django.db.models import Sum, Count, F
-from apps.product.models import Product
-from apps.sale.models import Sale, SaleDetail
-from apps.purchase.models import Purchase, PurchaseDetail
-from apps.warehouse.utils import get_default_warehouse
-from apps.customer.models import Customer
-
-# Constante para definir stock mínimo
-LOW_STOCK_THRESHOLD = 10
-
-class CountProductsView(APIView):
-    permission_classes = [IsAuthenticated]
+from rest_framework.exceptions import ValidationError
+from utils.tenant import TenantViewMixin
+from .metrics import MetricsQuery, compute_metrics
+from .reports import abc_turnover_report, report_sheets, margin_report, margin_sheets, MARGIN_GROUPS
+from django.utils.dateparse import parse_date
+from utils.cache import cached_daily_data
+from utils.export import xlsx_response
+from django.utils.timezone import localdate, timedelta
 
-    def get(self, request):
-        user = request.user
-        warehouse = get_default_warehouse(user)
-        count = Product.objects.filter(
-            warehouse=warehouse,
-            is_active=True,
-            soft_deleted=False
-        ).count()
-        return Response({'count_products': count})
 
+class DashboardMetricsMixin(TenantViewMixin):
+    """
+    Todas las vistas del dashboard delegan en el mismo motor de métricas (metrics.py).
+    """
 
-class CountSalesView(APIView):
-    permission_classes = [IsAuthenticated]
+    def get_metrics_query(self):
+        tenant = self.tenant
+        return MetricsQuery(tenant.store_id, tenant.warehouse_id, self.request.query_params)
 
-    def get(self, request):
-        user = request.user
-        warehouse = get_default_warehouse(user)
-        count = Sale.objects.filter(status='completed', warehouse=warehouse).count()
-        return Response({'count_sales': count})
+    def compute(self, names):
+        return compute_metrics(self.get_metrics_query(), names)
 
 
-class CountCustomersView(APIView):
+# Resumen del dashboard en una sola llamada: ?metrics=count_sales,total_revenue,...
+class DashboardSummaryView(DashboardMetricsMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user = request.user
-        warehouse = get_default_warehouse(user)
-        count = Customer.objects.filter(warehouse=warehouse).count()
-        return Response({'count_customers': count})
+        metrics = request.query_params.get('metrics')
+        names = [name.strip() for name in metrics.split(',') if name.strip()] if metrics else None
+        try:
+            data = self.compute(names)
+        except KeyError as e:
+            raise ValidationError({'metrics': f"Métricas no válidas: {e.args[0]}"})
+        return Response(data)
+
 
-class TopSellingProductsView(APIView):
+class DashboardMetricView(DashboardMetricsMixin, APIView):
+    """
+    Endpoint individual de una métrica. Si raw=True responde solo el valor (sin la clave).
+    """
     permission_classes = [IsAuthenticated]
+    metric = None
+    raw = False
 
     def get(self, request):
-        user = request.user
-        warehouse = get_default_warehouse(user)
-        top_n = int(request.query_params.get('top', 5))
-        top_products = (
-            SaleDetail.objects
-            .values('product__id', 'product__name')
-            .annotate(total_quantity=Sum('quantity'))
-            .order_by('-total_quantity')[:top_n]
-        )
-        return Response({'top_selling_products': list(top_products)})
+        value = self.compute([self.metric])[self.metric]
+        return Response(value if self.raw else {self.metric: value})
 
 
-class LowStockProductsCountView(APIView):
-    permission_classes = [IsAuthenticated]
+class CountProductsView(DashboardMetricView):
+    metric = 'count_products'
 
-    def get(self, request):
-        user = request.user
-        warehouse = get_default_warehouse(user)
-        count = Product.objects.filter(
-            stock__lt=LOW_STOCK_THRESHOLD,
-            warehouse=warehouse,
-            is_active=True,
-            ).count()
-        return Response({'low_stock_count': count})
 
+class CountSalesView(DashboardMetricView):
+    metric = 'count_sales'
 
-class LowStockProductsAlertView(APIView):
-    permission_classes = [IsAuthenticated]
 
-    def get(self, request):
-        user = request.user
-        warehouse = get_default_warehouse(user)
-        products = Product.objects.filter(
-            warehouse=warehouse,
-            stock__lt=LOW_STOCK_THRESHOLD,
-            is_active=True
-            )
-        data = [
-            {
-                'id': p.id,
-                'name': p.name,
-                'stock': p.stock,
-                'category': p.category.name if p.category else None,
-                'warehouse': p.warehouse.name if p.warehouse else None,
-            }
-            for p in products
-        ]
-        return Response({'low_stock_products': data})
+class CountCustomersView(DashboardMetricView):
+    metric = 'count_customers'
 
-# Total neto de ventas completadas
-class TotalRevenueView(APIView):
-    permission_classes = [IsAuthenticated]
 
-    def get(self, request):
-        
-        user = request.user
-        warehouse = get_default_warehouse(user)
-        total = Sale.objects.filter(status='completed', warehouse=warehouse).aggregate(total=Sum('net_total'))['total'] or 0
-        return Response({'total_revenue': float(total)})
+class TopSellingProductsView(DashboardMetricView):
+    metric = 'top_selling_products'
 
-# Total de ventas por mes
-class MonthlySalesSummaryView(APIView):
-    permission_classes = [IsAuthenticated]
 
-    def get(self, request):
-        user = request.user
-        warehouse = get_default_warehouse(user)
-        data = (
-            Sale.objects.filter(status='completed', warehouse=warehouse)
-            .annotate(month=TruncMonth('sale_date'))
-            .values('month')
-            .annotate(total=Sum('net_total'))
-            .order_by('month')
-        )
-        return Response({'monthly_sales': list(data)})
+class LowStockProductsCountView(DashboardMetricView):
+    metric = 'low_stock_count'
 
-# Ventas agurpadas por estado
-class SalesByStatusView(APIView):
-    permission_classes = [IsAuthenticated]
 
-    def get(self, request):
-        user = request.user
-        warehouse = get_default_warehouse(user)
-        data = (
-            Sale.objects.filter(warehouse=warehouse).values('status')
-            .annotate(count=Count('id'))
-            .order_by('status')
-        )
-        return Response({'sales_by_status': list(data)})
+class LowStockProductsAlertView(DashboardMetricView):
+    metric = 'low_stock_products'
 
-# Categorías más vendidas por cantidad
-class TopCategoriesSoldView(APIView):
-    permission_classes = [IsAuthenticated]
+# Total neto de ventas completadas
+class TotalRevenueView(DashboardMetricView):
+    metric = 'total_revenue'
 
-    def get(self, request):
-        data = (
-            SaleDetail.objects
-            .values('product__category__id', 'product__category__name')
-            .annotate(total_quantity=Sum('quantity'))
-            .order_by('-total_quantity')
-        )[:5]
-
-        formatted = []
-        for item in data:
-            formatted.append({
-                'category_id': item['product__category__id'],
-                'category_name': item['product__category__name'] or 'Sin categoría',
-                'total_quantity': item['total_quantity'],
-            })
-
-        return Response({'top_categories_sold': formatted})
+# Total de ventas por mes
+class MonthlySalesSummaryView(DashboardMetricView):
+    metric = 'monthly_sales'
 
-# Produtos con stock en 0
-class ProductsOutOfStockView(APIView):
-    permission_classes = [IsAuthenticated]
+# Ventas agurpadas por estado
+class SalesByStatusView(DashboardMetricView):
+    metric = 'sales_by_status'
 
-    def get(self, request):
-        user = request.user
-        warehouse = get_default_warehouse(user)
-        products = Product.objects.filter(stock=0, is_active=True, warehouse=warehouse)
-        data = [{'id': p.id, 'name': p.name, 'warehouse': p.warehouse.name} for p in products]
-        return Response({'out_of_stock_products': data})
+# Categorías más vendidas por cantidad
+class TopCategoriesSoldView(DashboardMetricView):
+    metric = 'top_categories_sold'
 
-# Valor del inventario actual
-class TotalStockValueView(APIView):
-    permission_classes = [IsAuthenticated]
+# Produtos con stock en 0
+class ProductsOutOfStockView(DashboardMetricView):
+    metric = 'out_of_stock_products'
 
-    def get(self, request):
-        user = request.user
-        warehouse = get_default_warehouse(user)
-        value = Product.objects.filter(is_active=True, warehouse=warehouse).aggregate(
-            total=Sum(F('stock') * F('purchase_price'))
-        )['total'] or 0
-        return Response({'total_stock_value': float(value)})
+# Valor del inventario actual
+class TotalStockValueView(DashboardMetricView):
+    metric = 'total_stock_value'
 
 # Ventas generadas hoy
-class SalesTodayView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        user = request.user
-        warehouse = get_default_warehouse(user)
-        today = now().date()
-        total = Sale.objects.filter(sale_date=today, status='completed', warehouse=warehouse).aggregate(total=Sum('net_total'))['total'] or 0
-        return Response({'sales_today': float(total)})
+class SalesTodayView(DashboardMetricView):
+    metric = 'sales_today'
 
 # Promedio de ingreso por venta
-class AverageTicketSizeView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        user = request.user
-        warehouse = get_default_warehouse(user)
-        completed_sales = Sale.objects.filter(status='completed', warehouse=warehouse)
-        total = completed_sales.aggregate(total=Sum('net_total'))['total'] or 0
-        count = completed_sales.count()
-        average = total / count if count > 0 else 0
-        return Response({'average_ticket_size': float(average)})
+class AverageTicketSizeView(DashboardMetricView):
+    metric = 'average_ticket_size'
 
 #### COMPRAS
-class MonthlyPurchasesView(APIView):
-    permission_classes = [IsAuthenticated]
+class MonthlyPurchasesView(DashboardMetricView):
+    metric = 'monthly_purchases'
+    raw = True
 
-    def get(self, request):
-        user = request.user
-        warehouse = get_default_warehouse(user)
-        start_date = now() - timedelta(days=180)
-
-        queryset = Purchase.objects.filter(
-            store=user.store,
-            warehouse=warehouse,
-            status='completed',
-            purchase_date__gte=start_date
-        ).annotate(
-            month=TruncMonth('purchase_date')
-        ).values('month').annotate(
-            total=Sum('total')
-        ).order_by('month')
-
-        return Response(queryset)
-    
-class PurchaseStatusSummaryView(APIView):
+
+class PurchaseStatusSummaryView(DashboardMetricView):
+    metric = 'purchase_status_summary'
+    raw = True
+
+
+class TotalBySupplierView(DashboardMetricView):
+    metric = 'supplier_totals'
+    raw = True
+
+
+# Clasificación ABC y rotación por producto y categoría: ?days=90 (días cerrados hasta ayer), ?file=xlsx
+class AbcTurnoverReportView(TenantViewMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user = request.user
-        warehouse = get_default_warehouse(user)
+        try:
+            days = int(request.query_params.get('days', 90))
+        except ValueError:
+            raise ValidationError({'days': "Debe ser un número entero."})
+        if not 1 <= days <= 730:
+            raise ValidationError({'days': "Debe estar entre 1 y 730."})
+
+        warehouse_id = self.tenant.warehouse_id
+        end = localdate() - timedelta(days=1)
+        start = end - timedelta(days=days - 1)
+        report = cached_daily_data(
+            warehouse_id, 'reports:abc_turnover',
+            lambda: abc_turnover_report(warehouse_id, start, end), {'days': days},
+        )
 
-        summary = Purchase.objects.filter(
-            warehouse=warehouse
-        ).values('status').annotate(
-            count=Count('id'),
-            total=Sum('total')
-        ).order_by('status')
+        if request.query_params.get('file') == 'xlsx':
+            return xlsx_response(report_sheets(report), 'abc-rotacion')
+        return Response(report)
 
-        return Response(summary)
 
-class TotalBySupplierView(APIView):
+# Margen bruto por producto, categoría, día o cajero: ?group=product&start_date=&end_date=&file=xlsx
+class MarginReportView(TenantViewMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user = request.user
-        warehouse = get_default_warehouse(user)
+        params = request.query_params
+        group = params.get('group', 'product')
+        if group not in MARGIN_GROUPS:
+            raise ValidationError({'group': f"Usa uno de: {', '.join(MARGIN_GROUPS)}."})
+        end = self.date_param('end_date', localdate())
+        start = self.date_param('start_date', end - timedelta(days=29))
+        if start > end:
+            raise ValidationError({'start_date': "Debe ser anterior a end_date."})
 
-        data = Purchase.objects.filter(
-            store=user.store,
-            warehouse=warehouse,
-            status='completed'
-        ).values('supplier__name').annotate(
-            total_spent=Sum('total')
-        ).order_by('-total_spent')[:10]
+        warehouse_id = self.tenant.warehouse_id
+        report = self.cached(
+            'reports:margin',
+            lambda: margin_report(warehouse_id, start, end, group),
+            {'group': group, 'start': start, 'end': end},
+        )
 
-        return Response(data)
+        if params.get('file') == 'xlsx':
+            return xlsx_response(margin_sheets(report), f'margenes-{group}')
+        return Response(report)
+
+    def date_param(self, name, default):
+        value = self.request.query_params.get(name)
+        if not value:
+            return default
+        try:
+            day = parse_date(value)
+        except ValueError:
+            day = None
+        if day is None:
+            raise ValidationError({name: "Fecha inválida, usa el formato YYYY-MM-DD."})
+        return day
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from apps.analytics.rollup import rebuild_daily_sales_rollup
+
+class Command(BaseCommand):
+    help = 'Reconstruye el acumulado diario de ventas (DailySalesRollup) a partir de las ventas completadas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--warehouse', action='append', dest='warehouses', help='ID de almacén (repetible). Por defecto, todos.')
+
+    def handle(self, *args, **options):
+        rebuild_daily_sales_rollup(warehouse_ids=options['warehouses'])
+        self.stdout.write(self.style.SUCCESS('✅ Acumulado diario de ventas reconstruido'))
@@ -0,0 +1,247 @@
+from django.db.models import Sum, Count, F, Q, Value
+from django.db.models.functions import TruncMonth, Coalesce
+from django.utils.timezone import now, timedelta, localdate
+from utils.cache import cached_tenant_data
+from apps.purchase.models import Purchase
+from apps.sale.models import Sale, SaleDetail
+from apps.customer.models import Customer
+from apps.product.models import Product
+from .models import DailySalesRollup
+from decimal import Decimal
+
+# Constante para definir stock mínimo
+LOW_STOCK_THRESHOLD = 10
+
+
+class MetricsQuery:
+    """
+    Parámetros comunes de las métricas del dashboard (tenant + query params).
+    """
+
+    def __init__(self, store_id, warehouse_id, params=None):
+        self.store_id = store_id
+        self.warehouse_id = warehouse_id
+        self.params = params or {}
+
+    def int_param(self, name, default):
+        try:
+            return int(self.params.get(name, default))
+        except (TypeError, ValueError):
+            return default
+
+
+# Métricas escalares: cada grupo resuelve varias métricas en una sola consulta
+
+def daily_sales(query):
+    """
+    Filas de totales diarios (sin producto) del acumulado de ventas completadas.
+    """
+    return DailySalesRollup.objects.filter(warehouse_id=query.warehouse_id, product__isnull=True)
+
+
+def sales_totals(query):
+    today = now().date()
+    totals = daily_sales(query).aggregate(
+        count_sales=Sum('sales_count'),
+        total_revenue=Sum('net'),
+        sales_today=Sum('net', filter=Q(date=today)),
+    )
+    total = totals['total_revenue'] or 0
+    count = totals['count_sales'] or 0
+    return {
+        'count_sales': count,
+        'total_revenue': float(total),
+        'sales_today': float(totals['sales_today'] or 0),
+        'average_ticket_size': float(total / count) if count > 0 else 0.0,
+    }
+
+
+def product_totals(query):
+    active = Q(is_active=True)
+    totals = Product.objects.filter(warehouse_id=query.warehouse_id).aggregate(
+        count_products=Count('id', filter=active & Q(soft_deleted=False)),
+        low_stock_count=Count('id', filter=active & Q(stock__lt=LOW_STOCK_THRESHOLD)),
+        out_of_stock_count=Count('id', filter=active & Q(stock=0)),
+        total_stock_value=Coalesce(
+            Sum(F('stock') * F('purchase_price'), filter=active),
+            Value(Decimal('0')),
+        ),
+    )
+    totals['total_stock_value'] = float(totals['total_stock_value'])
+    return totals
+
+
+def customer_totals(query):
+    return {'count_customers': Customer.objects.filter(warehouse_id=query.warehouse_id).count()}
+
+
+# Métricas de series/listados: una consulta por métrica
+
+def top_selling_products(query):
+    top_n = query.int_param('top', 5)
+    data = (
+        SaleDetail.objects
+        .filter(sale__warehouse_id=query.warehouse_id)
+        .values('product__id', 'product__name')
+        .annotate(total_quantity=Sum('quantity'))
+        .order_by('-total_quantity')[:top_n]
+    )
+    return {'top_selling_products': list(data)}
+
+
+def low_stock_products(query):
+    data = Product.objects.filter(
+        warehouse_id=query.warehouse_id,
+        stock__lt=LOW_STOCK_THRESHOLD,
+        is_active=True,
+    ).values('id', 'name', 'stock', 'category__name', 'warehouse__name')
+    return {'low_stock_products': [
+        {
+            'id': p['id'],
+            'name': p['name'],
+            'stock': p['stock'],
+            'category': p['category__name'],
+            'warehouse': p['warehouse__name'],
+        }
+        for p in data
+    ]}
+
+
+def monthly_sales(query):
+    data = (
+        daily_sales(query)
+        .annotate(month=TruncMonth('date'))
+        .values('month')
+        .annotate(total=Sum('net'))
+        .order_by('month')
+    )
+    return {'monthly_sales': list(data)}
+
+
+def sales_by_status(query):
+    data = (
+        Sale.objects.filter(warehouse_id=query.warehouse_id).values('status')
+        .annotate(count=Count('id'))
+        .order_by('status')
+    )
+    return {'sales_by_status': list(data)}
+
+
+def top_categories_sold(query):
+    data = (
+        SaleDetail.objects
+        .filter(sale__warehouse_id=query.warehouse_id)
+        .values('product__category__id', 'product__category__name')
+        .annotate(total_quantity=Sum('quantity'))
+        .order_by('-total_quantity')
+    )[:5]
+    return {'top_categories_sold': [
+        {
+            'category_id': item['product__category__id'],
+            'category_name': item['product__category__name'] or 'Sin categoría',
+            'total_quantity': item['total_quantity'],
+        }
+        for item in data
+    ]}
+
+
+def out_of_stock_products(query):
+    data = Product.objects.filter(
+        stock=0, is_active=True, warehouse_id=query.warehouse_id
+    ).values('id', 'name', 'warehouse__name')
+    return {'out_of_stock_products': [
+        {'id': p['id'], 'name': p['name'], 'warehouse': p['warehouse__name']} for p in data
+    ]}
+
+
+def monthly_purchases(query):
+    start_date = now() - timedelta(days=180)
+    data = Purchase.objects.filter(
+        store_id=query.store_id,
+        warehouse_id=query.warehouse_id,
+        status='completed',
+        purchase_date__gte=start_date
+    ).annotate(
+        month=TruncMonth('purchase_date')
+    ).values('month').annotate(
+        total=Sum('total')
+    ).order_by('month')
+    return {'monthly_purchases': list(data)}
+
+
+def purchase_status_summary(query):
+    data = Purchase.objects.filter(
+        warehouse_id=query.warehouse_id
+    ).values('status').annotate(
+        count=Count('id'),
+        total=Sum('total')
+    ).order_by('status')
+    return {'purchase_status_summary': list(data)}
+
+
+def supplier_totals(query):
+    data = Purchase.objects.filter(
+        store_id=query.store_id,
+        warehouse_id=query.warehouse_id,
+        status='completed'
+    ).values('supplier__name').annotate(
+        total_spent=Sum('total')
+    ).order_by('-total_spent')[:10]
+    return {'supplier_totals': list(data)}
+
+
+# Parámetros de consulta que cambian el resultado de cada función (forman parte de la clave de caché)
+METRIC_PARAMS = {
+    top_selling_products: ('top',),
+}
+
+# Métrica -> función que la calcula (varias métricas pueden compartir función)
+METRICS = {
+    'count_sales': sales_totals,
+    'total_revenue': sales_totals,
+    'sales_today': sales_totals,
+    'average_ticket_size': sales_totals,
+    'count_products': product_totals,
+    'low_stock_count': product_totals,
+    'out_of_stock_count': product_totals,
+    'total_stock_value': product_totals,
+    'count_customers': customer_totals,
+    'top_selling_products': top_selling_products,
+    'low_stock_products': low_stock_products,
+    'monthly_sales': monthly_sales,
+    'sales_by_status': sales_by_status,
+    'top_categories_sold': top_categories_sold,
+    'out_of_stock_products': out_of_stock_products,
+    'monthly_purchases': monthly_purchases,
+    'purchase_status_summary': purchase_status_summary,
+    'supplier_totals': supplier_totals,
+}
+
+
+def compute_group(query, func):
+    """
+    Resultado de un grupo de métricas, cacheado por almacén (y día, por las métricas de 'hoy').
+    """
+    params = {name: query.params.get(name, '') for name in METRIC_PARAMS.get(func, ())}
+    params['day'] = localdate().isoformat()
+    return cached_tenant_data(query.warehouse_id, f"metrics:{func.__name__}", lambda: func(query), params)
+
+
+def compute_metrics(query, names=None):
+    """
+    Calcula las métricas pedidas ejecutando cada grupo de consultas una sola vez.
+    """
+    names = list(names or METRICS)
+    unknown = [name for name in names if name not in METRICS]
+    if unknown:
+        raise KeyError(', '.join(unknown))
+
+    results = {}
+    computed = set()
+    for name in names:
+        func = METRICS[name]
+        if func in computed:
+            continue
+        computed.add(func)
+        results.update(compute_group(query, func))
+    return {name: results[name] for name in names}
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('category', '0001_initial'),
+        ('product', '0002_alter_product_purchase_price_and_more'),
+        ('stores', '0002_alter_plan_max_products_alter_plan_max_users'),
+        ('warehouse', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('sales_count', models.IntegerField(default=0)),
+                ('quantity', models.IntegerField(default=0)),
+                ('gross', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('discount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('net', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_sales', to='category.category')),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='product.product')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='stores.store')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='warehouse.warehouse')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['warehouse', 'date'], name='analytics_d_warehou_74f3f0_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('product__isnull', True)), fields=('warehouse', 'date'), name='daily_sales_rollup_total_uniq'), models.UniqueConstraint(fields=('warehouse', 'date', 'product'), name='daily_sales_rollup_product_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+from apps.warehouse.models import Warehouse
+from apps.category.models import Category
+from apps.product.models import Product
+from apps.stores.models import Store
+from django.db import models
+
+# Create your models here.
+class DailySalesRollup(models.Model):
+    """
+    Acumulado diario de ventas completadas por almacén.
+    Filas sin producto: totales de la venta (cabecera). Filas con producto: totales por línea.
+    Se mantiene de forma incremental desde el flujo de ventas (ver rollup.py).
+    """
+    store = models.ForeignKey(Store, on_delete=models.CASCADE, related_name='daily_sales')
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name='daily_sales')
+    date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, null=True, blank=True, related_name='daily_sales')
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='daily_sales')
+    sales_count = models.IntegerField(default=0)
+    quantity = models.IntegerField(default=0)
+    gross = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    discount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    net = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['warehouse', 'date'],
+                condition=models.Q(product__isnull=True),
+                name='daily_sales_rollup_total_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['warehouse', 'date', 'product'],
+                name='daily_sales_rollup_product_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['warehouse', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.warehouse_id} {self.date} ({self.product_id or 'total'}): {self.net}"
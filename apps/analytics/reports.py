@@ -0,0 +1,224 @@
+"""
+Reporte ABC y de rotación de inventario por producto y categoría.
+Tres consultas agregadas (ventas del acumulado diario, productos y stock promedio de las fotos
+diarias) y el resto con pandas: clasificación ABC por participación en el ingreso
+(A hasta el 80 % acumulado, B hasta el 95 %, C el resto), rotación = costo de lo vendido /
+inventario promedio valorizado y días de inventario = días del periodo / rotación.
+El periodo termina ayer (días cerrados), por eso el resultado se cachea por almacén y día.
+
+El reporte de márgenes agrega SaleDetail con el costo unitario guardado en cada línea
+(SaleDetail.unit_cost), sin cruzar el historial de precios.
+"""
+from django.db.models import Sum, Avg, F, DecimalField, ExpressionWrapper
+from apps.inventory.models import StockSnapshot
+from apps.product.models import Product
+from apps.sale.models import SaleDetail
+from decimal import Decimal
+from .models import DailySalesRollup
+import pandas as pd
+import numpy as np
+
+ABC_LIMITS = (0.80, 0.95)
+
+
+def abc_classes(revenue):
+    """
+    Clase ABC por producto según la participación acumulada (ordenando por ingreso descendente).
+    Cada producto toma la clase en la que empieza su tramo: el primero siempre es A.
+    """
+    total = revenue.sum()
+    if total <= 0:
+        return pd.Series('C', index=revenue.index), pd.Series(0.0, index=revenue.index)
+    share = revenue / total
+    before = share.cumsum() - share
+    classes = np.select([before < ABC_LIMITS[0], before < ABC_LIMITS[1]], ['A', 'B'], default='C')
+    return pd.Series(classes, index=revenue.index), share
+
+
+def turnover(cogs, inventory_value, days):
+    rotation = (cogs / inventory_value).where(inventory_value > 0)
+    days_of_inventory = (days * inventory_value / cogs).where(cogs > 0)
+    return rotation, days_of_inventory
+
+
+def load_frames(warehouse_id, start, end):
+    sales = pd.DataFrame.from_records(
+        list(
+            DailySalesRollup.objects
+            .filter(warehouse_id=warehouse_id, date__gte=start, date__lte=end, product__isnull=False)
+            .values_list('product_id')
+            .annotate(quantity=Sum('quantity'), revenue=Sum('net'))
+            .order_by()
+        ),
+        columns=['product_id', 'quantity', 'revenue'],
+    ).set_index('product_id')
+    products = pd.DataFrame.from_records(
+        list(
+            Product.objects
+            .filter(warehouse_id=warehouse_id, soft_deleted=False)
+            .values_list('id', 'code', 'name', 'category__name', 'stock', 'purchase_price')
+        ),
+        columns=['product_id', 'code', 'name', 'category', 'stock', 'purchase_price'],
+    ).set_index('product_id')
+    average_stock = pd.DataFrame.from_records(
+        list(
+            StockSnapshot.objects
+            .filter(warehouse_id=warehouse_id, date__gte=start, date__lte=end)
+            .values_list('product_id')
+            .annotate(average_stock=Avg('quantity'))
+            .order_by()
+        ),
+        columns=['product_id', 'average_stock'],
+    ).set_index('product_id')
+    return sales, products, average_stock
+
+
+def abc_turnover_report(warehouse_id, start, end):
+    days = (end - start).days + 1
+    sales, products, average_stock = load_frames(warehouse_id, start, end)
+    report = {'start': start.isoformat(), 'end': end.isoformat(), 'days': days, 'products': [], 'categories': []}
+    if products.empty:
+        return report
+
+    frame = products.join(sales).join(average_stock)
+    frame['quantity'] = frame['quantity'].fillna(0).astype(float)
+    frame['revenue'] = frame['revenue'].fillna(0).astype(float)
+    frame['purchase_price'] = frame['purchase_price'].astype(float)
+    # Sin fotos de stock en el periodo: se usa el stock actual
+    frame['average_stock'] = frame['average_stock'].astype(float).fillna(frame['stock'].astype(float)).clip(lower=0)
+    frame['category'] = frame['category'].fillna('Sin categoría')
+
+    frame = frame.sort_values('revenue', ascending=False)
+    frame['abc'], frame['share'] = abc_classes(frame['revenue'])
+    frame['cogs'] = frame['quantity'] * frame['purchase_price']
+    frame['inventory_value'] = frame['average_stock'] * frame['purchase_price']
+    frame['turnover'], frame['days_of_inventory'] = turnover(frame['cogs'], frame['inventory_value'], days)
+
+    categories = frame.groupby('category').agg(
+        products=('name', 'size'),
+        quantity=('quantity', 'sum'),
+        revenue=('revenue', 'sum'),
+        cogs=('cogs', 'sum'),
+        inventory_value=('inventory_value', 'sum'),
+        a=('abc', lambda classes: int((classes == 'A').sum())),
+        b=('abc', lambda classes: int((classes == 'B').sum())),
+        c=('abc', lambda classes: int((classes == 'C').sum())),
+    ).sort_values('revenue', ascending=False)
+    total_revenue = frame['revenue'].sum()
+    categories['share'] = categories['revenue'] / total_revenue if total_revenue > 0 else 0.0
+    categories['turnover'], categories['days_of_inventory'] = turnover(categories['cogs'], categories['inventory_value'], days)
+
+    report['products'] = records(frame.reset_index(), PRODUCT_COLUMNS)
+    report['categories'] = records(categories.reset_index(), CATEGORY_COLUMNS)
+    return report
+
+
+PRODUCT_COLUMNS = [
+    ('product_id', 'ID'), ('code', 'Código'), ('name', 'Producto'), ('category', 'Categoría'),
+    ('abc', 'Clase'), ('quantity', 'Unidades'), ('revenue', 'Ingreso'), ('share', 'Participación'),
+    ('stock', 'Stock'), ('average_stock', 'Stock promedio'), ('cogs', 'Costo de ventas'),
+    ('inventory_value', 'Inventario promedio'), ('turnover', 'Rotación'), ('days_of_inventory', 'Días de inventario'),
+]
+CATEGORY_COLUMNS = [
+    ('category', 'Categoría'), ('products', 'Productos'), ('a', 'A'), ('b', 'B'), ('c', 'C'),
+    ('quantity', 'Unidades'), ('revenue', 'Ingreso'), ('share', 'Participación'), ('cogs', 'Costo de ventas'),
+    ('inventory_value', 'Inventario promedio'), ('turnover', 'Rotación'), ('days_of_inventory', 'Días de inventario'),
+]
+
+
+def records(frame, columns):
+    """
+    Filas JSON (y cacheables): números redondeados, NaN -> None, ids como texto.
+    """
+    frame = frame[[column for column, _ in columns]].copy()
+    for column in frame.columns:
+        if frame[column].dtype.kind == 'f':
+            frame[column] = frame[column].round(4)
+        elif frame[column].dtype.kind == 'O':
+            frame[column] = frame[column].map(lambda value: str(value) if value is not None else None)
+    frame = frame.astype(object).where(frame.notna(), None)
+    return frame.to_dict('records')
+
+
+def report_sheets(report):
+    """
+    Hojas para la exportación XLSX: productos y categorías.
+    """
+    return [
+        ('Productos', [header for _, header in PRODUCT_COLUMNS],
+         ([row[column] for column, _ in PRODUCT_COLUMNS] for row in report['products'])),
+        ('Categorías', [header for _, header in CATEGORY_COLUMNS],
+         ([row[column] for column, _ in CATEGORY_COLUMNS] for row in report['categories'])),
+    ]
+
+
+# Agrupaciones del reporte de márgenes: alias en la respuesta -> campo
+MARGIN_GROUPS = {
+    'product': {'product_id': 'product_id', 'code': 'product__code', 'name': 'product__name'},
+    'category': {'category': 'product__category__name'},
+    'day': {'date': 'sale__sale_date'},
+    'cashier': {'cashier_id': 'sale__created_by_id', 'cashier': 'sale__created_by__name'},
+}
+
+
+def margin_report(warehouse_id, start, end, group='product'):
+    """
+    Ingreso, costo y margen bruto de las ventas completadas entre start y end, en un solo GROUP BY.
+    """
+    keys = MARGIN_GROUPS[group]
+    cost = ExpressionWrapper(F('unit_cost') * F('quantity'), output_field=DecimalField(max_digits=14, decimal_places=2))
+    rows = (
+        SaleDetail.objects
+        .filter(
+            sale__warehouse_id=warehouse_id,
+            sale__status='completed',
+            sale__soft_deleted=False,
+            sale__sale_date__gte=start,
+            sale__sale_date__lte=end,
+        )
+        .values(
+            *[path for alias, path in keys.items() if alias == path],
+            **{alias: F(path) for alias, path in keys.items() if alias != path},
+        )
+        .annotate(units=Sum('quantity'), revenue=Sum('subtotal'), cost=Sum(cost))
+        .order_by('-revenue')
+    )
+
+    results = []
+    totals = {'units': 0, 'revenue': Decimal('0'), 'cost': Decimal('0')}
+    for row in rows:
+        row = add_margin(row)
+        if 'product_id' in row:
+            row['product_id'] = str(row['product_id'])
+        for field in totals:
+            totals[field] += row[field]
+        results.append(row)
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'group': group,
+        'totals': add_margin(totals),
+        'results': results,
+    }
+
+
+def add_margin(row):
+    revenue = row['revenue'] or Decimal('0')
+    cost = row['cost'] or Decimal('0')
+    row['revenue'], row['cost'] = revenue, cost
+    row['margin'] = revenue - cost
+    row['margin_pct'] = round(row['margin'] / revenue * 100, 2) if revenue else None
+    return row
+
+
+MARGIN_HEADERS = {
+    'product_id': 'ID', 'code': 'Código', 'name': 'Producto', 'category': 'Categoría', 'date': 'Fecha',
+    'cashier_id': 'ID cajero', 'cashier': 'Cajero', 'units': 'Unidades', 'revenue': 'Ingreso',
+    'cost': 'Costo', 'margin': 'Margen', 'margin_pct': 'Margen %',
+}
+
+
+def margin_sheets(report):
+    columns = [*MARGIN_GROUPS[report['group']], 'units', 'revenue', 'cost', 'margin', 'margin_pct']
+    return [('Márgenes', [MARGIN_HEADERS[column] for column in columns],
+             ([row[column] for column in columns] for row in report['results']))]
@@ -0,0 +1,119 @@
+from django.db.models import Sum, Count, F, DecimalField, ExpressionWrapper
+from django.db import transaction, IntegrityError
+from django.apps import apps as django_apps
+from decimal import Decimal
+
+
+def _bump(model, lookup, deltas, defaults=None):
+    """
+    Suma los deltas a la fila del acumulado (UPDATE ... SET x = x + delta), creándola si no existe.
+    defaults son campos que solo se fijan al crear la fila (no se suman).
+    """
+    changes = {field: F(field) + value for field, value in deltas.items()}
+    if model.objects.filter(**lookup).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **(defaults or {}), **deltas)
+    except IntegrityError:
+        # Otra transacción creó la fila en paralelo
+        model.objects.filter(**lookup).update(**changes)
+
+
+def apply_sale_to_rollup(sale, details, sign=1):
+    """
+    Registra (sign=1) o revierte (sign=-1) una venta completada en el acumulado diario.
+    Debe llamarse dentro de la misma transacción que cambia el estado de la venta.
+    """
+    from .models import DailySalesRollup
+
+    base = {'store_id': sale.store_id, 'warehouse_id': sale.warehouse_id, 'date': sale.sale_date}
+
+    _bump(DailySalesRollup, {**base, 'product': None}, {
+        'sales_count': sign,
+        'gross': sign * Decimal(sale.total),
+        'discount': sign * Decimal(sale.discount_total),
+        'net': sign * Decimal(sale.net_total),
+    })
+
+    for detail in details:
+        gross = Decimal(detail.sale_price) * detail.quantity
+        subtotal = Decimal(detail.subtotal)
+        _bump(DailySalesRollup, {**base, 'product_id': detail.product_id}, {
+            'sales_count': sign,
+            'quantity': sign * int(detail.quantity),
+            'gross': sign * gross,
+            'discount': sign * (gross - subtotal),
+            'net': sign * subtotal,
+        }, defaults={'category_id': detail.product.category_id})
+
+
+def rebuild_daily_sales_rollup(warehouse_ids=None, apps=django_apps, batch_size=1000):
+    """
+    Reconstruye el acumulado desde cero con dos GROUP BY (ventas y detalles).
+    """
+    Sale = apps.get_model('sale', 'Sale')
+    SaleDetail = apps.get_model('sale', 'SaleDetail')
+    DailySalesRollup = apps.get_model('analytics', 'DailySalesRollup')
+
+    sales = Sale.objects.filter(status='completed', soft_deleted=False)
+    details = SaleDetail.objects.filter(sale__status='completed', sale__soft_deleted=False)
+    rollups = DailySalesRollup.objects.all()
+    if warehouse_ids is not None:
+        sales = sales.filter(warehouse_id__in=warehouse_ids)
+        details = details.filter(sale__warehouse_id__in=warehouse_ids)
+        rollups = rollups.filter(warehouse_id__in=warehouse_ids)
+
+    gross_line = ExpressionWrapper(F('sale_price') * F('quantity'), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+    with transaction.atomic():
+        rollups.delete()
+
+        totals = (
+            sales.values('store_id', 'warehouse_id', 'sale_date')
+            .annotate(
+                sales_count=Count('id'),
+                gross=Sum('total'),
+                discount=Sum('discount_total'),
+                net=Sum('net_total'),
+            )
+            .order_by()
+        )
+        DailySalesRollup.objects.bulk_create((
+            DailySalesRollup(
+                store_id=row['store_id'],
+                warehouse_id=row['warehouse_id'],
+                date=row['sale_date'],
+                sales_count=row['sales_count'],
+                gross=row['gross'] or 0,
+                discount=row['discount'] or 0,
+                net=row['net'] or 0,
+            )
+            for row in totals.iterator()
+        ), batch_size=batch_size)
+
+        lines = (
+            details.values('sale__store_id', 'sale__warehouse_id', 'sale__sale_date', 'product_id', 'product__category_id')
+            .annotate(
+                line_count=Count('id'),
+                units=Sum('quantity'),
+                gross_total=Sum(gross_line),
+                net_total=Sum('subtotal'),
+            )
+            .order_by()
+        )
+        DailySalesRollup.objects.bulk_create((
+            DailySalesRollup(
+                store_id=row['sale__store_id'],
+                warehouse_id=row['sale__warehouse_id'],
+                date=row['sale__sale_date'],
+                product_id=row['product_id'],
+                category_id=row['product__category_id'],
+                sales_count=row['line_count'],
+                quantity=row['units'] or 0,
+                gross=row['gross_total'] or 0,
+                discount=(row['gross_total'] or 0) - (row['net_total'] or 0),
+                net=row['net_total'] or 0,
+            )
+            for row in lines.iterator()
+        ), batch_size=batch_size)
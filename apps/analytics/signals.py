@@ -0,0 +1,35 @@
+from django.db.models.signals import post_save, post_delete
+from apps.inventory.models import InventoryTransaction
+from apps.stores.models import GeneralSetting
+from apps.warehouse.models import Warehouse
+from apps.category.models import Category
+from apps.customer.models import Customer
+from apps.brand.models import Brand
+from apps.purchase.models import Purchase
+from utils.cache import bump_tenant_version
+from apps.product.models import Product
+from apps.sale.models import Sale
+from django.dispatch import receiver
+
+# Cualquier escritura que cambie números del dashboard invalida la caché del almacén.
+# Los flujos de venta/compra usan bulk_* para detalles y stock, pero siempre terminan
+# guardando la cabecera (Sale/Purchase), que dispara esta señal.
+
+@receiver([post_save, post_delete], sender=Sale)
+@receiver([post_save, post_delete], sender=Purchase)
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Customer)
+@receiver([post_save, post_delete], sender=InventoryTransaction)
+def invalidate_tenant_cache(sender, instance, **kwargs):
+    bump_tenant_version(instance.warehouse_id)
+
+
+# Configuración, categorías y marcas son de la tienda: cambian umbrales (stock mínimo, reposición)
+# y nombres de los reportes de todos sus almacenes.
+
+@receiver([post_save, post_delete], sender=GeneralSetting)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Brand)
+def invalidate_store_cache(sender, instance, **kwargs):
+    for warehouse_id in Warehouse.objects.filter(store_id=instance.store_id).values_list('id', flat=True):
+        bump_tenant_version(warehouse_id)
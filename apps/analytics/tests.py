@@ -0,0 +1,102 @@
+from django.core.checks import run_checks
+from django.test import TestCase, override_settings
+from apps.category.models import Category
+from apps.brand.models import Brand
+from apps.inventory.forecast import refresh_forecasts
+from apps.sale.models import Sale
+from apps.warehouse.models import Warehouse
+from django.utils.timezone import localdate
+from utils.cache import get_tenant_version
+from utils.testing import make_tenant, api_client, SHARED_CACHE, LOCAL_CACHE
+from decimal import Decimal
+from .models import DailySalesRollup
+
+
+class DailySalesRollupTest(TestCase):
+    def setUp(self):
+        self.store, self.warehouse, self.user, products = make_tenant(products=1)
+        self.category = Category.objects.create(name='Bebidas', store=self.store)
+        self.product = products[0]
+        self.product.category = self.category
+        self.product.save()
+        self.client = api_client(self.user)
+
+    def sell(self, quantity):
+        response = self.client.post('/api/sale/sales/', {
+            'status': 'completed',
+            'details': [{'product': str(self.product.id), 'quantity': quantity, 'discount': 0}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return Sale.objects.filter(warehouse=self.warehouse).latest('created_at')
+
+    def product_row(self):
+        return DailySalesRollup.objects.get(warehouse=self.warehouse, product=self.product)
+
+    def test_same_day_sales_keep_category(self):
+        self.sell(2)
+        self.sell(3)
+
+        row = self.product_row()
+        self.assertEqual(row.category_id, self.category.id)
+        self.assertEqual(row.sales_count, 2)
+        self.assertEqual(row.quantity, 5)
+        self.assertEqual(row.net, Decimal('50.00'))
+
+    def test_cancel_reverts_totals_and_keeps_category(self):
+        self.sell(2)
+        sale = self.sell(3)
+
+        response = self.client.post(f'/api/sale/sales/{sale.id}/cancel/')
+        self.assertEqual(response.status_code, 200, response.content)
+
+        row = self.product_row()
+        self.assertEqual(row.category_id, self.category.id)
+        self.assertEqual(row.sales_count, 1)
+        self.assertEqual(row.quantity, 2)
+        self.assertEqual(row.net, Decimal('20.00'))
+        total = DailySalesRollup.objects.get(warehouse=self.warehouse, product__isnull=True)
+        self.assertEqual(total.sales_count, 1)
+        self.assertEqual(total.net, Decimal('20.00'))
+
+
+class TenantCacheInvalidationTest(TestCase):
+    def setUp(self):
+        self.store, self.warehouse, self.user, _ = make_tenant(products=1)
+        self.other = Warehouse.objects.create(name='Sucursal', code=f'S{self.store.code}', store=self.store)
+
+    def versions(self):
+        return [get_tenant_version(warehouse.id) for warehouse in (self.warehouse, self.other)]
+
+    def assertBumpsAllWarehouses(self, write):
+        before = self.versions()
+        with self.captureOnCommitCallbacks(execute=True):
+            write()
+        after = self.versions()
+        self.assertNotEqual(before[0], after[0])
+        self.assertNotEqual(before[1], after[1])
+
+    def test_store_settings_change(self):
+        settings = self.store.settings
+        settings.stock_minimo = 20
+        self.assertBumpsAllWarehouses(settings.save)
+
+    def test_category_and_brand_changes(self):
+        self.assertBumpsAllWarehouses(lambda: Category.objects.create(name='Lácteos', store=self.store))
+        brand = Brand.objects.create(name='Gloria', store=self.store)
+        self.assertBumpsAllWarehouses(brand.delete)
+
+    def test_refresh_forecasts(self):
+        self.assertBumpsAllWarehouses(lambda: refresh_forecasts(localdate(), [self.warehouse.id, self.other.id]))
+
+
+class TenantCacheCheckTest(TestCase):
+    def deploy_warnings(self):
+        return [check.id for check in run_checks(include_deployment_checks=True)]
+
+    @override_settings(CACHES=LOCAL_CACHE)
+    def test_process_local_cache_is_reported(self):
+        self.assertIn('analytics.W001', self.deploy_warnings())
+
+    @override_settings(CACHES=SHARED_CACHE)
+    def test_shared_cache_passes(self):
+        self.assertNotIn('analytics.W001', self.deploy_warnings())
@@ -6,10 +6,12 @@ from .dashboard_views import (
     SalesByStatusView, TopCategoriesSoldView,
     ProductsOutOfStockView, TotalStockValueView, SalesTodayView,
     AverageTicketSizeView, MonthlyPurchasesView,
-    PurchaseStatusSummaryView, TotalBySupplierView
+    PurchaseStatusSummaryView, TotalBySupplierView, DashboardSummaryView,
+    AbcTurnoverReportView, MarginReportView
 )
 
 urlpatterns = [
+    path('dashboard/summary/', DashboardSummaryView.as_view()),
     path('dashboard/count-products/', CountProductsView.as_view()),
     path('dashboard/count-sales/', CountSalesView.as_view()),
     path('dashboard/count-customers/', CountCustomersView.as_view()),
@@ -30,4 +32,7 @@ urlpatterns = [
     path('dashboard/monthly-purchases/', MonthlyPurchasesView.as_view()),
     path('dashboard/status-summary/', PurchaseStatusSummaryView.as_view()),
     path('dashboard/supplier-totals/', TotalBySupplierView.as_view()),
+
+    path('reports/abc-turnover/', AbcTurnoverReportView.as_view()),
+    path('reports/margin/', MarginReportView.as_view()),
 ]
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from utils.tenant import get_request_tenant
 from .models import Brand, Unit
 
 class BrandSerializer(serializers.ModelSerializer):
@@ -11,7 +12,7 @@ class BrandSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'store', 'logo', 'created_at', 'updated_at']
 
     def validate_name(self, value):
-        store = self.context['request'].user.store
+        store = get_request_tenant(self.context['request']).store
         # Query para marcas con ese nombre y tienda
         qs = Brand.objects.filter(store=store, name=value)
         # Si es edición, excluye el objeto actual para evitar falso positivo
@@ -2,10 +2,11 @@ from rest_framework import viewsets, permissions, serializers, filters
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from .serializers import BrandSerializer, UnitSerializer, BrandSearchSelectSerializer, UniSearchSelectSerializer
+from utils.tenant import TenantViewMixin
 from .models import Brand, Unit
 
 # Create your views here.
-class BrandViewSet(viewsets.ModelViewSet):
+class BrandViewSet(TenantViewMixin, viewsets.ModelViewSet):
     serializer_class = BrandSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -14,11 +15,10 @@ class BrandViewSet(viewsets.ModelViewSet):
     ordering = ['-created_at']
 
     def get_queryset(self):
-        user = self.request.user
-        return Brand.objects.filter(store=user.store).order_by('-created_at')
+        return Brand.objects.filter(store_id=self.tenant.store_id).order_by('-created_at')
     
     def perform_create(self, serializer):
-        user_store = getattr(self.request.user, 'store', None)
+        user_store = self.tenant.store
         if not user_store:
             raise serializers.ValidationError("El usuario no tiene una tienda asignada.")
         serializer.save(store=user_store)
@@ -26,9 +26,8 @@ class BrandViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path='brand-list')
     def brand_list(self, request):
         search = request.query_params.get('search', '')
-        user = request.user
         queryset = Brand.objects.filter(
-            store=user.store, is_active=True, name__icontains=search
+            store_id=self.tenant.store_id, is_active=True, name__icontains=search
         ).only('id', 'name').order_by('name')[:10]
         serializer = BrandSearchSelectSerializer(queryset, many=True)
         return Response(serializer.data)
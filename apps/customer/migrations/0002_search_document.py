@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:43
+
+from django.db import migrations, models
+
+SEARCH_PATHS = ('name', 'surnames', 'ci', 'email', 'phone')
+
+
+def backfill(apps, schema_editor):
+    from utils.search import backfill_search_documents
+    backfill_search_documents(apps, schema_editor, 'customer', 'customer', SEARCH_PATHS)
+
+
+def create_index(apps, schema_editor):
+    from utils.search import create_trigram_index
+    create_trigram_index(apps, schema_editor, 'customer', 'customer')
+
+
+def drop_index(apps, schema_editor):
+    from utils.search import drop_trigram_index
+    drop_trigram_index(apps, schema_editor, 'customer', 'customer')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.RunPython(create_index, drop_index),
+    ]
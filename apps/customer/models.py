@@ -2,12 +2,13 @@ from django.core.validators import RegexValidator
 from utils.base import SoftDeleteModel, ActiveManager
 from apps.warehouse.models import Warehouse
 from apps.stores.models import Store
+from utils.search import SearchDocumentMixin
 from django.db import models
-import uuid
+from utils.ids import uuid7
 
 # Create your models here.
-class Customer(SoftDeleteModel):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+class Customer(SearchDocumentMixin, SoftDeleteModel):
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     name = models.CharField(max_length=150)
     surnames = models.CharField(max_length=150)
     phone = models.CharField(
@@ -24,6 +25,9 @@ class Customer(SoftDeleteModel):
     warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name='customers')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    search_document = models.TextField(blank=True, default='', editable=False)  # Ver utils/search.py
+
+    search_value_paths = ('name', 'surnames', 'ci', 'email', 'phone')
 
     objects = ActiveManager()      # Manager por defecto (no eliminados)
     all_objects = models.Manager() # Manager que incluye todo
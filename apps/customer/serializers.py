@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from apps.warehouse.utils import get_default_warehouse
+from utils.tenant import get_request_tenant
 from .models import Customer
 
 class CustomerSerializer(serializers.ModelSerializer):
@@ -16,7 +16,7 @@ class CustomerSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Debe proporcionar al menos un teléfono o un correo electrónico de contacto.")
 
         ci = data.get('ci')
-        store = self.context['request'].user.store
+        store = get_request_tenant(self.context['request']).store
 
         if ci is not None:
             qs = Customer.objects.filter(ci=ci, store=store, soft_deleted=False)
@@ -28,14 +28,13 @@ class CustomerSerializer(serializers.ModelSerializer):
         return data
     
     def create(self, validated_data):
-        user = self.context['request'].user
-        store = getattr(user, 'store', None)
+        tenant = get_request_tenant(self.context['request'])
+        store = tenant.store
         if not store:
             raise serializers.ValidationError("El usuario no tiene una tienda asignada.")
         
-        # Buscar el almacén por defecto del usuario
-        access = get_default_warehouse(user)
-        return Customer.objects.create(store=store, warehouse=access, **validated_data)
+        # Almacén por defecto del usuario
+        return Customer.objects.create(store=store, warehouse=tenant.warehouse, **validated_data)
 
 class CustomerSelectSerializer(serializers.ModelSerializer):
     class Meta:
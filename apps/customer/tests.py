@@ -1,3 +1,38 @@
 from django.test import TestCase
+from apps.sale.models import Sale
+from utils.testing import make_tenant, api_client
+from .models import Customer
 
-# Create your tests here.
+
+class CustomerSearchTest(TestCase):
+    def setUp(self):
+        self.store, self.warehouse, self.user, _ = make_tenant(products=0)
+        self.customer = self.create_customer('José', 'Pérez Quispe', ci='4567890')
+        self.create_customer('María', 'Josefina Rojas')
+        self.client = api_client(self.user)
+
+    def create_customer(self, name, surnames, **fields):
+        return Customer.objects.create(name=name, surnames=surnames, store=self.store, warehouse=self.warehouse, **fields)
+
+    def search(self, text):
+        response = self.client.get('/api/cli/customers/', {'search': text})
+        self.assertEqual(response.status_code, 200, response.content)
+        return [row['name'] for row in response.json()['results']]
+
+    def test_search_ignores_accents_and_case(self):
+        self.assertEqual(self.customer.search_document, 'jose perez quispe 4567890')
+        self.assertEqual(self.search('PEREZ josé'), ['José'])
+        self.assertEqual(self.search('4567'), ['José'])
+
+    def test_name_start_ranks_first(self):
+        self.assertEqual(self.search('jose'), ['José', 'María'])
+
+    def test_rename_rebuilds_sale_documents(self):
+        sale = Sale.objects.create(customer=self.customer, store=self.store, warehouse=self.warehouse, sale_number='V-0001')
+        self.assertIn('perez', sale.search_document)
+
+        self.customer.surnames = 'Mamani'
+        self.customer.save()
+
+        sale.refresh_from_db()
+        self.assertEqual(sale.search_document, 'v-0001 jose mamani')
@@ -0,0 +1,141 @@
+"""
+Pronóstico de demanda y punto de reorden por producto.
+Por almacén: una consulta trae las unidades vendidas por producto y día en la ventana
+(GeneralSetting.forecast_window_days); pandas arma la matriz día × producto y calcula de una vez
+la media móvil y el suavizado exponencial de todos los productos.
+    punto de reorden = ceil(demanda diaria suavizada × (lead_time_days + safety_stock_days))
+    días de cobertura = stock / demanda diaria suavizada
+Lo recalcula cada noche el comando refresh_forecasts; las alertas de stock bajo lo usan como umbral.
+"""
+from django.db.models import Sum, F, Value
+from django.db.models.functions import Coalesce
+from apps.stores.models import GeneralSetting
+from apps.warehouse.models import Warehouse
+from apps.product.models import Product
+from apps.sale.models import SaleDetail
+from utils.cache import bump_tenant_version
+from .models import DemandForecast
+from django.db import transaction
+from datetime import timedelta
+from decimal import Decimal
+import pandas as pd
+import numpy as np
+
+SMOOTHING_ALPHA = 0.3  # Peso del día más reciente en el suavizado exponencial
+
+
+def store_settings(store):
+    # Tiendas sin configuración guardada: valores por defecto del modelo
+    return getattr(store, 'settings', None) or GeneralSetting(store=store)
+
+
+def sales_history(warehouse_id, start, end):
+    """
+    Unidades vendidas (ventas completadas) por producto y día entre start y end, en una consulta.
+    """
+    rows = (
+        SaleDetail.objects
+        .filter(
+            sale__warehouse_id=warehouse_id,
+            sale__status='completed',
+            sale__soft_deleted=False,
+            sale__sale_date__gte=start,
+            sale__sale_date__lte=end,
+        )
+        .values_list('product_id', 'sale__sale_date')
+        .annotate(quantity=Sum('quantity'))
+        .order_by()
+    )
+    return pd.DataFrame.from_records(list(rows), columns=['product_id', 'date', 'quantity'])
+
+
+def demand_matrix(history, start, end):
+    """
+    Matriz día × producto con las unidades vendidas; los días sin ventas quedan en 0.
+    """
+    days = pd.date_range(start, end, freq='D')
+    if history.empty:
+        return pd.DataFrame(index=days, dtype=float)
+    history = history.assign(date=pd.to_datetime(history['date']))
+    matrix = history.pivot_table(index='date', columns='product_id', values='quantity', aggfunc='sum', fill_value=0)
+    return matrix.reindex(days, fill_value=0).astype(float)
+
+
+def forecast_demand(matrix, alpha=SMOOTHING_ALPHA):
+    """
+    Demanda diaria por producto: (media móvil de la ventana, suavizado exponencial al último día).
+    """
+    moving_average = matrix.mean()
+    smoothed = matrix.ewm(alpha=alpha, adjust=False).mean().iloc[-1] if len(matrix.columns) else matrix.mean()
+    return moving_average, smoothed
+
+
+def to_decimal(value, places):
+    if value is None or np.isnan(value):
+        return None
+    return Decimal(str(round(float(value), places)))
+
+
+def refresh_warehouse_forecasts(warehouse, day, alpha=SMOOTHING_ALPHA):
+    """
+    Recalcula el pronóstico de los productos del almacén. No invalida la caché: lo hace quien
+    llama al confirmar (refresh_forecasts).
+    """
+    config = store_settings(warehouse.store)
+    start = day - timedelta(days=max(config.forecast_window_days, 1) - 1)
+    moving_average, smoothed = forecast_demand(demand_matrix(sales_history(warehouse.id, start, day), start, day), alpha)
+
+    stock = pd.DataFrame.from_records(
+        list(Product.objects.filter(warehouse_id=warehouse.id, soft_deleted=False).values_list('id', 'stock')),
+        columns=['product_id', 'stock'],
+    ).set_index('product_id')
+    if stock.empty:
+        return 0
+
+    frame = stock.join(moving_average.rename('moving_average')).join(smoothed.rename('smoothed'))
+    frame = frame.fillna({'moving_average': 0.0, 'smoothed': 0.0})
+    frame['reorder_point'] = np.ceil(frame['smoothed'] * (config.lead_time_days + config.safety_stock_days))
+    frame['days_of_cover'] = (frame['stock'] / frame['smoothed']).where(frame['smoothed'] > 0)
+
+    forecasts = [
+        DemandForecast(
+            product_id=product_id,
+            warehouse_id=warehouse.id,
+            store_id=warehouse.store_id,
+            moving_average=to_decimal(row.moving_average, 4),
+            smoothed_demand=to_decimal(row.smoothed, 4),
+            reorder_point=int(row.reorder_point),
+            days_of_cover=to_decimal(row.days_of_cover, 1),
+            computed_for=day,
+        )
+        for product_id, row in frame.iterrows()
+    ]
+    DemandForecast.objects.bulk_create(
+        forecasts,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['product'],
+        update_fields=['moving_average', 'smoothed_demand', 'reorder_point', 'days_of_cover', 'computed_for', 'updated_at'],
+    )
+    return len(forecasts)
+
+
+def refresh_forecasts(day, warehouse_ids=None, alpha=SMOOTHING_ALPHA):
+    warehouses = Warehouse.objects.select_related('store__settings')
+    if warehouse_ids is not None:
+        warehouses = warehouses.filter(id__in=warehouse_ids)
+    written = 0
+    for warehouse in warehouses:
+        with transaction.atomic():
+            written += refresh_warehouse_forecasts(warehouse, day, alpha)
+            # bulk_create no dispara señales y las alertas de stock bajo están cacheadas por versión del almacén
+            bump_tenant_version(warehouse.id)
+    return written
+
+
+def reorder_threshold(store):
+    """
+    Umbral de stock bajo por producto: su punto de reorden o, si aún no tiene pronóstico,
+    el stock mínimo fijo de la tienda.
+    """
+    return Coalesce(F('forecast__reorder_point'), Value(store_settings(store).stock_minimo))
@@ -0,0 +1,118 @@
+"""
+Escritura del kardex por lotes.
+Ventas, compras, cancelaciones y la conciliación arman sus movimientos en memoria y los guardan
+con write_ledger (o acumulándolos en un LedgerWriter). Como el lote no pasa por save()/full_clean,
+aquí se aplican de una pasada las reglas de InventoryTransaction.clean: tienda y almacén
+obligatorios, cantidad distinta de cero, entradas positivas y salidas negativas.
+En PostgreSQL los lotes grandes se escriben con COPY (un solo flujo, sin armar un INSERT con
+miles de parámetros); los chicos y las demás bases usan bulk_create.
+"""
+from django.core.exceptions import ValidationError
+from django.db import connections, router
+from django.utils import timezone
+from utils.db import copy_from
+from .models import InventoryTransaction
+import io
+
+COPY_MIN_ROWS = 50  # Por debajo, un INSERT de bulk_create es igual de rápido
+BATCH_SIZE = 5000
+COPY_COLUMNS = (
+    'id', 'product_id', 'warehouse_id', 'store_id', 'quantity', 'type',
+    'reason', 'reference_type', 'reference_id', 'created_at', 'user_id',
+)
+
+
+def normalize_movements(movements):
+    """
+    Reglas de InventoryTransaction.clean sobre todo el lote. Fija también created_at
+    (COPY no aplica auto_now_add), así ambos caminos guardan lo mismo.
+    """
+    now = timezone.now()
+    for movement in movements:
+        if movement.store_id is None:
+            raise ValidationError({'store': 'El campo tienda (store) es obligatorio.'})
+        if movement.warehouse_id is None:
+            raise ValidationError({'store': 'El campo almacén (warehouse) es obligatorio.'})
+        quantity = int(movement.quantity)
+        if quantity == 0:
+            raise ValidationError("La cantidad no puede ser cero.")
+        if movement.type == InventoryTransaction.TransactionType.SALIDA:
+            quantity = -abs(quantity)
+        elif movement.type == InventoryTransaction.TransactionType.ENTRADA:
+            quantity = abs(quantity)
+        movement.quantity = quantity
+        if movement.created_at is None:
+            movement.created_at = now
+    return movements
+
+
+def copy_value(value):
+    # NULL sin comillas; todo lo demás entre comillas (un texto vacío no se confunde con NULL)
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def copy_movements(connection, movements):
+    buffer = io.StringIO()
+    for movement in movements:
+        buffer.write(','.join(copy_value(getattr(movement, column)) for column in COPY_COLUMNS))
+        buffer.write('\n')
+    buffer.seek(0)
+    table = connection.ops.quote_name(InventoryTransaction._meta.db_table)
+    with connection.cursor() as cursor:
+        copy_from(cursor, f'COPY {table} ({", ".join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)', buffer)
+
+
+def write_ledger(movements, batch_size=BATCH_SIZE):
+    """
+    Guarda los movimientos (InventoryTransaction sin guardar) y los devuelve.
+    """
+    movements = normalize_movements(list(movements))
+    if not movements:
+        return movements
+    connection = connections[router.db_for_write(InventoryTransaction)]
+    if connection.vendor != 'postgresql' or len(movements) < COPY_MIN_ROWS:
+        return InventoryTransaction.objects.bulk_create(movements, batch_size=batch_size)
+    for start in range(0, len(movements), batch_size):
+        copy_movements(connection, movements[start:start + batch_size])
+    for movement in movements:
+        movement._state.adding = False
+    return movements
+
+
+class LedgerWriter:
+    """
+    Acumula movimientos y los escribe cada batch_size (y al salir del bloque with).
+        with LedgerWriter() as ledger:
+            ledger.add(InventoryTransaction(...))
+    """
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self.pending = []
+        self.written = 0
+
+    def add(self, movement):
+        self.pending.append(movement)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def extend(self, movements):
+        for movement in movements:
+            self.add(movement)
+
+    def flush(self):
+        if self.pending:
+            write_ledger(self.pending, self.batch_size)
+            self.written += len(self.pending)
+            self.pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        # Si el bloque falló no se escribe lo pendiente: la transacción de quien llama se revierte
+        if exc_type is None:
+            self.flush()
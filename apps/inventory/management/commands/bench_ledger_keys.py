@@ -0,0 +1,101 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from apps.inventory.models import InventoryTransaction
+from apps.stores.models import Store
+from apps.warehouse.models import Warehouse
+from apps.product.models import Product
+from utils.ids import uuid7
+import random
+import time
+import uuid
+
+STRATEGIES = {'uuid4': uuid.uuid4, 'uuid7': uuid7}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark de bulk_create en el kardex con pk uuid4 vs uuid7: filas/s y crecimiento del índice de la pk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50000, help='Movimientos por corrida')
+        parser.add_argument('--batch-size', type=int, default=1000, help='batch_size de bulk_create')
+        parser.add_argument('--rounds', type=int, default=2, help='Corridas por estrategia (alternando el orden)')
+        parser.add_argument('--products', type=int, default=50, help='Productos de la tienda de prueba')
+
+    def handle(self, *args, **options):
+        store, warehouse, product_ids = self.crear_tienda(options['products'])
+        results = {name: [] for name in STRATEGIES}
+        try:
+            for round_number in range(options['rounds']):
+                # Se alterna el orden: cada corrida deja tuplas muertas en el índice hasta el VACUUM
+                names = list(STRATEGIES) if round_number % 2 == 0 else list(reversed(STRATEGIES))
+                for name in names:
+                    results[name].append(self.corrida(
+                        STRATEGIES[name], store, warehouse, product_ids, options['rows'], options['batch_size'],
+                    ))
+        finally:
+            store.delete()
+        self.reportar(results, options['rows'])
+
+    def crear_tienda(self, count):
+        code = uuid.uuid4().hex[:6].upper()
+        store = Store.objects.create(name=f'Bench {code}', code=f'B{code}')
+        warehouse = Warehouse.objects.create(name='Bench', code=f'B{code}', store=store)
+        products = Product.objects.bulk_create([
+            Product(
+                name=f'Bench {i}', code=f'B{code}{i}', slug=f'b{code.lower()}-{i}', store=store, warehouse=warehouse,
+                stock=0, sale_price=10, purchase_price=5,
+            )
+            for i in range(count)
+        ])
+        return store, warehouse, [product.id for product in products]
+
+    def corrida(self, new_id, store, warehouse, product_ids, rows, batch_size):
+        """
+        Inserta en una transacción que se revierte al final: la tabla real no cambia.
+        Devuelve (segundos de bulk_create, bytes que creció el índice de la pk o None).
+        """
+        movements = [
+            InventoryTransaction(
+                id=new_id(), product_id=random.choice(product_ids), warehouse=warehouse, store=store,
+                quantity=1, type='entrada', reason='Benchmark',
+            )
+            for _ in range(rows)
+        ]
+        with transaction.atomic():
+            before = self.pk_index_size()
+            start = time.perf_counter()
+            InventoryTransaction.objects.bulk_create(movements, batch_size=batch_size)
+            elapsed = time.perf_counter() - start
+            after = self.pk_index_size()
+            transaction.set_rollback(True)
+        growth = after - before if before is not None and after is not None else None
+        return elapsed, growth
+
+    def pk_index_size(self):
+        table = InventoryTransaction._meta.db_table
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Con el kardex particionado suma el índice de la pk de todas las particiones
+                cursor.execute(
+                    'SELECT COALESCE(SUM(pg_relation_size(relid)), 0) FROM pg_partition_tree(%s::regclass)',
+                    [f'{table}_pkey'],
+                )
+                return cursor.fetchone()[0]
+            if connection.vendor == 'sqlite':
+                try:
+                    cursor.execute('SELECT SUM(pgsize) FROM dbstat WHERE name = %s', [f'sqlite_autoindex_{table}_1'])
+                    return cursor.fetchone()[0] or 0
+                except Exception:
+                    return None  # SQLite compilado sin dbstat
+        return None
+
+    def reportar(self, results, rows):
+        self.stdout.write(f'{rows} movimientos por corrida ({connection.vendor})')
+        for name, runs in results.items():
+            seconds = sum(elapsed for elapsed, _ in runs) / len(runs)
+            growths = [growth for _, growth in runs if growth is not None]
+            line = f'{name}: {rows / seconds:,.0f} filas/s ({seconds:.2f}s)'
+            if growths:
+                growth = sum(growths) / len(growths)
+                line += f' | índice pk +{growth / 1024 / 1024:.1f} MB ({growth / rows:.1f} bytes/fila)'
+            self.stdout.write(self.style.SUCCESS(line))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.inventory.partitions import ensure_partitions, archive_partitions, MONTHS_AHEAD, PartitionError
+from django.db import connection
+
+class Command(BaseCommand):
+    help = (
+        'Crea las particiones mensuales futuras del kardex y archiva las antiguas (PostgreSQL, pensado para cada mes). '
+        'Antes de archivar guarda la foto de stock del último día archivado y no archiva si falta alguna.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=MONTHS_AHEAD, help='Meses futuros con partición creada')
+        parser.add_argument('--retention-months', type=int, help='Meses que se conservan en la BD (el actual incluido); los anteriores se archivan')
+        parser.add_argument('--archive-dir', help='Directorio de los archivos .csv.gz (obligatorio con --retention-months)')
+        parser.add_argument('--dry-run', action='store_true', help='Solo listar las particiones a archivar')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING('El particionado del kardex solo aplica en PostgreSQL: nada que hacer.'))
+            return
+        if options['months_ahead'] < 0:
+            raise CommandError('months-ahead no puede ser negativo.')
+        retention = options['retention_months']
+        if retention is not None:
+            if retention < 1:
+                raise CommandError('retention-months debe ser al menos 1.')
+            if not options['archive_dir'] and not options['dry_run']:
+                raise CommandError('Indica --archive-dir para archivar.')
+
+        if not options['dry_run']:
+            created = ensure_partitions(options['months_ahead'])
+            self.stdout.write(self.style.SUCCESS(f'✅ Particiones creadas: {", ".join(created) or "ninguna"}'))
+
+        if retention is not None:
+            try:
+                archived = archive_partitions(retention, options['archive_dir'], dry_run=options['dry_run'])
+            except PartitionError as exc:
+                raise CommandError(str(exc))
+            label = 'Particiones a archivar' if options['dry_run'] else 'Particiones archivadas'
+            self.stdout.write(self.style.SUCCESS(f'✅ {label}: {", ".join(archived) or "ninguna"}'))
@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.inventory.reconcile import reconcile_stock, DEFAULT_CHUNK_SIZE, REPAIR_MODES, DEFAULT_REPAIR_MODE
+from apps.accounts.models import User
+import csv
+
+REPORT_FIELDS = ['product_id', 'warehouse_id', 'stock', 'ledger', 'opening', 'reserved_stock', 'reserved']
+
+class Command(BaseCommand):
+    help = (
+        'Concilia Product.stock con el kardex y reserved_stock con las ventas pendientes (opcionalmente repara). '
+        '--repair sin valor usa el modo ledger: el stock manda y se registra un ajuste en el kardex. '
+        'Con --repair stock el kardex manda, pero los productos sin saldo inicial en el kardex '
+        '(sin foto ni entrada/ajuste, p. ej. creados con stock inicial) no se tocan y se informan '
+        'como "sin saldo inicial" para repararlos con --repair ledger.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--warehouse', action='append', dest='warehouses', help='ID de almacén (repetible). Por defecto, todos.')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Productos por bloque')
+        parser.add_argument('--repair', nargs='?', const=DEFAULT_REPAIR_MODE, choices=REPAIR_MODES,
+                            help='ledger (por defecto): el stock manda y se registra un ajuste; '
+                                 'stock: el kardex manda y se corrige Product.stock, salvo productos sin saldo inicial')
+        parser.add_argument('--user', help='Email del usuario que figura en los ajustes (con --repair ledger)')
+        parser.add_argument('--report', help='Guardar las diferencias (CSV) en esta ruta')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('chunk-size debe ser mayor que cero.')
+        user = None
+        if options['user']:
+            user = User.objects.filter(email=options['user']).first()
+            if user is None:
+                raise CommandError('Usuario no encontrado.')
+
+        report = open(options['report'], 'w', newline='', encoding='utf-8') if options['report'] else None
+        writer = None
+        if report:
+            writer = csv.DictWriter(report, fieldnames=REPORT_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+
+        checked = stock_drift = reserved_drift = skipped = 0
+        try:
+            for size, drift in reconcile_stock(options['warehouses'], options['chunk_size'], options['repair'], user):
+                checked += size
+                for row in drift:
+                    stock_drift += row['stock'] != row['ledger']
+                    skipped += options['repair'] == 'stock' and not row['opening'] and row['stock'] != row['ledger']
+                    reserved_drift += row['reserved_stock'] != row['reserved']
+                    if writer:
+                        writer.writerow(row)
+                    elif stock_drift + reserved_drift <= 20:
+                        self.stdout.write(self.style.WARNING(
+                            f"{row['product_id']}: stock {row['stock']} / kardex {row['ledger']}"
+                            f"{'' if row['opening'] else ' (sin saldo inicial)'}, "
+                            f"reservado {row['reserved_stock']} / pendiente {row['reserved']}"
+                        ))
+        finally:
+            if report:
+                report.close()
+
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f'{skipped} productos sin saldo inicial en el kardex no se corrigieron; use --repair ledger'
+            ))
+        action = 'reparados' if options['repair'] else 'con diferencias'
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {checked} productos revisados: {stock_drift - skipped} {action} en stock, {reserved_drift} {action} en reservas'
+        ))
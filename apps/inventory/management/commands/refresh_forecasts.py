@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.inventory.forecast import refresh_forecasts, SMOOTHING_ALPHA
+from django.utils.timezone import localdate
+from datetime import date, timedelta
+
+class Command(BaseCommand):
+    help = 'Recalcula la demanda pronosticada, el punto de reorden y los días de cobertura por producto (cada noche)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Último día de ventas a considerar (YYYY-MM-DD). Por defecto, ayer.')
+        parser.add_argument('--warehouse', action='append', dest='warehouses', help='ID de almacén (repetible). Por defecto, todos.')
+        parser.add_argument('--alpha', type=float, default=SMOOTHING_ALPHA, help='Factor del suavizado exponencial (0-1)')
+
+    def handle(self, *args, **options):
+        if options['date']:
+            try:
+                day = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError('Fecha inválida, usa el formato YYYY-MM-DD.')
+        else:
+            day = localdate() - timedelta(days=1)
+        if not 0 < options['alpha'] <= 1:
+            raise CommandError('alpha debe estar entre 0 y 1.')
+
+        written = refresh_forecasts(day, warehouse_ids=options['warehouses'], alpha=options['alpha'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Pronóstico de demanda al {day}: {written} productos'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.inventory.utils import take_stock_snapshot
+from django.utils.timezone import localdate
+from datetime import date, timedelta
+
+class Command(BaseCommand):
+    help = 'Guarda la foto diaria de stock por producto y almacén (pensado para ejecutarse cada noche)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Día cerrado a fotografiar (YYYY-MM-DD, anterior a hoy). Por defecto, ayer.')
+        parser.add_argument('--warehouse', action='append', dest='warehouses', help='ID de almacén (repetible). Por defecto, todos.')
+
+    def handle(self, *args, **options):
+        if options['date']:
+            try:
+                day = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError('Fecha inválida, usa el formato YYYY-MM-DD.')
+            # La foto de un día abierto ocultaría a stock_at los movimientos posteriores de ese día
+            if day >= localdate():
+                raise CommandError('Solo se pueden fotografiar días cerrados (anteriores a hoy).')
+        else:
+            day = localdate() - timedelta(days=1)
+
+        written = take_stock_snapshot(day, warehouse_ids=options['warehouses'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Foto de stock del {day}: {written} productos'))
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_stock_snapshot'),
+        ('product', '0002_alter_product_purchase_price_and_more'),
+        ('stores', '0003_gapless_invoice_numbers'),
+        ('warehouse', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='inventorytransaction',
+            name='inventory_i_warehou_7aee79_idx',
+        ),
+        migrations.AddIndex(
+            model_name='inventorytransaction',
+            index=models.Index(fields=['warehouse', 'created_at', 'id'], name='inventory_i_warehou_91b9c1_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_keyset_indexes'),
+        ('product', '0005_product_slug_field'),
+        ('stores', '0004_forecast_settings'),
+        ('warehouse', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DemandForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('moving_average', models.DecimalField(decimal_places=4, default=0, max_digits=12)),
+                ('smoothed_demand', models.DecimalField(decimal_places=4, default=0, max_digits=12)),
+                ('reorder_point', models.PositiveIntegerField(default=0)),
+                ('days_of_cover', models.DecimalField(blank=True, decimal_places=1, max_digits=10, null=True)),
+                ('computed_for', models.DateField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='forecast', to='product.product')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forecasts', to='stores.store')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forecasts', to='warehouse.warehouse')),
+            ],
+            options={
+                'verbose_name': 'Pronóstico de Demanda',
+                'verbose_name_plural': 'Pronósticos de Demanda',
+                'indexes': [models.Index(fields=['warehouse', 'computed_for'], name='inventory_d_warehou_c7fe3a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def partition(apps, schema_editor):
+    from apps.inventory.partitions import partition_ledger
+    partition_ledger(apps, schema_editor)
+
+
+def unpartition(apps, schema_editor):
+    from apps.inventory.partitions import unpartition_ledger
+    unpartition_ledger(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_demand_forecast'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, unpartition),
+    ]
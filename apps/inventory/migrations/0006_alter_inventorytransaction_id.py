@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:03
+
+import utils.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_partition_ledger'),
+    ]
+
+    operations = [
+        # Solo cambia el default de Python: sin SQL (SQLite reconstruiría la tabla).
+        # Las filas existentes conservan su uuid4; los uuid7 nuevos conviven con ellos.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='inventorytransaction',
+                    name='id',
+                    field=models.UUIDField(default=utils.ids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+            ],
+        ),
+    ]
@@ -5,7 +5,7 @@ from apps.product.models import Product
 from apps.stores.models import Store
 from django.conf import settings
 from django.db import models
-import uuid
+from utils.ids import uuid7
 
 # Create your models here.
 class InventoryTransaction(models.Model):
@@ -14,7 +14,7 @@ class InventoryTransaction(models.Model):
         SALIDA = 'salida', _('Salida')
         AJUSTE = 'ajuste', _('Ajuste')
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE)
     store = models.ForeignKey(Store, on_delete=models.CASCADE, related_name="transactions")
@@ -55,3 +55,56 @@ class InventoryTransaction(models.Model):
         verbose_name = "Transacción de Inventario"
         verbose_name_plural = "Transacciones de Inventario"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['warehouse', 'created_at', 'id']),  # kardex por rango y paginación keyset
+        ]
+
+class StockSnapshot(models.Model):
+    """
+    Foto diaria del stock acumulado del kardex (suma de movimientos hasta el cierre del día)
+    por producto y almacén. La escribe el comando nocturno snapshot_stock.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_snapshots')
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name='stock_snapshots')
+    store = models.ForeignKey(Store, on_delete=models.CASCADE, related_name='stock_snapshots')
+    date = models.DateField()
+    quantity = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Foto de Stock"
+        verbose_name_plural = "Fotos de Stock"
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'date'], name='stock_snapshot_product_date_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['warehouse', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.date}: {self.quantity}"
+
+class DemandForecast(models.Model):
+    """
+    Demanda pronosticada por producto a partir del historial de ventas, con su punto de reorden
+    y días de cobertura. La recalcula el comando refresh_forecasts (ver inventory/forecast.py).
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='forecast')
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name='forecasts')
+    store = models.ForeignKey(Store, on_delete=models.CASCADE, related_name='forecasts')
+    moving_average = models.DecimalField(max_digits=12, decimal_places=4, default=0)  # unidades/día
+    smoothed_demand = models.DecimalField(max_digits=12, decimal_places=4, default=0)  # unidades/día (suavizado exponencial)
+    reorder_point = models.PositiveIntegerField(default=0)
+    days_of_cover = models.DecimalField(max_digits=10, decimal_places=1, null=True, blank=True)  # null: sin ventas
+    computed_for = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Pronóstico de Demanda"
+        verbose_name_plural = "Pronósticos de Demanda"
+        indexes = [
+            models.Index(fields=['warehouse', 'computed_for']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.smoothed_demand}/día, reorden {self.reorder_point}"
@@ -0,0 +1,272 @@
+"""
+Particionado mensual del kardex (solo PostgreSQL).
+inventory_inventorytransaction es una tabla particionada por rango de created_at con una
+partición por mes (<tabla>_pAAAAMM) y una partición DEFAULT para fechas sin partición propia.
+Las consultas del kardex filtran por created_at, así el planificador solo toca los meses pedidos.
+La clave primaria en la BD es (id, created_at), porque Postgres exige la clave de partición en
+ella; para Django la pk sigue siendo id.
+
+El comando ledger_partitions crea las particiones de los meses siguientes y archiva las antiguas:
+antes de archivar guarda la foto de stock del último día archivado (stock_at, la conciliación y
+las fotos posteriores parten de ella) y se niega a seguir si algún almacén con movimientos en
+esos meses queda sin foto; luego vuelca cada partición a un CSV comprimido y la elimina.
+Si la partición DEFAULT ya tiene filas del mes a crear (p. ej. el comando no corrió a tiempo),
+se desacopla, se crea la partición, se mueven las filas y se vuelve a acoplar en una transacción.
+En otras bases de datos (SQLite en desarrollo) todo esto es un no-op.
+"""
+from django.db import connection, transaction
+from django.utils import timezone
+from utils.db import copy_to
+from datetime import date, datetime, timedelta
+from pathlib import Path
+import gzip
+import re
+
+LEDGER_TABLE = 'inventory_inventorytransaction'
+UNPARTITIONED_TABLE = f'{LEDGER_TABLE}_unpartitioned'
+DEFAULT_PARTITION = f'{LEDGER_TABLE}_default'
+PARTITION_PATTERN = re.compile(rf'^{LEDGER_TABLE}_p(\d{{4}})(\d{{2}})$')
+MONTHS_AHEAD = 3
+
+
+class PartitionError(Exception):
+    pass
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{LEDGER_TABLE}_p{month:%Y%m}'
+
+
+def month_bound(month):
+    # Límite en la zona horaria del proyecto: el mes coincide con el de los reportes
+    return timezone.make_aware(datetime.combine(month, datetime.min.time())).isoformat()
+
+
+def is_partitioned(cursor):
+    cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)', [LEDGER_TABLE])
+    row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def create_partition(cursor, month):
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {LEDGER_TABLE} '
+        f"FOR VALUES FROM ('{month_bound(month)}') TO ('{month_bound(add_months(month, 1))}')"
+    )
+
+
+def table_exists(cursor, table):
+    cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [table])
+    return cursor.fetchone()[0]
+
+
+def default_has_rows(cursor, month):
+    cursor.execute(
+        f'SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s)',
+        [month_bound(month), month_bound(add_months(month, 1))],
+    )
+    return cursor.fetchone()[0]
+
+
+def create_partition_from_default(cursor, month):
+    """
+    Crea la partición del mes moviendo a ella las filas que ya cayeron en DEFAULT. Postgres no
+    permite crearla mientras DEFAULT tenga filas del rango: se desacopla DEFAULT, se crea la
+    partición, se reinsertan las filas por la tabla padre y se vuelve a acoplar (ATTACH valida
+    que no quede ninguna fuera de rango). Llamar dentro de una transacción.
+    """
+    bounds = [month_bound(month), month_bound(add_months(month, 1))]
+    cursor.execute(f'ALTER TABLE {LEDGER_TABLE} DETACH PARTITION {DEFAULT_PARTITION}')
+    create_partition(cursor, month)
+    cursor.execute(
+        f'INSERT INTO {LEDGER_TABLE} SELECT * FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s',
+        bounds,
+    )
+    cursor.execute(f'DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s', bounds)
+    cursor.execute(f'ALTER TABLE {LEDGER_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT')
+
+
+def partition_months(cursor):
+    """
+    Meses con partición propia, ordenados.
+    """
+    cursor.execute(
+        'SELECT child.relname FROM pg_inherits '
+        'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+        'WHERE pg_inherits.inhparent = to_regclass(%s)',
+        [LEDGER_TABLE],
+    )
+    months = []
+    for (name,) in cursor.fetchall():
+        match = PARTITION_PATTERN.match(name)
+        if match:
+            months.append(date(int(match[1]), int(match[2]), 1))
+    return sorted(months)
+
+
+def ensure_partitions(months_ahead=MONTHS_AHEAD, today=None):
+    """
+    Crea las particiones que falten desde el mes actual hasta months_ahead meses después.
+    Devuelve los nombres creados.
+    """
+    if connection.vendor != 'postgresql':
+        return []
+    current = month_start(today or timezone.localdate())
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return []
+        existing = set(partition_months(cursor))
+        has_default = table_exists(cursor, DEFAULT_PARTITION)
+        created = []
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if month in existing:
+                continue
+            with transaction.atomic():
+                if has_default and default_has_rows(cursor, month):
+                    create_partition_from_default(cursor, month)
+                else:
+                    create_partition(cursor, month)
+            created.append(partition_name(month))
+    return created
+
+
+def archive_partitions(retention_months, directory, today=None, dry_run=False):
+    """
+    Archiva las particiones de meses anteriores a la ventana de retención (el mes actual cuenta
+    como uno): <directorio>/<partición>.csv.gz y luego DETACH + DROP. Devuelve los nombres.
+    """
+    if connection.vendor != 'postgresql':
+        return []
+    cutoff = add_months(month_start(today or timezone.localdate()), -(retention_months - 1))
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return []
+        months = [month for month in partition_months(cursor) if month < cutoff]
+    if dry_run or not months:
+        return [partition_name(month) for month in months]
+
+    # Foto de stock al cierre del último día archivado: desde ahí se reconstruye el saldo
+    from .utils import take_stock_snapshot
+    boundary = cutoff - timedelta(days=1)
+    take_stock_snapshot(boundary)
+    missing = warehouses_without_snapshot(cutoff, boundary)
+    if missing:
+        raise PartitionError(
+            f'No se archiva: {len(missing)} almacenes con movimientos en esos meses no tienen foto '
+            f'de stock desde el {boundary:%Y-%m-%d} ({", ".join(str(pk) for pk in missing[:5])}).'
+        )
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    archived = []
+    for month in months:
+        name = partition_name(month)
+        path = directory / f'{name}.csv.gz'
+        with connection.cursor() as cursor, gzip.open(path, 'wb') as file:
+            copy_to(cursor, f'COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)', file)
+        # Solo se elimina con el archivo ya escrito y cerrado
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE {LEDGER_TABLE} DETACH PARTITION {name}')
+            cursor.execute(f'DROP TABLE {name}')
+        archived.append(name)
+    return archived
+
+
+def warehouses_without_snapshot(cutoff, boundary):
+    """
+    Almacenes con movimientos anteriores a cutoff sin foto de stock en boundary o después.
+    """
+    from .models import InventoryTransaction, StockSnapshot
+    warehouse_ids = set(
+        InventoryTransaction.objects.filter(created_at__lt=month_bound(cutoff))
+        .values_list('warehouse_id', flat=True).distinct().order_by()
+    )
+    covered = set(
+        StockSnapshot.objects.filter(warehouse_id__in=warehouse_ids, date__gte=boundary)
+        .values_list('warehouse_id', flat=True).distinct().order_by()
+    )
+    return sorted(warehouse_ids - covered, key=str)
+
+
+def _table_definitions(cursor, table):
+    """
+    Índices (salvo la pk) y restricciones FK/CHECK de la tabla, para recrearlos tras reconstruirla.
+    """
+    cursor.execute(
+        'SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT IN '
+        "(SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'p')",
+        [table, table],
+    )
+    indexes = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(%s) AND contype IN ('f', 'c')",
+        [table],
+    )
+    return indexes, cursor.fetchall()
+
+
+def _rebuild_ledger_table(schema_editor, partitioned):
+    with schema_editor.connection.cursor() as cursor:
+        indexes, constraints = _table_definitions(cursor, LEDGER_TABLE)
+
+        schema_editor.execute(f'ALTER TABLE {LEDGER_TABLE} RENAME TO {UNPARTITIONED_TABLE}')
+        schema_editor.execute(f'ALTER TABLE {UNPARTITIONED_TABLE} RENAME CONSTRAINT {LEDGER_TABLE}_pkey TO {UNPARTITIONED_TABLE}_pkey')
+        if partitioned:
+            schema_editor.execute(
+                f'CREATE TABLE {LEDGER_TABLE} (LIKE {UNPARTITIONED_TABLE} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)'
+            )
+            schema_editor.execute(f'ALTER TABLE {LEDGER_TABLE} ADD CONSTRAINT {LEDGER_TABLE}_pkey PRIMARY KEY (id, created_at)')
+            # Un mes por partición desde el movimiento más antiguo hasta MONTHS_AHEAD meses adelante
+            cursor.execute(f'SELECT MIN(created_at) FROM {UNPARTITIONED_TABLE}')
+            oldest = cursor.fetchone()[0]
+            current = month_start(timezone.localdate())
+            month = month_start(timezone.localtime(oldest).date()) if oldest else current
+            while month <= add_months(current, MONTHS_AHEAD):
+                create_partition(cursor, month)
+                month = add_months(month, 1)
+            schema_editor.execute(f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {LEDGER_TABLE} DEFAULT')
+        else:
+            schema_editor.execute(f'CREATE TABLE {LEDGER_TABLE} (LIKE {UNPARTITIONED_TABLE} INCLUDING DEFAULTS)')
+            schema_editor.execute(f'ALTER TABLE {LEDGER_TABLE} ADD CONSTRAINT {LEDGER_TABLE}_pkey PRIMARY KEY (id)')
+
+        schema_editor.execute(f'INSERT INTO {LEDGER_TABLE} SELECT * FROM {UNPARTITIONED_TABLE}')
+        schema_editor.execute(f'DROP TABLE {UNPARTITIONED_TABLE} CASCADE')
+        # Mismos nombres que generó Django: las migraciones siguientes los siguen encontrando
+        for definition in indexes:
+            schema_editor.execute(definition)
+        for name, definition in constraints:
+            schema_editor.execute(f'ALTER TABLE {LEDGER_TABLE} ADD CONSTRAINT {name} {definition}')
+
+
+def partition_ledger(apps, schema_editor):
+    """
+    Convierte el kardex existente en tabla particionada por mes (para RunPython).
+    Copia todas las filas dentro de la transacción de la migración: con un kardex muy grande,
+    ejecutarla en una ventana de mantenimiento.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        if is_partitioned(cursor):
+            return
+    _rebuild_ledger_table(schema_editor, partitioned=True)
+
+
+def unpartition_ledger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return
+    _rebuild_ledger_table(schema_editor, partitioned=False)
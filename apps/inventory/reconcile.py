@@ -0,0 +1,175 @@
+"""
+Conciliación de stock: Product.stock contra la suma del kardex y reserved_stock contra las
+unidades de las ventas pendientes (las únicas que reservan).
+Los productos se recorren por almacén en bloques paginados por id y cada bloque hace un GROUP BY
+por fuente, así la memoria queda acotada al tamaño del bloque aunque el kardex tenga millones de
+filas. El saldo del kardex parte de la última foto de stock del almacén (sigue siendo correcto
+después de archivar particiones antiguas, ver partitions.py) y suma los movimientos posteriores.
+Al reparar, cada bloque se relee con las filas de producto bloqueadas y se corrige en la misma
+transacción con un UPDATE (CASE por producto), sin carreras con ventas o compras en curso.
+Un producto sin saldo inicial en el kardex (ni en la foto ni con una entrada o ajuste posterior,
+p. ej. creado con stock desde ProductCreateSerializer) no se corrige en modo 'stock': la suma de
+sus movimientos no es su stock real y lo dejaría en cero. Se informa con opening=False para
+repararlo en modo 'ledger', que registra el ajuste de apertura.
+"""
+from django.db.models import Case, When, Sum, F, IntegerField
+from apps.product.stock import lock_products
+from apps.product.models import Product
+from apps.sale.models import SaleDetail
+from utils.cache import bump_tenant_version
+from apps.warehouse.models import Warehouse
+from .models import InventoryTransaction, StockSnapshot
+from .ledger import write_ledger
+from .utils import balances_from, latest_snapshot_date, ledger_between
+from django.utils import timezone
+from django.db import transaction
+
+DEFAULT_CHUNK_SIZE = 1000
+REPAIR_MODES = ('ledger', 'stock')
+DEFAULT_REPAIR_MODE = 'ledger'
+OPENING_TYPES = ('entrada', 'ajuste')
+RECONCILIATION_REASON = 'Conciliación de stock'
+
+
+def product_chunks(warehouse_id, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Ids de producto del almacén por bloques, paginando por id (sin OFFSET). Incluye los dados de baja.
+    """
+    products = Product.all_objects.filter(warehouse_id=warehouse_id).order_by('pk')
+    last = None
+    while True:
+        page = products if last is None else products.filter(pk__gt=last)
+        ids = list(page.values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return
+        yield ids
+        last = ids[-1]
+
+
+def reserved_totals(product_ids):
+    return dict(
+        SaleDetail.objects
+        .filter(product_id__in=product_ids, sale__status='pending', sale__soft_deleted=False)
+        .values_list('product_id')
+        .annotate(total=Sum('quantity'))
+        .order_by()
+    )
+
+
+def with_opening_balance(warehouse_id, checkpoint, product_ids):
+    """
+    Productos del bloque con saldo inicial: fila en la foto del checkpoint o alguna entrada
+    o ajuste posterior.
+    """
+    opened = set()
+    if checkpoint is not None:
+        opened.update(
+            StockSnapshot.objects.filter(warehouse_id=warehouse_id, date=checkpoint, product_id__in=product_ids)
+            .values_list('product_id', flat=True)
+        )
+    opened.update(
+        ledger_between(checkpoint, None, warehouse_id=warehouse_id, product_id__in=product_ids)
+        .filter(type__in=OPENING_TYPES)
+        .values_list('product_id', flat=True)
+        .distinct()
+    )
+    return opened
+
+
+def chunk_drift(warehouse_id, checkpoint, product_ids):
+    """
+    Productos del bloque con diferencias: [{'product_id', 'warehouse_id', 'store_id', 'stock',
+    'ledger', 'opening', 'reserved_stock', 'reserved'}, ...].
+    """
+    ledger = balances_from(warehouse_id, checkpoint, None, product_id__in=product_ids)
+    opened = with_opening_balance(warehouse_id, checkpoint, product_ids)
+    reserved = reserved_totals(product_ids)
+    products = Product.all_objects.filter(pk__in=product_ids).values_list(
+        'pk', 'store_id', 'stock', 'reserved_stock'
+    )
+    drift = []
+    for product_id, store_id, stock, reserved_stock in products:
+        expected_stock = ledger.get(product_id) or 0
+        expected_reserved = reserved.get(product_id) or 0
+        if stock != expected_stock or reserved_stock != expected_reserved:
+            drift.append({
+                'product_id': product_id,
+                'warehouse_id': warehouse_id,
+                'store_id': store_id,
+                'stock': stock,
+                'ledger': expected_stock,
+                'opening': product_id in opened,
+                'reserved_stock': reserved_stock,
+                'reserved': expected_reserved,
+            })
+    return drift
+
+
+def _case(field, values):
+    return Case(
+        *[When(pk=pk, then=value) for pk, value in values.items()],
+        default=F(field),
+        output_field=IntegerField(),
+    )
+
+
+def repair_chunk(warehouse_id, checkpoint, product_ids, mode, user=None):
+    """
+    Corrige las diferencias del bloque y las devuelve.
+    mode='stock': el kardex manda, Product.stock toma la suma de movimientos (salvo los productos
+    sin saldo inicial, que se devuelven sin tocar su stock).
+    mode='ledger': el stock manda, se registra un ajuste en el kardex por la diferencia.
+    En ambos casos reserved_stock toma las unidades de las ventas pendientes.
+    """
+    with transaction.atomic():
+        lock_products(product_ids)
+        drift = chunk_drift(warehouse_id, checkpoint, product_ids)
+        if not drift:
+            return drift
+
+        values = {'reserved_stock': {row['product_id']: max(row['reserved'], 0) for row in drift}}
+        if mode == 'stock':
+            # stock es PositiveIntegerField: un kardex negativo se deja en 0 y se sigue informando
+            values['stock'] = {row['product_id']: max(row['ledger'], 0) for row in drift if row['opening']}
+        else:
+            write_ledger([
+                InventoryTransaction(
+                    product_id=row['product_id'],
+                    warehouse_id=row['warehouse_id'],
+                    store_id=row['store_id'],
+                    quantity=row['stock'] - row['ledger'],
+                    type='ajuste',
+                    reason=RECONCILIATION_REASON,
+                    reference_type='Reconciliation',
+                    user=user,
+                )
+                for row in drift if row['stock'] != row['ledger']
+            ])
+
+        Product.all_objects.filter(pk__in=[row['product_id'] for row in drift]).update(
+            **{field: _case(field, changes) for field, changes in values.items()}
+        )
+        # write_ledger y update no disparan las señales que invalidan la caché
+        bump_tenant_version(warehouse_id)
+    return drift
+
+
+def reconcile_stock(warehouse_ids=None, chunk_size=DEFAULT_CHUNK_SIZE, repair=None, user=None):
+    """
+    Recorre los productos por bloques y va entregando las diferencias de cada bloque
+    (corregidas si se indica repair='stock' o repair='ledger').
+    """
+    if repair is not None and repair not in REPAIR_MODES:
+        raise ValueError(repair)
+    warehouses = Warehouse.objects.order_by('pk')
+    if warehouse_ids is not None:
+        warehouses = warehouses.filter(id__in=warehouse_ids)
+    for warehouse_id in warehouses.values_list('pk', flat=True):
+        # Última foto de un día cerrado: las de hoy no incluirían los movimientos posteriores
+        checkpoint = latest_snapshot_date(warehouse_id, timezone.localdate())
+        for product_ids in product_chunks(warehouse_id, chunk_size):
+            if repair:
+                drift = repair_chunk(warehouse_id, checkpoint, product_ids, repair, user)
+            else:
+                drift = chunk_drift(warehouse_id, checkpoint, product_ids)
+            yield len(product_ids), drift
@@ -2,6 +2,8 @@ from .models import InventoryTransaction
 from rest_framework import serializers
 
 class InventoryTransactionSerializer(serializers.ModelSerializer):
+    user_name = serializers.CharField(source='user.name', read_only=True, default=None)
+
     class Meta:
         model = InventoryTransaction
         fields = ['id', 'product', 'warehouse', 'quantity',
@@ -1,3 +1,145 @@
+from django.core.management import call_command, CommandError
 from django.test import TestCase
+from django.utils import timezone
+from utils.testing import make_tenant
+from datetime import timedelta
+from .ledger import write_ledger
+from .models import InventoryTransaction, StockSnapshot
+from .partitions import archive_partitions, ensure_partitions, warehouses_without_snapshot, month_start, add_months
+from .reconcile import reconcile_stock
+from .utils import stock_at, take_stock_snapshot
+import io
 
-# Create your tests here.
+
+class LedgerTestMixin:
+    def setUp(self):
+        self.store, self.warehouse, self.user, self.products = make_tenant(products=2, stock=10)
+
+    def move(self, product, type, quantity, days_ago=0):
+        movement, = write_ledger([InventoryTransaction(
+            product=product, warehouse=self.warehouse, store=self.store, quantity=quantity, type=type, user=self.user,
+        )])
+        if days_ago:
+            # auto_now_add fija la fecha al guardar: se retrocede después
+            InventoryTransaction.objects.filter(pk=movement.pk).update(
+                created_at=timezone.now() - timedelta(days=days_ago)
+            )
+        return movement
+
+    def drift(self, repair=None):
+        return {
+            row['product_id']: row
+            for _, rows in reconcile_stock([self.warehouse.id], chunk_size=1, repair=repair, user=self.user)
+            for row in rows
+        }
+
+
+class StockAtTest(LedgerTestMixin, TestCase):
+    def test_snapshot_plus_later_movements(self):
+        product = self.products[0]
+        today = timezone.localdate()
+        self.move(product, 'entrada', 10, days_ago=3)
+        self.move(product, 'salida', 4, days_ago=2)
+        self.assertEqual(take_stock_snapshot(today - timedelta(days=2), [self.warehouse.id]), 1)
+        self.move(product, 'entrada', 5, days_ago=1)
+        self.move(product, 'ajuste', -2)
+
+        snapshot = StockSnapshot.objects.get(product=product)
+        self.assertEqual(snapshot.quantity, 6)
+        self.assertEqual(stock_at(self.warehouse.id, today - timedelta(days=3), [product.id]), {product.id: 10})
+        self.assertEqual(stock_at(self.warehouse.id, today - timedelta(days=1), [product.id]), {product.id: 11})
+        self.assertEqual(stock_at(self.warehouse.id, today, [product.id]), {product.id: 9})
+
+    def test_snapshot_command_rejects_open_days(self):
+        today = timezone.localdate()
+        for day in (today, today + timedelta(days=1)):
+            with self.assertRaisesMessage(CommandError, 'días cerrados'):
+                call_command('snapshot_stock', '--date', day.isoformat(), stdout=io.StringIO())
+        self.assertFalse(StockSnapshot.objects.exists())
+
+        self.move(self.products[0], 'entrada', 3, days_ago=1)
+        call_command('snapshot_stock', '--date', (today - timedelta(days=1)).isoformat(), stdout=io.StringIO())
+        self.assertEqual(StockSnapshot.objects.get().quantity, 3)
+
+    def test_snapshot_is_the_starting_balance(self):
+        # Movimientos anteriores a la foto ya no se suman (p. ej. partición archivada)
+        product = self.products[0]
+        today = timezone.localdate()
+        StockSnapshot.objects.create(
+            product=product, warehouse=self.warehouse, store=self.store, date=today - timedelta(days=1), quantity=7
+        )
+        self.move(product, 'entrada', 100, days_ago=5)
+        self.move(product, 'salida', 2)
+
+        self.assertEqual(stock_at(self.warehouse.id, today, [product.id]), {product.id: 5})
+
+
+class ReconcileStockTest(LedgerTestMixin, TestCase):
+    def test_reports_stock_and_reserved_drift(self):
+        opened, unopened = self.products
+        self.move(opened, 'entrada', 10)
+        self.move(opened, 'salida', 3)
+
+        drift = self.drift()
+
+        self.assertEqual((drift[opened.id]['stock'], drift[opened.id]['ledger']), (10, 7))
+        self.assertTrue(drift[opened.id]['opening'])
+        self.assertEqual((drift[unopened.id]['stock'], drift[unopened.id]['ledger']), (10, 0))
+        self.assertFalse(drift[unopened.id]['opening'])
+
+    def test_stock_repair_skips_products_without_opening_balance(self):
+        opened, unopened = self.products
+        self.move(opened, 'entrada', 10)
+        self.move(opened, 'salida', 3)
+        self.move(unopened, 'salida', 2)
+
+        self.drift(repair='stock')
+
+        opened.refresh_from_db()
+        unopened.refresh_from_db()
+        self.assertEqual(opened.stock, 7)
+        self.assertEqual(unopened.stock, 10)
+        self.assertEqual(set(self.drift()), {unopened.id})
+
+    def test_ledger_repair_writes_adjustment(self):
+        opened, unopened = self.products
+        self.move(opened, 'entrada', 12)
+
+        self.drift(repair='ledger')
+
+        adjustments = InventoryTransaction.objects.filter(reference_type='Reconciliation')
+        self.assertEqual(
+            sorted(adjustments.values_list('product_id', 'quantity')),
+            sorted([(opened.id, -2), (unopened.id, 10)]),
+        )
+        self.assertEqual(self.drift(), {})
+
+    def test_command_repairs_with_ledger_by_default(self):
+        out = io.StringIO()
+        call_command('reconcile_stock', '--repair', '--warehouse', str(self.warehouse.id), stdout=out)
+
+        self.assertIn('2 reparados en stock', out.getvalue())
+        self.assertEqual(InventoryTransaction.objects.filter(type='ajuste').count(), 2)
+        self.assertEqual(self.drift(), {})
+
+
+class LedgerArchiveTest(LedgerTestMixin, TestCase):
+    def test_archive_requires_snapshot_at_boundary(self):
+        cutoff = month_start(timezone.localdate())
+        boundary = cutoff - timedelta(days=1)
+        self.move(self.products[0], 'entrada', 10, days_ago=40)
+        self.move(self.products[1], 'entrada', 5)
+
+        self.assertEqual(warehouses_without_snapshot(cutoff, boundary), [self.warehouse.id])
+        take_stock_snapshot(boundary, [self.warehouse.id])
+        self.assertEqual(warehouses_without_snapshot(cutoff, boundary), [])
+
+    def test_recent_movements_only_need_no_snapshot(self):
+        cutoff = month_start(timezone.localdate())
+        self.move(self.products[0], 'entrada', 10)
+
+        self.assertEqual(warehouses_without_snapshot(cutoff, cutoff - timedelta(days=1)), [])
+
+    def test_partitioning_is_a_noop_outside_postgres(self):
+        self.assertEqual(ensure_partitions(), [])
+        self.assertEqual(archive_partitions(1, '/nonexistent', today=add_months(timezone.localdate(), 12)), [])
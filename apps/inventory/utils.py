@@ -0,0 +1,161 @@
+from django.db.models import Sum, Max, Case, When, F, Value
+from django.db.models.functions import TruncDate, Abs
+from django.utils import timezone
+from datetime import datetime, time, timedelta
+from .models import InventoryTransaction, StockSnapshot
+from apps.warehouse.models import Warehouse
+from apps.product.models import Product
+from decimal import Decimal
+
+def start_of_day(day):
+    """
+    Inicio del día en la zona horaria actual (aware), para filtrar created_at por rango e índice.
+    """
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+# Cantidad con el signo que impone InventoryTransaction.clean (entradas +, salidas -): los
+# movimientos guardados con bulk_create antes de write_ledger (ledger.py) no pasaron por clean()
+# y sus salidas quedaron positivas.
+SIGNED_QUANTITY = Case(
+    When(type='entrada', then=Abs('quantity')),
+    When(type='salida', then=Value(0) - Abs('quantity')),
+    default=F('quantity'),
+)
+
+def ledger_between(after=None, until=None, **filters):
+    """
+    Movimientos con fecha (día) en el rango (after, until]. Ambos extremos son opcionales.
+    """
+    queryset = InventoryTransaction.objects.filter(**filters)
+    if after is not None:
+        queryset = queryset.filter(created_at__gte=start_of_day(after + timedelta(days=1)))
+    if until is not None:
+        queryset = queryset.filter(created_at__lt=start_of_day(until + timedelta(days=1)))
+    return queryset
+
+def latest_snapshot_date(warehouse_id, before):
+    return StockSnapshot.objects.filter(
+        warehouse_id=warehouse_id, date__lt=before
+    ).aggregate(date=Max('date'))['date']
+
+def balances_from(warehouse_id, checkpoint, day, **filters):
+    """
+    Stock por producto al cierre de day: la foto del día checkpoint (si hay) más los movimientos
+    de (checkpoint, day]. El rango escaneado del kardex queda acotado por la distancia a la foto.
+    """
+    quantities = {}
+    if checkpoint is not None:
+        quantities = dict(
+            StockSnapshot.objects.filter(warehouse_id=warehouse_id, date=checkpoint, **filters)
+            .values_list('product_id', 'quantity')
+        )
+
+    movements = (
+        ledger_between(checkpoint, day, warehouse_id=warehouse_id, **filters)
+        .values_list('product_id')
+        .annotate(total=Sum(SIGNED_QUANTITY))
+        .order_by()
+    )
+    for product_id, total in movements:
+        quantities[product_id] = quantities.get(product_id, 0) + total
+    return quantities
+
+def stock_at(warehouse_id, day, product_ids=None):
+    """
+    Stock de cada producto del almacén al cierre de day: {product_id: cantidad}.
+    Parte de la foto más cercana (la del mismo día o anterior), sin recorrer todo el historial.
+    """
+    filters = {}
+    if product_ids is not None:
+        filters['product_id__in'] = list(product_ids)
+    checkpoint = latest_snapshot_date(warehouse_id, day + timedelta(days=1))
+    return balances_from(warehouse_id, checkpoint, day, **filters)
+
+def take_stock_snapshot(day, warehouse_ids=None):
+    """
+    Escribe la foto de stock del día para cada almacén partiendo de la última foto anterior
+    y sumando solo los movimientos posteriores (un GROUP BY por almacén).
+    Solo para días cerrados: stock_at no vuelve a sumar los movimientos del día de la foto.
+    """
+    warehouses = Warehouse.objects.all()
+    if warehouse_ids is not None:
+        warehouses = warehouses.filter(id__in=warehouse_ids)
+
+    written = 0
+    for warehouse in warehouses.only('id', 'store_id'):
+        quantities = balances_from(warehouse.id, latest_snapshot_date(warehouse.id, day), day)
+        StockSnapshot.objects.bulk_create(
+            [
+                StockSnapshot(product_id=product_id, warehouse_id=warehouse.id, store_id=warehouse.store_id, date=day, quantity=quantity)
+                for product_id, quantity in quantities.items()
+            ],
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['product', 'date'],
+            update_fields=['quantity'],
+        )
+        written += len(quantities)
+    return written
+
+def stock_series(store_id, warehouse_id, start, end, product_id=None):
+    """
+    Serie diaria del stock acumulado entre start y end (inclusive).
+    Parte de stock_at el día anterior a start y agrupa por día solo los movimientos de la ventana,
+    así el costo depende del rango pedido y no de todo el historial.
+    """
+    filters = {'store_id': store_id, 'warehouse_id': warehouse_id}
+    if product_id is not None:
+        filters['product_id'] = product_id
+
+    # Stock al cierre del día anterior a la ventana, desde la foto más cercana
+    base = sum(stock_at(warehouse_id, start - timedelta(days=1), [product_id] if product_id is not None else None).values())
+
+    daily = dict(
+        ledger_between(start - timedelta(days=1), end, **filters)
+        .annotate(day=TruncDate('created_at'))
+        .values('day')
+        .annotate(total=Sum(SIGNED_QUANTITY))
+        .values_list('day', 'total')
+        .order_by()
+    )
+
+    series = []
+    running = base
+    day = start
+    while day <= end:
+        running += daily.get(day, 0)
+        series.append({"date": day.strftime('%Y-%m-%d'), "total_stock": running})
+        day += timedelta(days=1)
+    return series
+
+def stock_valuation(warehouse_id, day):
+    """
+    Inventario valorizado al cierre de day: stock_at por el costo unitario actual de cada producto
+    (última compra o, si nunca se compró, su precio de compra). Incluye productos dados de baja
+    después de esa fecha.
+    """
+    quantities = {product_id: quantity for product_id, quantity in stock_at(warehouse_id, day).items() if quantity}
+    products = (
+        Product.all_objects
+        .filter(id__in=list(quantities))
+        .values_list('id', 'code', 'name', 'last_purchase_price', 'purchase_price')
+    )
+
+    rows = []
+    total_units, total_value = 0, Decimal('0')
+    for product_id, code, name, last_purchase_price, purchase_price in products:
+        unit_cost = last_purchase_price if last_purchase_price is not None else purchase_price
+        quantity = quantities[product_id]
+        value = unit_cost * quantity
+        total_units += quantity
+        total_value += value
+        rows.append({
+            'product_id': str(product_id),
+            'code': code,
+            'name': name,
+            'quantity': quantity,
+            'unit_cost': unit_cost,
+            'value': value,
+        })
+    rows.sort(key=lambda row: row['value'], reverse=True)
+    return {'date': day.isoformat(), 'total_units': total_units, 'total_value': total_value, 'products': rows}
@@ -1,121 +1,193 @@
-from rest_framework import viewsets, permissions, filters, views
+from rest_framework import viewsets, permissions, filters, views, serializers, status
 from .serializers import InventoryTransactionSerializer
-from apps.warehouse.utils import get_default_warehouse
 from django_filters.rest_framework import DjangoFilterBackend
-from django.utils.timezone import timedelta, now
+from django.utils.timezone import timedelta, localdate
 from rest_framework.response import Response
 from .models import InventoryTransaction
 from apps.product.models import Product
-from django.db.models import Sum
+from utils.tenant import TenantViewMixin
+from utils.pagination import KeysetPagination
+from utils.export import ExportMixin, xlsx_response
+from django.utils.dateparse import parse_date
+from django.db.models import Count, Q, F
+from .forecast import reorder_threshold
+from .utils import stock_series, stock_valuation, take_stock_snapshot
+import uuid
 
 # Create your views here.
-class InventoryTransactionViewSet(viewsets.ModelViewSet):
+class InventoryTransactionViewSet(TenantViewMixin, ExportMixin, viewsets.ModelViewSet):
     serializer_class = InventoryTransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['type', 'created_at', 'product']
+    pagination_class = KeysetPagination
     search_fields = ['reason', 'reference_type', 'product__name', 'product__code']
     ordering = ['-created_at']
+    export_name = 'kardex'
+    export_columns = [
+        ('Fecha', 'created_at'), ('Código', 'product__code'), ('Producto', 'product__name'),
+        ('Tipo', 'type'), ('Cantidad', 'quantity'), ('Motivo', 'reason'),
+        ('Referencia', 'reference_type'), ('ID referencia', 'reference_id'), ('Usuario', 'user__name'),
+    ]
 
     def get_queryset(self):
-        user = self.request.user
-        warehouse = get_default_warehouse(user)
+        tenant = self.tenant
         # Puedes filtrar por la tienda o almacén asociado al usuario si lo necesitas.
-        return InventoryTransaction.objects.filter(store=user.store, warehouse=warehouse).order_by('-created_at')
+        return InventoryTransaction.objects.filter(store_id=tenant.store_id, warehouse_id=tenant.warehouse_id).select_related('user').order_by('-created_at')
 
-class LowStockAlertView(views.APIView):
+class LowStockAlertView(TenantViewMixin, views.APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        user = request.user
-        warehouse = get_default_warehouse(user)
-        productos = Product.objects.filter(
-            store=user.store,
-            warehouse=warehouse,
+        tenant = self.tenant
+        # Umbral por producto: punto de reorden del pronóstico (o stock mínimo de la tienda)
+        productos = self.cached('inventory:low_stock', lambda: list(Product.objects.filter(
+            store_id=tenant.store_id,
+            warehouse_id=tenant.warehouse_id,
             is_active=True,
             soft_deleted=False,
-            stock__lte=5  # aquí puedes parametrizar el umbral de "bajo stock"
-        ).values('id', 'name', 'stock')
+        ).annotate(
+            reorder_point=reorder_threshold(tenant.store),
+            daily_demand=F('forecast__smoothed_demand'),
+            days_of_cover=F('forecast__days_of_cover'),
+        ).filter(stock__lte=F('reorder_point')).order_by('stock', 'name').values(
+            'id', 'name', 'stock', 'reorder_point', 'daily_demand', 'days_of_cover'
+        )))
 
-        return Response({"low_stock_products": list(productos)})
+        return Response({"low_stock_products": productos})
 
-class StockStatusSummaryView(views.APIView):
+class StockStatusSummaryView(TenantViewMixin, views.APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        user = request.user
-        
-        warehouse = get_default_warehouse(user)
-        productos = Product.objects.filter(
-            store=user.store,
-            warehouse=warehouse,
+        return Response(self.cached('inventory:stock_status', self.summary))
+
+    def summary(self):
+        tenant = self.tenant
+        counts = Product.objects.filter(
+            store_id=tenant.store_id,
+            warehouse_id=tenant.warehouse_id,
             is_active=True,
             soft_deleted=False,
+        ).annotate(reorder_point=reorder_threshold(tenant.store)).aggregate(
+            ready=Count('id', filter=Q(stock__gt=F('reorder_point'))),
+            alert=Count('id', filter=Q(stock__lte=F('reorder_point'))),
         )
 
-        ready = productos.filter(stock__gt=5).count()
-        alert = productos.filter(stock__lte=5).count()
-
-        return Response({
-            "ready_to_sell": ready,
-            "stock_alert": alert,
-            "total": ready + alert
-        })
+        return {
+            "ready_to_sell": counts['ready'],
+            "stock_alert": counts['alert'],
+            "total": counts['ready'] + counts['alert']
+        }
 
-class TopMostStockedProductsView(views.APIView):
+class TopMostStockedProductsView(TenantViewMixin, views.APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        user = request.user
-
-        warehouse = get_default_warehouse(user)
-        top_products = Product.objects.filter(
-            store=user.store,
-            warehouse=warehouse,
+        tenant = self.tenant
+        top_products = self.cached('inventory:most_stocked', lambda: list(Product.objects.filter(
+            store_id=tenant.store_id,
+            warehouse_id=tenant.warehouse_id,
             is_active=True,
             soft_deleted=False
-        ).order_by('-stock')[:10].values('id', 'name', 'stock')
+        ).order_by('-stock')[:10].values('id', 'name', 'stock')))
 
-        return Response({"top_most_stocked": list(top_products)})
+        return Response({"top_most_stocked": top_products})
 
-class TopLeastStockedProductsView(views.APIView):
+class TopLeastStockedProductsView(TenantViewMixin, views.APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        user = request.user
-
-        warehouse = get_default_warehouse(user)
-        bottom_products = Product.objects.filter(
-            store=user.store,
-            warehouse=warehouse,
+        tenant = self.tenant
+        bottom_products = self.cached('inventory:least_stocked', lambda: list(Product.objects.filter(
+            store_id=tenant.store_id,
+            warehouse_id=tenant.warehouse_id,
             is_active=True,
             soft_deleted=False
-        ).order_by('stock')[:10].values('id', 'name', 'stock')
+        ).order_by('stock')[:10].values('id', 'name', 'stock')))
+
+        return Response({"top_least_stocked": bottom_products})
+
+class StockOverTimeView(TenantViewMixin, views.APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    MAX_DAYS = 366
 
-        return Response({"top_least_stocked": list(bottom_products)})
+    def get(self, request):
+        tenant = self.tenant
+
+        try:
+            days = int(request.query_params.get('days', 15))
+        except ValueError:
+            raise serializers.ValidationError({"days": "Debe ser un número entero."})
+        if not 1 <= days <= self.MAX_DAYS:
+            raise serializers.ValidationError({"days": f"Debe estar entre 1 y {self.MAX_DAYS}."})
+
+        product = request.query_params.get('product')
+        if product:
+            try:
+                product = uuid.UUID(product)
+            except ValueError:
+                raise serializers.ValidationError({"product": "Identificador de producto inválido."})
+
+        end = localdate()
+        start = end - timedelta(days=days - 1)
+        data = self.cached(
+            'inventory:stock_over_time',
+            lambda: stock_series(tenant.store_id, tenant.warehouse_id, start, end, product_id=product or None),
+            {'start': start, 'days': days, 'product': product or ''},
+        )
 
-class StockOverTimeView(views.APIView):
+        return Response({"stock_over_time": data})
+
+def date_param(data, name, default):
+    value = data.get(name)
+    if not value:
+        return default
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise serializers.ValidationError({name: "Fecha inválida, usa el formato YYYY-MM-DD."})
+    return day
+
+class StockValuationView(TenantViewMixin, views.APIView):
+    """
+    Inventario valorizado al cierre de ?date=YYYY-MM-DD (por defecto hoy), desde la foto de stock
+    más cercana. ?file=xlsx lo descarga.
+    """
     permission_classes = [permissions.IsAuthenticated]
+    COLUMNS = [('product_id', 'ID'), ('code', 'Código'), ('name', 'Producto'), ('quantity', 'Stock'),
+               ('unit_cost', 'Costo unitario'), ('value', 'Valor')]
 
     def get(self, request):
-        user = request.user
-        warehouse = get_default_warehouse(user)
-
-        days = 15  # cambiar por 30 o lo que necesites
-        data = []
-
-        for i in range(days):
-            day = now().date() - timedelta(days=i)
-            total_stock = InventoryTransaction.objects.filter(
-                store=user.store,
-                warehouse=warehouse,
-                created_at__date__lte=day
-            ).aggregate(stock=Sum('quantity'))['stock'] or 0
-
-            data.append({
-                "date": day.strftime('%Y-%m-%d'),
-                "total_stock": total_stock
-            })
-
-        return Response({"stock_over_time": list(reversed(data))})
+        today = localdate()
+        day = date_param(request.query_params, 'date', today)
+        if day > today:
+            raise serializers.ValidationError({"date": "No puede ser una fecha futura."})
+
+        warehouse_id = self.tenant.warehouse_id
+        report = self.cached('inventory:valuation', lambda: stock_valuation(warehouse_id, day), {'date': day})
+
+        if request.query_params.get('file') == 'xlsx':
+            sheet = ('Valorización', [header for _, header in self.COLUMNS],
+                     ([row[column] for column, _ in self.COLUMNS] for row in report['products']))
+            return xlsx_response([sheet], f'valorizacion-{day}')
+        return Response(report)
+
+class StockCheckpointView(TenantViewMixin, views.APIView):
+    """
+    Guarda a pedido la foto de stock de un día cerrado del almacén (por defecto ayer),
+    además de la que escribe cada noche el comando snapshot_stock.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        today = localdate()
+        day = date_param(request.data, 'date', today - timedelta(days=1))
+        if day >= today:
+            raise serializers.ValidationError({"date": "Solo se pueden fotografiar días cerrados (anteriores a hoy)."})
+
+        written = take_stock_snapshot(day, warehouse_ids=[self.tenant.warehouse_id])
+        return Response({"date": day.isoformat(), "products": written}, status=status.HTTP_201_CREATED)
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from apps.invoicing.utils import get_counter_metrics
+from apps.warehouse.models import Warehouse
+
+class Command(BaseCommand):
+    help = 'Muestra la contención de los contadores de facturas por almacén (requiere una caché compartida, p.ej. Redis)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--warehouse', action='append', dest='warehouses', help='ID de almacén (repetible). Por defecto, todos.')
+
+    def handle(self, *args, **options):
+        warehouses = Warehouse.objects.order_by('name')
+        if options['warehouses']:
+            warehouses = warehouses.filter(pk__in=options['warehouses'])
+
+        for warehouse in warehouses:
+            metrics = get_counter_metrics(warehouse.pk)
+            if not metrics['numbers']:
+                continue
+            # Cada bloque o asignación directa es un viaje a la fila del contador
+            allocations = metrics['blocks'] + metrics['fallbacks'] or metrics['numbers']
+            self.stdout.write(
+                f"{warehouse.name} ({warehouse.code}): {metrics['numbers']} números, "
+                f"{metrics['blocks']} bloques, {metrics['fallbacks']} asignaciones directas, "
+                f"espera media {metrics['wait_ms'] / allocations:.1f} ms por acceso al contador"
+            )
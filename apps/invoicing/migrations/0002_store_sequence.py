@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoicing', '0001_initial'),
+        ('stores', '0002_alter_plan_max_products_alter_plan_max_users'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoreSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=20)),
+                ('last_number', models.PositiveBigIntegerField(default=0)),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sequences', to='stores.store')),
+            ],
+            options={
+                'unique_together': {('store', 'name')},
+            },
+        ),
+    ]
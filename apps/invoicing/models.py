@@ -1,4 +1,5 @@
 from apps.warehouse.models import Warehouse
+from apps.stores.models import Store
 from django.db import models
 
 class InvoiceCounter(models.Model):
@@ -8,4 +9,17 @@ class InvoiceCounter(models.Model):
     last_number = models.PositiveIntegerField(default=0)
 
     class Meta:
-        unique_together = ('warehouse', 'date', 'operation_type')
\ No newline at end of file
+        unique_together = ('warehouse', 'date', 'operation_type')
+
+
+class StoreSequence(models.Model):
+    """
+    Secuencia por tienda (p.ej. 'sale' para sale_number): una fila que se incrementa con UPDATE,
+    sin recorrer la tabla de ventas para obtener el siguiente número.
+    """
+    store = models.ForeignKey(Store, on_delete=models.CASCADE, related_name='sequences')
+    name = models.CharField(max_length=20)
+    last_number = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('store', 'name')
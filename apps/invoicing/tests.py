@@ -0,0 +1,79 @@
+from django.test import TestCase, TransactionTestCase
+from django.db import transaction
+from utils.testing import make_tenant
+from datetime import date, timedelta
+from types import SimpleNamespace
+from unittest import mock
+from .models import InvoiceCounter
+from .utils import InvoiceNumberBlocks
+import threading
+
+
+class InvoiceNumberBlocksTest(TransactionTestCase):
+    def setUp(self):
+        self.store, self.warehouse, self.user, _ = make_tenant(products=0)
+        self.today = date(2026, 3, 10)
+
+    def last_number(self, day=None):
+        return InvoiceCounter.objects.get(warehouse=self.warehouse, date=day or self.today, operation_type='sale').last_number
+
+    def test_block_is_handed_out_from_memory(self):
+        blocks, other_process = InvoiceNumberBlocks(), InvoiceNumberBlocks()
+
+        self.assertEqual([blocks.next(self.warehouse, self.today, 'sale', 5) for _ in range(3)], [1, 2, 3])
+        self.assertEqual(self.last_number(), 5)
+        self.assertEqual(other_process.next(self.warehouse, self.today, 'sale', 5), 6)
+        self.assertEqual([blocks.next(self.warehouse, self.today, 'sale', 5) for _ in range(3)], [4, 5, 11])
+        self.assertEqual(self.last_number(), 15)
+
+    def test_new_day_discards_the_block(self):
+        blocks = InvoiceNumberBlocks()
+        tomorrow = self.today + timedelta(days=1)
+
+        self.assertEqual(blocks.next(self.warehouse, self.today, 'sale', 5), 1)
+        self.assertEqual(blocks.next(self.warehouse, tomorrow, 'sale', 5), 1)
+        self.assertEqual(blocks.next(self.warehouse, tomorrow, 'sale', 5), 2)
+        self.assertEqual((self.last_number(), self.last_number(tomorrow)), (5, 5))
+
+    def test_inside_transaction_allocates_one_by_one(self):
+        blocks = InvoiceNumberBlocks()
+
+        with transaction.atomic():
+            self.assertEqual(blocks.next(self.warehouse, self.today, 'sale', 5), 1)
+            self.assertEqual(blocks.next(self.warehouse, self.today, 'sale', 5), 2)
+        self.assertEqual(self.last_number(), 2)
+
+        # Si la venta se revierte, su número vuelve al contador
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            blocks.next(self.warehouse, self.today, 'sale', 5)
+            raise RuntimeError()
+        self.assertEqual(self.last_number(), 2)
+
+
+class InvoiceNumberLockTest(TestCase):
+    def test_refill_does_not_block_other_warehouses(self):
+        blocks = InvoiceNumberBlocks()
+        slow, fast = SimpleNamespace(pk='slow'), SimpleNamespace(pk='fast')
+        today = date(2026, 3, 10)
+        blocks._blocks[(fast.pk, 'sale')] = (today, 1, 5)
+        started, release = threading.Event(), threading.Event()
+
+        def allocate(warehouse, day, operation_type, count):
+            started.set()
+            release.wait(5)
+            return count
+
+        served = []
+        with mock.patch.object(blocks, '_allocate', side_effect=allocate):
+            refill = threading.Thread(target=blocks.next, args=(slow, today, 'sale', 5))
+            refill.start()
+            try:
+                self.assertTrue(started.wait(5))
+                # Con la recarga del otro almacén esperando a la BD, este sigue entregando números
+                other = threading.Thread(target=lambda: served.append(blocks.next(fast, today, 'sale', 5)))
+                other.start()
+                other.join(1)
+                self.assertEqual(served, [1])
+            finally:
+                release.set()
+                refill.join()
@@ -1,26 +1,155 @@
-from .models import InvoiceCounter
+from .models import InvoiceCounter, StoreSequence
+from django.db import connection, transaction, IntegrityError
 from django.utils.timezone import now
-from django.db import transaction
+from django.core.cache import cache
+from django.conf import settings
 from django.db.models import F
+import threading
+import time
 
-def generate_invoice_number(warehouse, operation_type='sale'):
+# Métricas de contención de los contadores de facturas, acumuladas en la caché compartida
+COUNTER_METRICS = ('numbers', 'blocks', 'fallbacks', 'wait_ms')
+
+def allocate_number(counter_model, lookup, count=1, seed=None):
+    """
+    Reserva `count` números consecutivos de un contador y devuelve el último.
+    El UPDATE last_number = last_number + count bloquea solo esa fila hasta el commit, sin lecturas previas.
+    Si el contador no existe se crea partiendo de seed() (solo la primera vez); si otro proceso
+    lo creó a la vez, la restricción única lo detecta y se reintenta el UPDATE.
+    """
+    counters = counter_model.objects.filter(**lookup)
+    with transaction.atomic():
+        if not counters.update(last_number=F('last_number') + count):
+            try:
+                with transaction.atomic():
+                    start = seed() if seed else 0
+                    return counter_model.objects.create(**lookup, last_number=start + count).last_number
+            except IntegrityError:
+                counters.update(last_number=F('last_number') + count)
+        return counters.values_list('last_number', flat=True).get()
+
+def next_store_sequence(store, name, seed=None):
+    return allocate_number(StoreSequence, {'store': store, 'name': name}, seed=seed)
+
+def counter_metric_key(warehouse_id, metric):
+    return f"invoice-counter:{warehouse_id}:{metric}"
+
+def record_counter_metrics(warehouse_id, **values):
+    for metric, value in values.items():
+        if value:
+            key = counter_metric_key(warehouse_id, metric)
+            cache.add(key, 0, None)
+            cache.incr(key, int(value))
+
+def get_counter_metrics(warehouse_id):
+    keys = {counter_metric_key(warehouse_id, metric): metric for metric in COUNTER_METRICS}
+    values = cache.get_many(keys)
+    return {metric: values.get(key, 0) for key, metric in keys.items()}
+
+
+class InvoiceNumberBlocks:
+    """
+    Asignador hi-lo: cada proceso reserva un bloque de números con un solo UPDATE del contador
+    y los entrega en memoria, así la fila del contador se toca una vez por bloque y no por venta.
+    Los números de un bloque que no se llegan a usar (reinicio del proceso, cambio de día) quedan como huecos.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()  # Solo para el registro de locks y el conteo de servidos
+        self._locks = {}
+        self._blocks = {}
+        self._served = {}
+
+    def _key_lock(self, key):
+        # Un lock por (almacén, operación): recargar el bloque de un almacén no frena a los demás
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _count_served(self, warehouse_id):
+        with self._lock:
+            self._served[warehouse_id] = self._served.get(warehouse_id, 0) + 1
+
+    def _take_served(self, warehouse_id):
+        with self._lock:
+            return self._served.pop(warehouse_id, 0)
+
+    def next(self, warehouse, today, operation_type, size):
+        key = (warehouse.pk, operation_type)
+        with self._key_lock(key):
+            block = self._blocks.get(key)
+            if block and block[0] == today and block[1] <= block[2]:
+                number = block[1]
+                self._blocks[key] = (today, number + 1, block[2])
+                self._count_served(warehouse.pk)
+                return number
+
+            # El bloque debe confirmarse aparte de la venta: si se reservara dentro de su transacción
+            # y ésta se revirtiera, el proceso repetiría números. En ese caso se asigna de uno en uno.
+            if connection.in_atomic_block:
+                number = self._allocate(warehouse, today, operation_type, 1)
+                record_counter_metrics(warehouse.pk, numbers=1, fallbacks=1)
+                return number
+
+            started = time.perf_counter()
+            last = self._allocate(warehouse, today, operation_type, size)
+            wait_ms = (time.perf_counter() - started) * 1000
+            record_counter_metrics(
+                warehouse.pk,
+                numbers=self._take_served(warehouse.pk) + 1,
+                blocks=1,
+                wait_ms=wait_ms,
+            )
+            first = last - size + 1
+            self._blocks[key] = (today, first + 1, last)
+            return first
+
+    def _allocate(self, warehouse, today, operation_type, count):
+        return allocate_number(InvoiceCounter, {
+            'warehouse': warehouse,
+            'date': today,
+            'operation_type': operation_type,
+        }, count=count)
+
+
+invoice_number_blocks = InvoiceNumberBlocks()
+
+def generate_invoice_number(warehouse, operation_type='sale', gapless=False):
+    """
+    gapless=False: número tomado del bloque del proceso; llamar fuera de la transacción de la venta.
+    gapless=True: numeración correlativa sin huecos; llamar dentro de la transacción de la venta,
+    el contador queda bloqueado hasta su commit y se revierte con ella.
+    """
     today = now().date()
     date_str = today.strftime('%Y%m%d')
 
-    with transaction.atomic():
-        counter, _ = InvoiceCounter.objects.select_for_update().get_or_create(
-            warehouse=warehouse,
-            date=today,
-            operation_type=operation_type,  # Nuevo campo si deseas
-            defaults={'last_number': 0}
-        )
-        counter.last_number = F('last_number') + 1
-        counter.save()
-        counter.refresh_from_db()
-
-    if operation_type == 'purchase':
-        invoice_number = f"P-{date_str}-{warehouse.code}-{counter.last_number:04d}"
+    size = settings.INVOICE_NUMBER_BLOCK_SIZE
+    if gapless or size <= 1:
+        started = time.perf_counter()
+        number = allocate_number(InvoiceCounter, {
+            'warehouse': warehouse,
+            'date': today,
+            'operation_type': operation_type,
+        })
+        record_counter_metrics(warehouse.pk, numbers=1, wait_ms=(time.perf_counter() - started) * 1000)
     else:
-        invoice_number = f"S-{date_str}-{warehouse.code}-{counter.last_number:04d}"
+        number = invoice_number_blocks.next(warehouse, today, operation_type, size)
+
+    return format_invoice_number(warehouse, operation_type, date_str, number)
+
+def generate_invoice_numbers(warehouse, operation_type, count):
+    """
+    Reserva `count` números consecutivos con un solo UPDATE del contador (cargas en lote).
+    """
+    today = now().date()
+    last = allocate_number(InvoiceCounter, {
+        'warehouse': warehouse,
+        'date': today,
+        'operation_type': operation_type,
+    }, count=count)
+    record_counter_metrics(warehouse.pk, numbers=count, blocks=1)
+    date_str = today.strftime('%Y%m%d')
+    return [format_invoice_number(warehouse, operation_type, date_str, number) for number in range(last - count + 1, last + 1)]
 
-    return invoice_number
+def format_invoice_number(warehouse, operation_type, date_str, number):
+    prefix = 'P' if operation_type == 'purchase' else 'S'
+    return f"{prefix}-{date_str}-{warehouse.code}-{number:04d}"
@@ -0,0 +1,102 @@
+"""
+Caché en memoria de códigos de barras para el punto de venta.
+Cada proceso guarda, por almacén, un LRU acotado código -> resumen del producto. La primera lectura
+de un almacén lo precarga con una sola consulta; después cada escaneo se resuelve sin BD.
+La validez se comprueba contra la versión del almacén (utils.cache), que cambia al guardar o
+eliminar productos y con cada venta, compra o movimiento (cambios de stock). Esa versión solo la
+ven todos los workers si la caché es compartida (Redis, Memcached...): con la caché local por
+defecto cada escaneo consulta la BD, porque otro worker seguiría viendo stock y precio viejos.
+"""
+from utils.cache import get_tenant_version, cache_is_shared
+from .serializers import ProductBarcodeSerializer
+from collections import OrderedDict
+from django.conf import settings
+from .models import Product
+import threading
+
+NOT_FOUND = object()
+SUMMARY_FIELDS = ProductBarcodeSerializer.Meta.fields
+
+
+def barcode_queryset(store_id, warehouse_id):
+    return Product.objects.filter(
+        store_id=store_id,
+        warehouse_id=warehouse_id,
+        soft_deleted=False,
+        is_active=True,
+    ).exclude(barcode__isnull=True).exclude(barcode='')
+
+
+def summarize(rows):
+    return {row['barcode']: dict(data) for row, data in zip(rows, ProductBarcodeSerializer(rows, many=True).data)}
+
+
+class BarcodeCache:
+
+    def __init__(self, max_size=None, max_warehouses=None):
+        self.max_size = max_size or settings.BARCODE_CACHE_SIZE
+        self.max_warehouses = max_warehouses or settings.BARCODE_CACHE_WAREHOUSES
+        self._lock = threading.Lock()
+        self._warehouses = OrderedDict()  # warehouse_id -> (versión, OrderedDict código -> resumen)
+
+    def lookup(self, store_id, warehouse_id, barcodes):
+        """
+        Resuelve varios códigos: devuelve {código: resumen} solo con los encontrados.
+        """
+        warehouse_id = str(warehouse_id)  # Igual si viene de los claims (str) o de la BD (UUID)
+        if not cache_is_shared():
+            rows = barcode_queryset(store_id, warehouse_id).filter(barcode__in=barcodes).values(*SUMMARY_FIELDS)
+            return summarize(list(rows))
+        version = get_tenant_version(warehouse_id)
+        entries = self._entries(store_id, warehouse_id, version)
+
+        found, missing = {}, []
+        with self._lock:
+            for barcode in barcodes:
+                summary = entries.get(barcode)
+                if summary is None:
+                    missing.append(barcode)
+                    continue
+                entries.move_to_end(barcode)
+                if summary is not NOT_FOUND:
+                    found[barcode] = summary
+
+        if missing:
+            rows = list(barcode_queryset(store_id, warehouse_id).filter(barcode__in=missing).values(*SUMMARY_FIELDS))
+            loaded = summarize(rows)
+            found.update(loaded)
+            with self._lock:
+                # Los no encontrados también se guardan: la versión cambia si se crea el producto
+                for barcode in missing:
+                    entries[barcode] = loaded.get(barcode, NOT_FOUND)
+                while len(entries) > self.max_size:
+                    entries.popitem(last=False)
+        return found
+
+    def _entries(self, store_id, warehouse_id, version):
+        with self._lock:
+            current = self._warehouses.get(warehouse_id)
+            if current is not None:
+                self._warehouses.move_to_end(warehouse_id)
+                if current[0] == version:
+                    return current[1]
+                # Datos del almacén modificados: se descarta todo y se rellena al escanear
+                entries = OrderedDict()
+                self._warehouses[warehouse_id] = (version, entries)
+                return entries
+
+        # Primera lectura del almacén en este proceso: precarga acotada fuera del lock
+        rows = list(barcode_queryset(store_id, warehouse_id).order_by('-updated_at').values(*SUMMARY_FIELDS)[:self.max_size])
+        entries = OrderedDict(summarize(rows))
+        with self._lock:
+            self._warehouses[warehouse_id] = (version, entries)
+            while len(self._warehouses) > self.max_warehouses:
+                self._warehouses.popitem(last=False)
+        return entries
+
+    def clear(self):
+        with self._lock:
+            self._warehouses.clear()
+
+
+barcode_cache = BarcodeCache()
@@ -0,0 +1,395 @@
+"""
+Importación masiva del catálogo desde CSV o XLSX.
+El archivo se lee por bloques (pandas chunksize / openpyxl read_only) y cada bloque se valida y
+escribe con un número fijo de consultas: una para detectar duplicados de nombre, código, código de
+barras o slug en la tienda, y un bulk_create / bulk_update. Marcas, categorías y unidades se
+resuelven por nombre con una consulta al inicio.
+Las filas cuyo código ya existe en el almacén actualizan el producto (las celdas vacías conservan
+el valor actual); el resto se crean.
+El stock solo se carga en productos nuevos, con su entrada inicial en el kardex (misma transacción);
+en los existentes se mueve con compras y ajustes.
+"""
+from apps.category.models import Category
+from apps.brand.models import Brand, Unit
+from utils.search import normalize_search_text
+from utils.cache import bump_tenant_version
+from apps.inventory.models import InventoryTransaction
+from apps.inventory.ledger import write_ledger
+from django.db import transaction, IntegrityError
+from django.utils.text import slugify
+from django.utils import timezone
+from decimal import Decimal, InvalidOperation
+from django.db.models import Q
+from .models import Product
+import pandas as pd
+import openpyxl
+import os
+import io
+
+# Encabezados aceptados (en minúsculas) -> campo
+COLUMN_ALIASES = {
+    'name': 'name', 'nombre': 'name',
+    'code': 'code', 'codigo': 'code', 'código': 'code',
+    'barcode': 'barcode', 'codigo_barras': 'barcode', 'código de barras': 'barcode', 'codigo de barras': 'barcode',
+    'purchase_price': 'purchase_price', 'precio_compra': 'purchase_price', 'precio compra': 'purchase_price',
+    'sale_price': 'sale_price', 'precio_venta': 'sale_price', 'precio venta': 'sale_price',
+    'stock': 'stock',
+    'unit': 'unit', 'unidad': 'unit',
+    'brand': 'brand', 'marca': 'brand',
+    'category': 'category', 'categoria': 'category', 'categoría': 'category',
+    'description': 'description', 'descripcion': 'description', 'descripción': 'description',
+    'is_active': 'is_active', 'activo': 'is_active',
+}
+UNIQUE_FIELDS = ('name', 'code', 'barcode', 'slug')
+# Campos que se escriben en productos existentes si la columna viene en el archivo
+UPDATABLE_FIELDS = ('name', 'barcode', 'purchase_price', 'sale_price', 'unit', 'brand', 'category', 'description', 'is_active')
+FIELDS_FOR_NEW = ('name', 'code', 'barcode', 'purchase_price', 'sale_price', 'stock', 'description', 'is_active')
+TRUE_VALUES = {'1', 'true', 'si', 'sí', 'yes', 'x'}
+FALSE_VALUES = {'0', 'false', 'no'}
+DEFAULT_CHUNK_SIZE = 1000
+
+
+class ImportFormatError(Exception):
+    pass
+
+
+def read_chunks(file, filename, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Recorre el archivo por bloques de filas: [(número de fila, {columna: valor}), ...].
+    El número de fila es el del archivo (la cabecera es la fila 1).
+    """
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension == '.csv':
+        return read_csv_chunks(file, chunk_size)
+    if extension in ('.xlsx', '.xlsm'):
+        return read_xlsx_chunks(file, chunk_size)
+    raise ImportFormatError("Formato no soportado: usa un archivo .csv o .xlsx.")
+
+
+def read_csv_chunks(file, chunk_size):
+    # sep=None detecta ',' o ';' (Excel en español exporta con ';')
+    reader = pd.read_csv(
+        io.TextIOWrapper(file, encoding='utf-8-sig', newline=''),
+        sep=None, engine='python', dtype=str, keep_default_na=False, chunksize=chunk_size,
+    )
+    row_number = 1
+    for frame in reader:
+        rows = []
+        for record in frame.to_dict('records'):
+            row_number += 1
+            rows.append((row_number, record))
+        yield rows
+
+
+def read_xlsx_chunks(file, chunk_size):
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        values = workbook.active.iter_rows(values_only=True)
+        header = next(values, None)
+        if header is None:
+            return
+        header = ['' if cell is None else str(cell) for cell in header]
+        rows = []
+        for row_number, cells in enumerate(values, start=2):
+            if all(cell in (None, '') for cell in cells):
+                continue
+            rows.append((row_number, dict(zip(header, cells))))
+            if len(rows) >= chunk_size:
+                yield rows
+                rows = []
+        if rows:
+            yield rows
+    finally:
+        workbook.close()
+
+
+def clean_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # Códigos numéricos leídos de Excel (7790001.0)
+    return str(value).strip()
+
+
+def parse_decimal(value):
+    text = clean_text(value)
+    if not text:
+        return None
+    if ',' in text and '.' not in text:
+        text = text.replace(',', '.')
+    number = Decimal(text)
+    if not number.is_finite() or number < 0:
+        raise InvalidOperation(text)
+    return number.quantize(Decimal('0.01'))
+
+
+def build_slug(code, name):
+    # Igual que Product.generate_slug + AutoSlugField (recorte a max_length y slugify)
+    max_length = Product._meta.get_field('slug').max_length
+    return slugify(slugify(f"{code}-{name}")[:max_length])
+
+
+class ProductImporter:
+    """
+    Importa un archivo en un almacén. Guarda entre bloques los valores ya vistos en el archivo
+    para detectar duplicados internos, y devuelve el reporte con los errores por fila.
+    """
+
+    def __init__(self, warehouse, user=None, dry_run=False):
+        self.warehouse = warehouse
+        self.store = warehouse.store
+        self.user = user
+        self.dry_run = dry_run
+        self.seen = {field: set() for field in UNIQUE_FIELDS}
+        self.report = {'rows': 0, 'created': 0, 'updated': 0, 'errors': [], 'dry_run': dry_run}
+        self.load_lookups()
+
+    def load_lookups(self):
+        """
+        Marcas, categorías y unidades por nombre en minúsculas (una consulta por catálogo).
+        """
+        self.brand_names = dict(Brand.objects.filter(store=self.store).values_list('id', 'name'))
+        self.brands = {name.lower(): pk for pk, name in self.brand_names.items()}
+        self.category_names = dict(Category.objects.filter(store=self.store).order_by('parent_id', 'id').values_list('id', 'name'))
+        self.categories = {}
+        # Si hay categorías con el mismo nombre, gana la de nivel superior
+        for pk, name in self.category_names.items():
+            self.categories.setdefault(name.lower(), pk)
+        self.units = {}
+        for pk, name, abbreviation in Unit.objects.values_list('id', 'name', 'abbreviation'):
+            self.units[name.lower()] = pk
+            self.units.setdefault(abbreviation.lower(), pk)
+
+    def run(self, chunks):
+        for chunk in chunks:
+            self.import_chunk(chunk)
+        self.report['errors'].sort(key=lambda error: error['row'])
+        return self.report
+
+    def import_chunk(self, chunk):
+        self.report['rows'] += len(chunk)
+        rows = []
+        for row_number, record in chunk:
+            data, errors = self.parse_row(record)
+            if errors:
+                self.add_error(row_number, errors)
+            else:
+                rows.append((row_number, data))
+        if not rows:
+            return
+
+        existing = self.existing_products(rows)
+        to_create, to_update, update_fields, accepted = [], [], set(), []
+        for row_number, data in rows:
+            product = existing['code'].get(data['code']) if data.get('code') else None
+            errors = self.check_unique(data, product, existing)
+            if errors:
+                self.add_error(row_number, errors)
+                continue
+            for field in UNIQUE_FIELDS:
+                if data.get(field):
+                    self.seen[field].add(data[field])
+            accepted.append(row_number)
+            if product is None:
+                to_create.append(self.new_product(data))
+            else:
+                update_fields.update(self.apply_changes(product, data))
+                to_update.append(product)
+
+        if self.dry_run:
+            self.report['created'] += len(to_create)
+            self.report['updated'] += len(to_update)
+            return
+        self.write(accepted, to_create, to_update, update_fields)
+
+    def parse_row(self, record):
+        data, errors = {}, {}
+        for column, value in record.items():
+            field = COLUMN_ALIASES.get(clean_text(column).lower())
+            if field:
+                data[field] = value
+
+        for field in ('name', 'code', 'barcode', 'description'):
+            if field in data:
+                data[field] = clean_text(data[field]) or None
+        if not data.get('name'):
+            errors['name'] = "El nombre es obligatorio."
+        elif len(data['name']) > Product._meta.get_field('name').max_length:
+            errors['name'] = "El nombre es demasiado largo."
+
+        for field in ('purchase_price', 'sale_price'):
+            if field in data:
+                try:
+                    data[field] = parse_decimal(data[field])
+                except InvalidOperation:
+                    errors[field] = "Debe ser un número mayor o igual a 0."
+        if data.get('purchase_price') is not None and data.get('sale_price') is not None \
+                and data['sale_price'] < data['purchase_price']:
+            errors['sale_price'] = "El precio de venta no puede ser menor que el precio de compra."
+
+        if 'stock' in data:
+            try:
+                stock = parse_decimal(data['stock'])
+                if stock is not None and stock != int(stock):
+                    raise InvalidOperation(stock)
+                data['stock'] = None if stock is None else int(stock)
+            except InvalidOperation:
+                errors['stock'] = "Debe ser un entero mayor o igual a 0."
+
+        if 'is_active' in data:
+            text = clean_text(data['is_active']).lower()
+            if not text:
+                del data['is_active']  # Vacío: el valor actual o activo por defecto
+            elif text in TRUE_VALUES:
+                data['is_active'] = True
+            elif text in FALSE_VALUES:
+                data['is_active'] = False
+            else:
+                errors['is_active'] = "Usa 1/0, si/no o true/false."
+
+        for field, lookup in (('brand', self.brands), ('category', self.categories), ('unit', self.units)):
+            if field not in data:
+                continue
+            name = clean_text(data[field])
+            if not name:
+                data[field] = None
+            elif name.lower() in lookup:
+                data[field] = lookup[name.lower()]
+            else:
+                errors[field] = f"No existe: {name}."
+        if 'unit' in data and data['unit'] is None:
+            del data['unit']  # Sin unidad: la del producto o la por defecto
+
+        if not errors and data.get('name'):
+            data['slug'] = build_slug(data.get('code'), data['name'])
+        return data, errors
+
+    def existing_products(self, rows):
+        """
+        Productos de la tienda que comparten nombre, código, código de barras o slug con el bloque,
+        en una sola consulta (incluye eliminados: siguen ocupando los valores únicos).
+        """
+        condition = Q()
+        for field in UNIQUE_FIELDS:
+            values = {data[field] for _, data in rows if data.get(field)}
+            if values:
+                condition |= Q(**{f'{field}__in': values})
+        existing = {field: {} for field in UNIQUE_FIELDS}
+        for product in Product.all_objects.filter(condition, store=self.store):
+            for field in UNIQUE_FIELDS:
+                value = getattr(product, field)
+                if value:
+                    existing[field][value] = product
+        return existing
+
+    def check_unique(self, data, product, existing):
+        if product is not None:
+            if product.soft_deleted:
+                return {'code': "El código pertenece a un producto eliminado."}
+            if product.warehouse_id != self.warehouse.id:
+                return {'code': "El código pertenece a un producto de otro almacén."}
+        errors = {}
+        for field in UNIQUE_FIELDS:
+            value = data.get(field)
+            if not value:
+                continue
+            if value in self.seen[field]:
+                errors[field] = f"Repetido en el archivo: {value}."
+                continue
+            rival = existing[field].get(value)
+            if rival is not None and rival != product:
+                errors[field] = f"Ya existe un producto con este {field} en esta tienda."
+        return errors
+
+    def new_product(self, data):
+        product = Product(
+            store=self.store,
+            warehouse=self.warehouse,
+            created_by=self.user,
+            brand_id=data.get('brand'),
+            category_id=data.get('category'),
+            **{field: data[field] for field in FIELDS_FOR_NEW if data.get(field) is not None},
+        )
+        if data.get('unit'):
+            product.unit_id = data['unit']
+        if not product.barcode:
+            product.barcode = product.generate_barcode()
+        product.slug = data['slug']
+        product.slug_ready = True
+        product.search_document = self.search_document(product)
+        return product
+
+    def apply_changes(self, product, data):
+        """
+        Copia al producto las columnas presentes en el archivo y devuelve los campos a guardar.
+        """
+        fields = set()
+        for field in UPDATABLE_FIELDS:
+            if field not in data:
+                continue
+            value = data[field]
+            if value is None:
+                continue  # Celda vacía: se conserva el valor actual
+            if field in ('brand', 'category', 'unit'):
+                field = f'{field}_id'
+            setattr(product, field, value)
+            fields.add(field)
+        if not product.barcode:
+            product.barcode = product.generate_barcode()
+            fields.add('barcode')
+        product.slug = data['slug']
+        product.search_document = self.search_document(product)
+        product.updated_at = timezone.now()
+        return fields | {'slug', 'search_document', 'updated_at'}
+
+    def search_document(self, product):
+        # Equivale a Product.build_search_document sin leer la marca/categoría de la BD
+        return normalize_search_text(
+            product.name, product.code, product.barcode,
+            self.brand_names.get(product.brand_id), self.category_names.get(product.category_id),
+            product.description,
+        )
+
+    def write(self, accepted, to_create, to_update, update_fields):
+        try:
+            with transaction.atomic():
+                if to_create:
+                    Product.objects.bulk_create(to_create, batch_size=500)
+                    write_ledger(self.opening_movements(to_create))
+                if to_update:
+                    Product.all_objects.bulk_update(to_update, sorted(update_fields), batch_size=500)
+                # bulk_* no dispara señales: se invalida a mano la caché del almacén (listados, códigos de barras)
+                bump_tenant_version(self.warehouse.id)
+        except IntegrityError:
+            # Otro proceso escribió los mismos valores mientras tanto: el bloque completo se rechaza
+            for row_number in accepted:
+                self.add_error(row_number, {'non_field_errors': "Conflicto con otro cambio simultáneo, vuelve a importar la fila."})
+            return
+        self.report['created'] += len(to_create)
+        self.report['updated'] += len(to_update)
+
+    def opening_movements(self, products):
+        """
+        Entrada inicial en el kardex por el stock cargado: stock_at y la conciliación parten del kardex.
+        """
+        return [
+            InventoryTransaction(
+                product=product,
+                warehouse=self.warehouse,
+                store=self.store,
+                quantity=product.stock,
+                type='entrada',
+                reason='Stock inicial (importación)',
+                reference_type='import',
+                user=self.user,
+            )
+            for product in products if product.stock
+        ]
+
+    def add_error(self, row_number, errors):
+        self.report['errors'].append({'row': row_number, 'errors': errors})
+
+
+def import_products(file, filename, warehouse, user=None, dry_run=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    importer = ProductImporter(warehouse, user=user, dry_run=dry_run)
+    return importer.run(read_chunks(file, filename, chunk_size))
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.product.importer import import_products, ImportFormatError, DEFAULT_CHUNK_SIZE
+from apps.warehouse.models import Warehouse
+from apps.accounts.models import User
+from zipfile import BadZipFile
+import json
+
+
+class Command(BaseCommand):
+    help = 'Importa el catálogo de productos de un almacén desde un archivo CSV o XLSX'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Archivo .csv o .xlsx')
+        parser.add_argument('--warehouse', required=True, help='ID del almacén destino')
+        parser.add_argument('--user', help='Email del usuario que figura como creador')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Filas por bloque')
+        parser.add_argument('--dry-run', action='store_true', help='Solo validar, sin guardar')
+        parser.add_argument('--report', help='Guardar el reporte completo (JSON) en esta ruta')
+
+    def handle(self, *args, **options):
+        warehouse = Warehouse.objects.select_related('store').filter(pk=options['warehouse']).first()
+        if warehouse is None:
+            raise CommandError('Almacén no encontrado.')
+        user = None
+        if options['user']:
+            user = User.objects.filter(email=options['user']).first()
+            if user is None:
+                raise CommandError('Usuario no encontrado.')
+
+        try:
+            with open(options['path'], 'rb') as file:
+                report = import_products(
+                    file, options['path'], warehouse, user=user,
+                    dry_run=options['dry_run'], chunk_size=options['chunk_size'],
+                )
+        except ImportFormatError as e:
+            raise CommandError(str(e))
+        except (ValueError, KeyError, OSError, BadZipFile) as e:
+            raise CommandError(f'No se pudo leer el archivo: {e}')
+
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+
+        for error in report['errors'][:20]:
+            detail = '; '.join(f'{field}: {message}' for field, message in error['errors'].items())
+            self.stdout.write(self.style.WARNING(f"Fila {error['row']}: {detail}"))
+        if len(report['errors']) > 20:
+            self.stdout.write(f"... y {len(report['errors']) - 20} filas más con errores")
+
+        prefix = '🔎 Validación' if report['dry_run'] else '✅ Importación'
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}: {report['rows']} filas, {report['created']} nuevos, "
+            f"{report['updated']} actualizados, {len(report['errors'])} con errores"
+        ))
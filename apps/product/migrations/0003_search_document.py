@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:43
+
+from django.db import migrations, models
+
+SEARCH_PATHS = ('name', 'code', 'barcode', 'brand__name', 'category__name', 'description')
+
+
+def backfill(apps, schema_editor):
+    from utils.search import backfill_search_documents
+    backfill_search_documents(apps, schema_editor, 'product', 'product', SEARCH_PATHS)
+
+
+def create_index(apps, schema_editor):
+    from utils.search import create_trigram_index
+    create_trigram_index(apps, schema_editor, 'product', 'product')
+
+
+def drop_index(apps, schema_editor):
+    from utils.search import drop_trigram_index
+    drop_trigram_index(apps, schema_editor, 'product', 'product')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0002_alter_product_purchase_price_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.RunPython(create_index, drop_index),
+    ]
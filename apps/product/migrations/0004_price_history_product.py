@@ -0,0 +1,64 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    Product = apps.get_model('product', 'Product')
+    ProductPriceHistory = apps.get_model('product', 'ProductPriceHistory')
+
+    content_type = ContentType.objects.filter(app_label='product', model='product').first()
+    if content_type is None:
+        return
+    # FK directa a partir del GenericForeignKey
+    ProductPriceHistory.objects.filter(content_type=content_type, product__isnull=True).update(
+        product_id=Subquery(Product.objects.filter(pk=OuterRef('object_id')).values('pk')[:1])
+    )
+    # Último precio registrado por producto
+    latest = ProductPriceHistory.objects.filter(product=OuterRef('pk')).order_by('-changed_at', '-id')
+    Product.objects.filter(pk__in=ProductPriceHistory.objects.values('product_id')).update(
+        last_purchase_price=Subquery(latest.values('purchase_price')[:1]),
+        last_sale_price=Subquery(latest.values('sale_price')[:1]),
+        last_price_changed_at=Subquery(latest.values('changed_at')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('product', '0003_search_document'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='last_price_changed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='last_purchase_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='last_sale_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='productpricehistory',
+            name='product',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='price_history', to='product.product'),
+        ),
+        migrations.AddIndex(
+            model_name='productpricehistory',
+            index=models.Index(fields=['product', 'changed_at'], name='product_pro_product_feb3c6_idx'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:48
+
+import apps.product.models
+import django.utils.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0004_price_history_product'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='slug',
+            field=apps.product.models.ProductSlugField(always_update=True, editable=False, populate_from='generate_slug', slugify=django.utils.text.slugify, unique_with=['store']),
+        ),
+    ]
@@ -9,6 +9,8 @@ from django.utils.text import slugify
 from apps.stores.models import Store
 from autoslug import AutoSlugField
 from django.db import models
+from utils.search import SearchDocumentMixin
+from utils.ids import uuid7
 from django.conf import settings
 import uuid
 
@@ -18,11 +20,21 @@ class ActiveManager(models.Manager):
     def get_queryset(self):
         return super().get_queryset().filter(soft_deleted=False)
 
+class ProductSlugField(AutoSlugField):
+    """
+    AutoSlugField que respeta el slug ya calculado en cargas masivas (instance.slug_ready):
+    la importación valida los slugs de todo el lote en una consulta en vez de una por fila.
+    """
+    def pre_save(self, instance, add):
+        if getattr(instance, 'slug_ready', False):
+            return getattr(instance, self.attname)
+        return super().pre_save(instance, add)
+
 # Modelo Producto principal
-class Product(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+class Product(SearchDocumentMixin, models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     name = models.CharField(max_length=100)
-    slug = AutoSlugField(populate_from='generate_slug', unique_with=['store'], slugify=slugify, always_update=True)
+    slug = ProductSlugField(populate_from='generate_slug', unique_with=['store'], slugify=slugify, always_update=True)
     code = models.CharField(max_length=100, db_index=True, null=True, blank=True )
     barcode = models.CharField(max_length=100, blank=True, null=True, db_index=True)
     purchase_price = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)], default=0)
@@ -40,6 +52,13 @@ class Product(models.Model):
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
     is_active = models.BooleanField(default=True)
     soft_deleted = models.BooleanField(default=False)
+    # Último registro del historial de precios (evita consultar el historial en el detalle)
+    last_purchase_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, editable=False)
+    last_sale_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, editable=False)
+    last_price_changed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    search_document = models.TextField(blank=True, default='', editable=False)  # Ver utils/search.py
+
+    search_value_paths = ('name', 'code', 'barcode', 'brand__name', 'category__name', 'description')
 
     objects = ActiveManager()
     all_objects = models.Manager()
@@ -59,6 +78,11 @@ class Product(models.Model):
     @property
     def available_stock(self):
         return self.stock - self.reserved_stock
+
+    @property
+    def unit_cost(self):
+        # Costo de la última compra; si nunca se compró, el precio de compra cargado en el producto
+        return self.last_purchase_price if self.last_purchase_price is not None else self.purchase_price
     
     def generate_slug(self):
         return f"{self.code}-{self.name}"
@@ -102,6 +126,7 @@ class ProductImages(models.Model):
 
 # Historial de precios usando GenericForeignKey para flexibilidad
 class ProductPriceHistory(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, null=True, related_name='price_history')
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     object_id = models.UUIDField()
     content_object = GenericForeignKey('content_type', 'object_id')
@@ -111,6 +136,11 @@ class ProductPriceHistory(models.Model):
     changed_at = models.DateTimeField(auto_now_add=True)
     changed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'changed_at']),
+        ]
+
     def __str__(self):
-        name = getattr(self.content_object, 'name', 'Producto')
+        name = getattr(self.product, 'name', 'Producto')
         return f"{name} - {self.changed_at.date()} - Compra: {self.purchase_price}, Venta: {self.sale_price}"
@@ -1,8 +1,8 @@
 from .models import Product, ProductImages, ProductPriceHistory
-from django.contrib.contenttypes.models import ContentType
-from apps.warehouse.utils import get_default_warehouse
+from utils.tenant import get_request_tenant
 from apps.brand.serializers import UnitSerializer
 from django.db import transaction, IntegrityError
+from django.db.models import Q
 from rest_framework import serializers
 
 class ProductImagesSerializer(serializers.ModelSerializer):
@@ -12,23 +12,26 @@ class ProductImagesSerializer(serializers.ModelSerializer):
 
 class ProductBaseSerializer(serializers.ModelSerializer):
     def validate_unique_fields(self, data):
-        user = self.context['request'].user
-        store = getattr(user, 'store', None)
+        store = get_request_tenant(self.context['request']).store
         data_to_check = {
             'name': data.get('name'),
             'code': data.get('code'),
             'slug': data.get('slug'),
             'barcode': data.get('barcode'),
         }
-
+        data_to_check = {field: value for field, value in data_to_check.items() if value}
+        if not data_to_check:
+            return
+        # Una sola consulta para los cuatro campos; luego se ve cuál choca
+        condition = Q()
+        for field, value in data_to_check.items():
+            condition |= Q(**{field: value})
+        qs = Product.all_objects.filter(condition, store=store)
+        if self.instance:
+            qs = qs.exclude(pk=self.instance.pk)
+        rivals = list(qs.values(*data_to_check)[:len(data_to_check)])
         for field, value in data_to_check.items():
-            if not value:
-                continue
-            # Excluir el propio objeto en update
-            qs = Product.objects.filter(store=store, **{field: value})
-            if self.instance:
-                qs = qs.exclude(pk=self.instance.pk)
-            if qs.exists():
+            if any(rival[field] == value for rival in rivals):
                 raise serializers.ValidationError({
                     field: f"Ya existe un producto con este {field} en esta tienda."
                 })
@@ -59,13 +62,15 @@ class ProductCreateSerializer(ProductBaseSerializer):
 
     @transaction.atomic
     def create(self, validated_data):
-        user = self.context['request'].user
-        store = getattr(user, 'store', None)
+        request = self.context['request']
+        user = request.user
+        tenant = get_request_tenant(request)
+        store = tenant.store
 
         if not store:
             raise serializers.ValidationError("El usuario no tiene una tienda asignada.")
         
-        warehouse = get_default_warehouse(user)
+        warehouse = tenant.warehouse
 
         try:
             product = Product.objects.create(
@@ -128,21 +133,14 @@ class ProductSerializer(serializers.ModelSerializer):
     unit = UnitSerializer(read_only=True)
     brand = serializers.CharField(source='brand.name', read_only=True)
     images = ProductImagesSerializer(many=True, read_only=True)
-    history_price = serializers.SerializerMethodField()
 
+    # El historial de precios se pagina aparte: /products/<id>/price-history/
     class Meta:
         model = Product
-        fields = '__all__'
+        exclude = ['search_document']
         read_only_fields = ['id']
         extra_kwargs = {'is_active': {'default': True}}
 
-    def get_history_price(self, obj):
-        history = ProductPriceHistory.objects.filter(
-            content_type=ContentType.objects.get_for_model(Product),
-            object_id=obj.id
-        ).order_by('-changed_at')
-        return ProductHistoryPriceSerializer(history, many=True).data
-
 class ProductSearchSelectSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
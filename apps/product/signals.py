@@ -0,0 +1,18 @@
+from django.db.models.signals import post_save
+from utils.search import refresh_search_documents
+from apps.category.models import Category
+from apps.brand.models import Brand
+from django.dispatch import receiver
+from .models import Product
+
+# El documento de búsqueda del producto incluye el nombre de su marca y categoría
+
+@receiver(post_save, sender=Brand)
+def refresh_products_on_brand_change(sender, instance, created, **kwargs):
+    if not created:
+        refresh_search_documents(Product.all_objects.filter(brand=instance).select_related('brand', 'category'))
+
+@receiver(post_save, sender=Category)
+def refresh_products_on_category_change(sender, instance, created, **kwargs):
+    if not created:
+        refresh_search_documents(Product.all_objects.filter(category=instance).select_related('brand', 'category'))
@@ -0,0 +1,134 @@
+"""
+Servicio de mutación de stock.
+Cada operación bloquea primero las filas de los productos (SELECT ... FOR UPDATE, en orden de id)
+y luego aplica un único UPDATE con expresiones F (CASE por producto) y una condición por línea:
+la BD valida y descuenta en el mismo paso, sin leer cantidades en Python ni perder actualizaciones
+entre cajas concurrentes. Si alguna línea no cumple la condición, el número de filas afectadas
+no coincide y se revierte todo el lote.
+El orden de id en los bloqueos evita que dos cajas con productos en común se bloqueen
+mutuamente (deadlock).
+"""
+from django.db.models import Case, When, F, Q, Value, IntegerField
+from django.db.models.functions import Greatest
+from rest_framework import serializers
+from django.db import transaction
+from functools import reduce
+from .models import Product
+import operator
+
+
+class _Shortfall(Exception):
+    pass
+
+
+def _quantities(lines):
+    """
+    Agrupa las líneas (product_id, cantidad) por producto; ignora cantidades nulas.
+    """
+    quantities = {}
+    for product_id, quantity in lines:
+        quantity = int(quantity)
+        if quantity:
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+    return quantities
+
+
+def _case(field, quantities, expression):
+    return Case(
+        *[When(pk=pk, then=expression(n)) for pk, n in quantities.items()],
+        default=F(field),
+        output_field=IntegerField(),
+    )
+
+
+def lock_products(product_ids):
+    """
+    Bloquea las filas de los productos en orden canónico (por id) dentro de la transacción actual.
+    Llamarlo al inicio con todos los productos que tocará la transacción; los bloqueos posteriores
+    sobre esas filas ya están tomados y no cambian el orden.
+    """
+    ids = set(product_ids)
+    if ids:
+        list(Product.objects.select_for_update().filter(pk__in=ids).order_by('pk').values_list('pk', flat=True))
+
+
+def _apply(quantities, updates, condition=None):
+    """
+    UPDATE product SET <campo> = CASE id ... END WHERE (id = ? AND <condición>) OR ...
+    Devuelve el número de filas actualizadas.
+    """
+    if condition is None:
+        where = Q(pk__in=list(quantities))
+    else:
+        where = reduce(operator.or_, (Q(pk=pk) & condition(n) for pk, n in quantities.items()))
+    values = {field: _case(field, quantities, expression) for field, expression in updates.items()}
+    with transaction.atomic():
+        lock_products(quantities)
+        return Product.objects.filter(where).update(**values)
+
+
+def _apply_or_fail(quantities, updates, condition, reserved, message):
+    try:
+        with transaction.atomic():
+            if _apply(quantities, updates, condition) != len(quantities):
+                raise _Shortfall()
+    except _Shortfall:
+        # El lote ya se revirtió: se informa qué productos no alcanzan
+        products = Product.objects.filter(pk__in=list(quantities)).values('id', 'name', 'stock', 'reserved_stock')
+        errors = []
+        for p in products:
+            available = p['stock'] - p['reserved_stock']
+            if (available if reserved else p['stock']) < quantities[p['id']]:
+                errors.append(message.format(name=p['name'], available=available, stock=p['stock']))
+        raise serializers.ValidationError(errors or ["Stock insuficiente."])
+
+
+def _available(n):
+    return Q(stock__gte=F('reserved_stock') + n)
+
+
+def decrease_stock(lines, release_reserved=False):
+    """
+    Descuenta stock. Por defecto exige stock disponible (stock - reservado >= n).
+    release_reserved: la salida consume una reserva previa (confirmación de venta pendiente).
+    """
+    quantities = _quantities(lines)
+    if not quantities:
+        return
+
+    updates = {'stock': lambda n: F('stock') - n}
+    if release_reserved:
+        updates['reserved_stock'] = lambda n: Greatest(F('reserved_stock') - n, Value(0))
+        _apply_or_fail(quantities, updates, lambda n: Q(stock__gte=n), False,
+                       "Stock insuficiente para {name}. Quedan {stock} unidades.")
+    else:
+        _apply_or_fail(quantities, updates, _available, True,
+                       "Stock insuficiente para {name}. Disponible: {available}.")
+
+
+def increase_stock(lines):
+    """
+    Suma stock (compras confirmadas, cancelación de ventas completadas).
+    """
+    quantities = _quantities(lines)
+    if quantities:
+        _apply(quantities, {'stock': lambda n: F('stock') + n})
+
+
+def reserve_stock(lines):
+    """
+    Reserva stock disponible para ventas pendientes.
+    """
+    quantities = _quantities(lines)
+    if quantities:
+        _apply_or_fail(quantities, {'reserved_stock': lambda n: F('reserved_stock') + n}, _available, True,
+                       "Stock insuficiente para reservar {name}. Disponible: {available}.")
+
+
+def release_stock(lines):
+    """
+    Libera reservas (edición o cancelación de ventas pendientes).
+    """
+    quantities = _quantities(lines)
+    if quantities:
+        _apply(quantities, {'reserved_stock': lambda n: Greatest(F('reserved_stock') - n, Value(0))})
@@ -1,3 +1,218 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from rest_framework import serializers
+from apps.inventory.models import InventoryTransaction
+from apps.category.models import Category
+from apps.brand.models import Brand
+from apps.inventory.utils import stock_at
+from django.utils.timezone import localdate
+from utils.search import normalize_search_text
+from utils.testing import make_tenant, api_client, SHARED_CACHE, LOCAL_CACHE
+from .barcodes import BarcodeCache
+from .importer import import_products
+from .stock import decrease_stock, increase_stock, reserve_stock, release_stock
+from .models import Product
+import io
 
-# Create your tests here.
+
+def csv_file(*lines):
+    return io.BytesIO('\n'.join(lines).encode('utf-8'))
+
+
+class ProductImporterTest(TestCase):
+    def setUp(self):
+        self.store, self.warehouse, self.user, products = make_tenant(products=1)
+        self.existing = products[0]
+
+    def run_import(self, *lines, dry_run=False):
+        return import_products(csv_file(*lines), 'catalogo.csv', self.warehouse, user=self.user, dry_run=dry_run)
+
+    def test_new_products_get_opening_ledger_entry(self):
+        report = self.run_import(
+            'nombre;código;precio compra;precio venta;stock;unidad',
+            'Arroz;A1;4,50;6;12;Unidad',
+            'Azúcar;A2;3;5;0;u',
+        )
+
+        self.assertEqual(report['created'], 2)
+        self.assertEqual(report['errors'], [])
+        rice = Product.objects.get(store=self.store, code='A1')
+        sugar = Product.objects.get(store=self.store, code='A2')
+        self.assertEqual(str(rice.purchase_price), '4.50')
+        self.assertEqual(rice.stock, 12)
+
+        opening = InventoryTransaction.objects.get(product=rice)
+        self.assertEqual((opening.type, opening.quantity, opening.reference_type), ('entrada', 12, 'import'))
+        self.assertFalse(InventoryTransaction.objects.filter(product=sugar).exists())
+        self.assertEqual(stock_at(self.warehouse.id, localdate(), [rice.id]), {rice.id: 12})
+
+    def test_existing_code_updates_without_touching_stock(self):
+        report = self.run_import(
+            'code,name,sale_price,stock',
+            f'{self.existing.code},Renombrado,15,999',
+        )
+
+        self.assertEqual((report['created'], report['updated']), (0, 1))
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.name, 'Renombrado')
+        self.assertEqual(self.existing.sale_price, 15)
+        self.assertEqual(self.existing.stock, 100)
+        self.assertFalse(InventoryTransaction.objects.filter(product=self.existing).exists())
+
+    def test_duplicates_and_invalid_values_are_reported(self):
+        report = self.run_import(
+            'code,name,sale_price,stock,unit',
+            'B1,Leche,5,1,u',
+            'B1,Leche entera,5,1,u',
+            f'B2,{self.existing.name},5,1,u',
+            'B3,Yogur,abc,-2,u',
+        )
+
+        errors = {error['row']: error['errors'] for error in report['errors']}
+        self.assertEqual(report['created'], 1)
+        self.assertIn('code', errors[3])
+        self.assertIn('name', errors[4])
+        self.assertEqual(set(errors[5]), {'sale_price', 'stock'})
+        self.assertEqual(InventoryTransaction.objects.filter(warehouse=self.warehouse).count(), 1)
+
+    def test_dry_run_writes_nothing(self):
+        report = self.run_import('code,name,sale_price,stock,unit', 'C1,Pan,2,10,u', dry_run=True)
+
+        self.assertEqual(report['dry_run'], True)
+        self.assertFalse(Product.all_objects.filter(store=self.store, code='C1').exists())
+        self.assertFalse(InventoryTransaction.objects.filter(warehouse=self.warehouse).exists())
+
+
+class BarcodeCacheTest(TestCase):
+    def setUp(self):
+        self.store, self.warehouse, self.user, products = make_tenant(products=1)
+        self.product = products[0]
+        self.product.barcode = '7790001'
+        self.product.save()
+        self.barcodes = BarcodeCache(max_size=10, max_warehouses=2)
+
+    def scanned_stock(self):
+        found = self.barcodes.lookup(self.store.id, self.warehouse.id, ['7790001', '0000000'])
+        self.assertNotIn('0000000', found)
+        return found['7790001']['stock']
+
+    @override_settings(CACHES=LOCAL_CACHE)
+    def test_process_local_cache_reads_database(self):
+        self.assertEqual(self.scanned_stock(), 100)
+        # Otro worker vende sin que este proceso vea el cambio de versión
+        Product.objects.filter(pk=self.product.pk).update(stock=40)
+
+        self.assertEqual(self.scanned_stock(), 40)
+
+    @override_settings(CACHES=SHARED_CACHE)
+    def test_shared_cache_serves_until_version_changes(self):
+        self.assertEqual(self.scanned_stock(), 100)
+        Product.objects.filter(pk=self.product.pk).update(stock=40)
+        self.assertEqual(self.scanned_stock(), 100)
+
+        self.product.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+
+        self.assertEqual(self.scanned_stock(), 40)
+
+
+class StockServiceTest(TestCase):
+    def setUp(self):
+        self.store, self.warehouse, self.user, (self.a, self.b) = make_tenant(products=2, stock=10)
+
+    def levels(self):
+        return {
+            pk: (stock, reserved)
+            for pk, stock, reserved in Product.objects.values_list('pk', 'stock', 'reserved_stock')
+        }
+
+    def assertLevels(self, a, b):
+        self.assertEqual(self.levels(), {self.a.pk: a, self.b.pk: b})
+
+    def assertShortfall(self, operation, lines, message):
+        with self.assertRaises(serializers.ValidationError) as error:
+            operation(lines)
+        self.assertEqual([str(detail) for detail in error.exception.detail], [message])
+
+    def test_decrease_groups_lines_and_ignores_zero(self):
+        decrease_stock([(self.a.pk, 3), (self.a.pk, 2), (self.b.pk, 0)])
+        increase_stock([(self.b.pk, 4)])
+
+        self.assertLevels((5, 0), (14, 0))
+
+    def test_shortfall_rolls_back_the_whole_batch(self):
+        Product.objects.filter(pk=self.b.pk).update(reserved_stock=8)
+
+        self.assertShortfall(
+            decrease_stock, [(self.a.pk, 4), (self.b.pk, 3)],
+            f'Stock insuficiente para {self.b.name}. Disponible: 2.',
+        )
+        self.assertLevels((10, 0), (10, 8))
+
+    def test_reserve_and_release(self):
+        reserve_stock([(self.a.pk, 6)])
+        self.assertShortfall(
+            reserve_stock, [(self.a.pk, 5)], f'Stock insuficiente para reservar {self.a.name}. Disponible: 4.'
+        )
+        release_stock([(self.a.pk, 2)])
+        self.assertLevels((10, 4), (10, 0))
+
+        release_stock([(self.a.pk, 9)])  # Nunca queda negativo
+        self.assertLevels((10, 0), (10, 0))
+
+    def test_confirmation_consumes_reservation(self):
+        reserve_stock([(self.a.pk, 10)])
+        # Sin release_reserved la reserva bloquea la venta
+        self.assertShortfall(decrease_stock, [(self.a.pk, 4)], f'Stock insuficiente para {self.a.name}. Disponible: 0.')
+
+        decrease_stock([(self.a.pk, 4)], release_reserved=True)
+        self.assertLevels((6, 6), (10, 0))
+        self.assertShortfall(
+            lambda lines: decrease_stock(lines, release_reserved=True), [(self.a.pk, 7)],
+            f'Stock insuficiente para {self.a.name}. Quedan 6 unidades.',
+        )
+        self.assertLevels((6, 6), (10, 0))
+
+
+class ProductSearchTest(TestCase):
+    def setUp(self):
+        self.store, self.warehouse, self.user, (self.product,) = make_tenant(products=1)
+        self.brand = Brand.objects.create(name='Gloria', store=self.store)
+        self.category = Category.objects.create(name='Lácteos', store=self.store)
+        self.product.name = 'Chocolate con leche'
+        self.product.brand = self.brand
+        self.product.category = self.category
+        self.product.save()
+        for i, name in enumerate(('Superleche en polvo', 'Leche entera')):
+            Product.objects.create(
+                name=name, code=f'L{i}', store=self.store, warehouse=self.warehouse, unit=self.product.unit,
+                stock=1, sale_price=1, purchase_price=1,
+            )
+        self.client = api_client(self.user)
+
+    def search(self, text):
+        response = self.client.get('/api/p/products/', {'search': text})
+        self.assertEqual(response.status_code, 200, response.content)
+        return [row['name'] for row in response.json()['results']]
+
+    def test_normalizes_accents_case_and_spaces(self):
+        self.assertEqual(normalize_search_text('  Café ', None, 'ÑANDÚ  con\tLeche', ''), 'cafe nandu con leche')
+        self.assertEqual(self.search('LÁCTEOS'), ['Chocolate con leche'])
+
+    def test_ranks_document_start_then_word_prefix_then_anywhere(self):
+        self.assertEqual(self.search('Léche'), ['Leche entera', 'Chocolate con leche', 'Superleche en polvo'])
+        # Todas las palabras deben aparecer; ?ordering explícito manda sobre la relevancia
+        self.assertEqual(self.search('leche gloria'), ['Chocolate con leche'])
+        response = self.client.get('/api/p/products/', {'search': 'leche', 'ordering': 'name'})
+        self.assertEqual([row['name'] for row in response.json()['results']],
+                         ['Chocolate con leche', 'Leche entera', 'Superleche en polvo'])
+
+    def test_brand_and_category_renames_rebuild_documents(self):
+        self.brand.name = 'Pil Andina'
+        self.brand.save()
+        self.category.name = 'Dulces'
+        self.category.save()
+
+        self.assertEqual(self.search('andina dulces'), ['Chocolate con leche'])
+        self.assertEqual(self.search('gloria'), [])
+        self.assertEqual(self.search('lacteos'), [])
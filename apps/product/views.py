@@ -1,26 +1,30 @@
-from .serializers import ProductCreateSerializer, ProductSerializer, ProductListSerializer, ProductSearchSelectSerializer, ProductBarcodeSerializer, ProductUpdateSerializer
+from .serializers import ProductCreateSerializer, ProductSerializer, ProductListSerializer, ProductSearchSelectSerializer, ProductUpdateSerializer, ProductHistoryPriceSerializer
 from rest_framework import permissions, filters, serializers, status
-from apps.warehouse.utils import get_default_warehouse
 from rest_framework.viewsets import ModelViewSet
+from utils.search import DocumentSearchFilter, search_documents
+from utils.tenant import TenantViewMixin
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import Product
+from .importer import import_products, ImportFormatError
+from .barcodes import barcode_cache
+from .models import Product, ProductPriceHistory
+from zipfile import BadZipFile
 
 # Create your views here.
-class ProductViewSet(ModelViewSet):
+class ProductViewSet(TenantViewMixin, ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['name', 'slug', 'code', 'barcode', 'description', 'brand__name', 'category__name', 'code']
+    filter_backends = [filters.OrderingFilter, DocumentSearchFilter]
+    # Nombre, código, código de barras, descripción, marca y categoría (ver Product.search_value_paths)
+    search_document_field = 'search_document'
     ordering_fields = ['name', 'created_at', 'sale_price', 'category__name']
     ordering = ['-created_at']
 
     def get_queryset(self):
-        user = self.request.user
-        warehouse = get_default_warehouse(user)
+        tenant = self.tenant
 
         queryset = Product.objects.filter(
-            store=user.store,
-            warehouse=warehouse,
+            store_id=tenant.store_id,
+            warehouse_id=tenant.warehouse_id,
             soft_deleted=False
         ).select_related('brand', 'category', 'unit').prefetch_related('images')
 
@@ -29,7 +33,7 @@ class ProductViewSet(ModelViewSet):
     def get_object(self):
         # Para restore queremos incluir los soft_deleted
         if self.action == 'restore':
-            return Product.objects.filter(store=self.request.user.store).get(pk=self.kwargs['pk'])
+            return Product.objects.filter(store_id=self.tenant.store_id).get(pk=self.kwargs['pk'])
         return super().get_object()
     
     def apply_filters(self, queryset):
@@ -69,44 +73,75 @@ class ProductViewSet(ModelViewSet):
     @action(detail=False, methods=['get'], url_path='search-item')
     def search_item(self, request):
         search = request.query_params.get('search', '')
-        user = request.user
-        warehouse = get_default_warehouse(user)
+        tenant = self.tenant
 
-        queryset = Product.objects.filter(
-            store=user.store,
-            warehouse=warehouse,
-            name__icontains=search,
+        queryset = search_documents(Product.objects.filter(
+            store_id=tenant.store_id,
+            warehouse_id=tenant.warehouse_id,
             soft_deleted=False,
             is_active=True
-        ).only('id', 'name').order_by('name')[:5]
+        ), search).only('id', 'name').order_by('-search_rank', 'name')[:5]
 
         serializer = ProductSearchSelectSerializer(queryset, many=True)
         return Response(serializer.data)
     
+    # Historial de precios paginado, del más reciente al más antiguo
+    @action(detail=True, methods=['get'], url_path='price-history')
+    def price_history(self, request, pk=None):
+        product = self.get_object()
+        queryset = ProductPriceHistory.objects.filter(product=product).order_by('-changed_at', '-id')
+        page = self.paginate_queryset(queryset)
+        serializer = ProductHistoryPriceSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     # Busqueda por Codigo de barras
     @action(detail=False, methods=['get'], url_path='by-barcode')
     def by_barcode(self, request):
         barcode = request.query_params.get('barcode', '').strip()
-        user = request.user
-        warehouse = get_default_warehouse(user)
+        tenant = self.tenant
 
         if not barcode:
             return Response({"detail": "El parámetro 'barcode' es requerido."}, status=400)
 
-        try:
-            product = Product.objects.get(
-                store=user.store,
-                warehouse=warehouse,
-                barcode=barcode,
-                soft_deleted=False,
-                is_active=True
-            )
-        except Product.DoesNotExist:
+        product = barcode_cache.lookup(tenant.store_id, tenant.warehouse_id, [barcode]).get(barcode)
+        if product is None:
             return Response({"detail": "Producto no encontrado."}, status=404)
 
-        serializer = ProductBarcodeSerializer(product)
-        return Response(serializer.data)
+        return Response(product)
+
+    # Varios códigos en una llamada (lectores que acumulan lecturas): {"barcodes": ["...", "..."]}
+    @action(detail=False, methods=['post'], url_path='by-barcodes')
+    def by_barcodes(self, request):
+        barcodes = request.data.get('barcodes')
+        if not isinstance(barcodes, list) or not barcodes:
+            return Response({"detail": "El campo 'barcodes' debe ser una lista no vacía."}, status=400)
+        if len(barcodes) > 100:
+            return Response({"detail": "Máximo 100 códigos por llamada."}, status=400)
+
+        barcodes = [str(barcode).strip() for barcode in barcodes if str(barcode).strip()]
+        tenant = self.tenant
+        found = barcode_cache.lookup(tenant.store_id, tenant.warehouse_id, barcodes)
+        return Response({
+            "results": [found[barcode] for barcode in barcodes if barcode in found],
+            "not_found": [barcode for barcode in barcodes if barcode not in found],
+        })
     
+    # Importación masiva desde CSV/XLSX (multipart, campo 'file'); ?dry_run=1 solo valida
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_file(self, request):
+        file = request.FILES.get('file')
+        if not file:
+            return Response({"detail": "El campo 'file' es requerido."}, status=400)
+
+        dry_run = request.query_params.get('dry_run') in ('1', 'true')
+        try:
+            report = import_products(file, file.name, self.tenant.warehouse, user=request.user, dry_run=dry_run)
+        except ImportFormatError as e:
+            return Response({"detail": str(e)}, status=400)
+        except (ValueError, KeyError, OSError, BadZipFile) as e:
+            return Response({"detail": f"No se pudo leer el archivo: {e}"}, status=400)
+        return Response(report)
+
     @action(detail=True, methods=['post'], url_path='soft-delete')
     def soft_delete(self, request, pk=None):
         product = self.get_object()
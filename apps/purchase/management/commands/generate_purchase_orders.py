@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.purchase.reorder import generate_all_draft_purchases, DEFAULT_COVER_DAYS
+
+class Command(BaseCommand):
+    help = 'Genera compras en borrador, agrupadas por último proveedor, para los productos bajo su punto de reorden'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--warehouse', action='append', dest='warehouses', help='ID de almacén (repetible). Por defecto, todos.')
+        parser.add_argument('--days', type=int, default=DEFAULT_COVER_DAYS, help='Días de demanda a cubrir con cada pedido')
+        parser.add_argument('--dry-run', action='store_true', help='Solo mostrar lo que se generaría')
+
+    def handle(self, *args, **options):
+        if options['days'] < 0:
+            raise CommandError('--days no puede ser negativo.')
+
+        results = generate_all_draft_purchases(options['warehouses'], cover_days=options['days'], dry_run=options['dry_run'])
+        for warehouse, result in results.items():
+            if not result['products'] and not result['without_supplier']:
+                continue
+            line = f"{warehouse.name}: {result['purchases']} compras, {result['products']} productos"
+            if result['without_supplier']:
+                line += f" ({result['without_supplier']} sin proveedor previo)"
+            self.stdout.write(line)
+
+        prefix = '🔎 Simulación' if options['dry_run'] else '✅ Reposición'
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}: {sum(r['purchases'] for r in results.values())} compras en borrador"
+        ))
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase', '0001_initial'),
+        ('stores', '0003_gapless_invoice_numbers'),
+        ('supplier', '0001_initial'),
+        ('warehouse', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='purchase',
+            index=models.Index(fields=['warehouse', 'created_at', 'id'], name='purchase_pu_warehou_e8c540_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase', '0002_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='purchase',
+            name='status',
+            field=models.CharField(choices=[('draft', 'Borrador'), ('completed', 'Completado'), ('pending', 'Pendiente'), ('canceled', 'Cancelado')], default='pending', max_length=20),
+        ),
+    ]
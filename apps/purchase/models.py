@@ -12,6 +12,7 @@ import uuid
 # Create your models here.
 class Purchase(SoftDeleteModel):
     STATUS_CHOICES = [
+        ('draft', 'Borrador'),  # Orden sugerida por reposición automática (ver purchase/reorder.py)
         ('completed', 'Completado'),
         ('pending', 'Pendiente'),
         ('canceled', 'Cancelado'),
@@ -42,6 +43,9 @@ class Purchase(SoftDeleteModel):
         unique_together = [
             ('store', 'invoice_number'),
         ]
+        indexes = [
+            models.Index(fields=['warehouse', 'created_at', 'id']),  # listado y paginación keyset
+        ]
 
     def __str__(self):
         return f"Compra {self.invoice_number}"
@@ -0,0 +1,140 @@
+"""
+Reposición automática: órdenes de compra en borrador a partir del punto de reorden.
+Una consulta trae los productos del almacén por debajo de su umbral (ver inventory/forecast.py)
+junto con el proveedor y el precio de su última compra; los faltantes se agrupan por proveedor
+y cada orden se guarda en su propia transacción (cabecera + bulk_create de detalles).
+Los números de factura se reservan todos de una vez antes de las transacciones, salvo en tiendas
+con numeración sin huecos: ahí cada orden toma el suyo dentro de su transacción.
+Los productos que ya figuran en una compra en borrador o pendiente del almacén se omiten,
+así volver a ejecutar el proceso no duplica pedidos.
+"""
+from django.db.models import F, OuterRef, Subquery, Exists
+from apps.invoicing.utils import generate_invoice_number, generate_invoice_numbers
+from apps.inventory.forecast import reorder_threshold, store_settings
+from apps.warehouse.models import Warehouse
+from apps.product.models import Product
+from .models import Purchase, PurchaseDetail
+from django.db import transaction
+from collections import defaultdict
+from decimal import Decimal
+import math
+
+DEFAULT_COVER_DAYS = 7  # Pedido semanal: se repone el faltante más una semana de demanda
+OPEN_STATUSES = ('draft', 'pending')
+
+
+def reorder_suggestions(warehouse, cover_days=DEFAULT_COVER_DAYS):
+    """
+    Productos a reponer con su último proveedor, en una consulta:
+    [{'product_id', 'supplier_id', 'purchase_price', 'quantity'}, ...].
+    supplier_id es None si el producto nunca se compró.
+    """
+    last_purchase = PurchaseDetail.objects.filter(
+        product=OuterRef('pk'),
+        purchase__status='completed',
+    ).order_by('-purchase__created_at')
+    on_order = PurchaseDetail.objects.filter(
+        product=OuterRef('pk'),
+        purchase__warehouse_id=warehouse.id,
+        purchase__status__in=OPEN_STATUSES,
+        purchase__soft_deleted=False,
+    )
+
+    rows = (
+        Product.objects
+        .filter(warehouse_id=warehouse.id, store_id=warehouse.store_id, is_active=True, soft_deleted=False)
+        .annotate(threshold=reorder_threshold(warehouse.store))
+        .filter(stock__lte=F('threshold'))
+        .filter(~Exists(on_order))
+        .annotate(
+            supplier_id=Subquery(last_purchase.values('purchase__supplier_id')[:1]),
+            last_price=Subquery(last_purchase.values('purchase_price')[:1]),
+        )
+        .values_list('id', 'stock', 'threshold', 'forecast__smoothed_demand', 'supplier_id', 'last_price', 'purchase_price')
+    )
+
+    suggestions = []
+    for product_id, stock, threshold, demand, supplier_id, last_price, purchase_price in rows:
+        # Hasta el punto de reorden más la demanda esperada de un ciclo de pedido
+        quantity = math.ceil(threshold - stock + float(demand or 0) * cover_days)
+        suggestions.append({
+            'product_id': product_id,
+            'supplier_id': supplier_id,
+            'purchase_price': last_price if last_price is not None else purchase_price,
+            'quantity': max(quantity, 1),
+        })
+    return suggestions
+
+
+def generate_draft_purchases(warehouse, user=None, cover_days=DEFAULT_COVER_DAYS, dry_run=False):
+    """
+    Crea una compra en borrador por proveedor con los productos a reponer.
+    Devuelve {'purchases', 'products', 'without_supplier'}.
+    """
+    by_supplier = defaultdict(list)
+    without_supplier = 0
+    for suggestion in reorder_suggestions(warehouse, cover_days):
+        if suggestion['supplier_id'] is None:
+            without_supplier += 1
+        else:
+            by_supplier[suggestion['supplier_id']].append(suggestion)
+
+    result = {
+        'purchases': len(by_supplier),
+        'products': sum(len(lines) for lines in by_supplier.values()),
+        'without_supplier': without_supplier,
+    }
+    if dry_run or not by_supplier:
+        return result
+
+    if store_settings(warehouse.store).gapless_invoice_numbers:
+        # Un número por orden dentro de su transacción: si falla, el número no se pierde
+        invoice_numbers = [None] * len(by_supplier)
+    else:
+        # Todos los números de una vez, fuera de las transacciones por proveedor
+        invoice_numbers = generate_invoice_numbers(warehouse, 'purchase', len(by_supplier))
+    for invoice_number, (supplier_id, lines) in zip(invoice_numbers, by_supplier.items()):
+        create_draft_purchase(warehouse, supplier_id, lines, invoice_number, user)
+    return result
+
+
+def create_draft_purchase(warehouse, supplier_id, lines, invoice_number=None, user=None):
+    """
+    Sin invoice_number se toma el siguiente número correlativo dentro de la transacción (sin huecos).
+    """
+    total = sum(Decimal(line['quantity']) * line['purchase_price'] for line in lines)
+    with transaction.atomic():
+        if invoice_number is None:
+            invoice_number = generate_invoice_number(warehouse, 'purchase', gapless=True)
+        purchase = Purchase.objects.create(
+            supplier_id=supplier_id,
+            store_id=warehouse.store_id,
+            warehouse=warehouse,
+            invoice_number=invoice_number,
+            status='draft',
+            total=total,
+            tax_total=0,
+            discount_total=0,
+            net_total=total,
+            created_by=user,
+        )
+        PurchaseDetail.objects.bulk_create([
+            PurchaseDetail(
+                purchase=purchase,
+                product_id=line['product_id'],
+                quantity=line['quantity'],
+                purchase_price=line['purchase_price'],
+                tax_rate=0,
+                discount=0,
+                subtotal=Decimal(line['quantity']) * line['purchase_price'],
+            )
+            for line in lines
+        ], batch_size=1000)
+    return purchase
+
+
+def generate_all_draft_purchases(warehouse_ids=None, cover_days=DEFAULT_COVER_DAYS, dry_run=False):
+    warehouses = Warehouse.objects.select_related('store__settings')
+    if warehouse_ids is not None:
+        warehouses = warehouses.filter(id__in=warehouse_ids)
+    return {warehouse: generate_draft_purchases(warehouse, cover_days=cover_days, dry_run=dry_run) for warehouse in warehouses}
@@ -1,7 +1,9 @@
 from apps.invoicing.utils import generate_invoice_number
 from django.utils.translation import gettext_lazy as _
-from apps.warehouse.utils import get_default_warehouse
+from utils.tenant import get_request_tenant
 from .models import Purchase, PurchaseDetail
+from .utils import registrar_entrada, lock_purchase_status
+from apps.product.stock import lock_products
 from apps.product.models import Product
 from rest_framework import serializers
 from django.db import transaction
@@ -47,13 +49,16 @@ class PurchaseCreateSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         request = self.context['request']
         user = request.user
-        store = getattr(user, 'store', None)
+        tenant = get_request_tenant(request)
+        store = tenant.store
 
         if not store:
             raise serializers.ValidationError("El usuario no tiene una tienda asignada.")
 
-        warehouse = get_default_warehouse(user)
-        invoice_number = generate_invoice_number(warehouse, 'purchase')
+        warehouse = tenant.warehouse
+        # Sin huecos: el número se asigna dentro de la transacción y se revierte con ella
+        gapless = getattr(tenant.settings, 'gapless_invoice_numbers', False)
+        invoice_number = None if gapless else generate_invoice_number(warehouse, 'purchase')
 
         # Extraemos y removemos detalles antes de crear la compra
         details_data = validated_data.pop('details')
@@ -62,10 +67,13 @@ class PurchaseCreateSerializer(serializers.ModelSerializer):
         if len(set(product_ids)) != len(product_ids):
             raise serializers.ValidationError("No se permiten productos duplicados en la compra.")
 
-        # Precargamos productos con lock optimista
-        products = {product.id: product for product in Product.objects.select_for_update().filter(id__in=product_ids)}
-            
+        products = {product.id: product for product in Product.objects.filter(id__in=product_ids)}
+
         with transaction.atomic():
+            # Bloqueo de productos en orden canónico (por id), dentro de la transacción
+            lock_products(product_ids)
+            if gapless:
+                invoice_number = generate_invoice_number(warehouse, 'purchase', gapless=True)
             purchase = Purchase.objects.create(
                 created_by=user,
                 store=store,
@@ -100,9 +108,6 @@ class PurchaseCreateSerializer(serializers.ModelSerializer):
                 tax_total += tax_amount
                 discount_total += discount_amt
 
-                # Actualizar stock localmente
-                product.stock += quantity
-                # Registrar movimiento de inventario
                 details_to_create.append(PurchaseDetail(
                     purchase=purchase,
                     product=product,
@@ -124,12 +129,17 @@ class PurchaseCreateSerializer(serializers.ModelSerializer):
             purchase.net_total = net_total
             purchase.save()
 
+            # Compra registrada ya completada: stock, kardex y precios en la misma transacción
+            if purchase.status == 'completed':
+                registrar_entrada(purchase, details_to_create, user, tenant.settings, 'Compra registrada')
+
         return purchase
     
     def update(self, instance, validated_data):
+        request = self.context['request']
 
-        if instance.status != 'pending':
-            raise serializers.ValidationError("Solo se pueden editar compras pendientes.")
+        if instance.status not in ('draft', 'pending'):
+            raise serializers.ValidationError("Solo se pueden editar compras en borrador o pendientes.")
 
         details_data = validated_data.pop('details')
         product_ids = [detail['product'].id for detail in details_data]
@@ -137,9 +147,13 @@ class PurchaseCreateSerializer(serializers.ModelSerializer):
         if len(set(product_ids)) != len(product_ids):
             raise serializers.ValidationError("No se permiten productos duplicados.")
 
-        products = {product.id: product for product in Product.objects.filter(id__in=product_ids).select_for_update()}
+        products = {product.id: product for product in Product.objects.filter(id__in=product_ids)}
 
         with transaction.atomic():
+            # Estado releído con bloqueo: una confirmación en paralelo no ingresa el stock dos veces
+            if lock_purchase_status(instance) not in ('draft', 'pending'):
+                raise serializers.ValidationError("Solo se pueden editar compras en borrador o pendientes.")
+            lock_products(product_ids)
             # Actualizar campos simples
             for attr, value in validated_data.items():
                 setattr(instance, attr, value)
@@ -188,4 +202,8 @@ class PurchaseCreateSerializer(serializers.ModelSerializer):
             instance.net_total = net_total
             instance.save()
 
+            # Borrador o pendiente que pasa a completada al editarla
+            if instance.status == 'completed':
+                registrar_entrada(instance, new_details, request.user, getattr(instance.store, 'settings', None), 'Compra actualizada')
+
         return instance
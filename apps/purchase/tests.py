@@ -1,3 +1,166 @@
+from django.db import IntegrityError
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework import serializers
+from apps.inventory.models import InventoryTransaction
+from apps.invoicing.models import InvoiceCounter
+from apps.supplier.models import Supplier
+from apps.product.models import Product
+from utils.pagination import KeysetPagination
+from utils.testing import make_tenant, api_client
+from datetime import timedelta
+from unittest import mock
+from .models import Purchase, PurchaseDetail
+from .reorder import generate_draft_purchases
+from .utils import procesar_cancelacion
 
-# Create your tests here.
+
+class DraftPurchaseNumberingTest(TestCase):
+    def setUp(self):
+        self.store, self.warehouse, self.user, products = make_tenant(products=2, stock=0)
+        for i, product in enumerate(products):
+            supplier = Supplier.objects.create(name=f'Proveedor {i}', contact_name='Ventas', store=self.store)
+            purchase = Purchase.objects.create(
+                supplier=supplier, store=self.store, warehouse=self.warehouse, invoice_number=f'OLD-{i}',
+                status='completed', total=5, tax_total=0, discount_total=0, net_total=5,
+            )
+            PurchaseDetail.objects.create(
+                purchase=purchase, product=product, quantity=1, purchase_price=5, tax_rate=0, discount=0, subtotal=5,
+            )
+
+    def set_gapless(self, gapless):
+        self.store.settings.gapless_invoice_numbers = gapless
+        self.store.settings.save()
+
+    def generate_failing_second_order(self):
+        bulk_create = PurchaseDetail.objects.bulk_create
+        calls = []
+
+        def fail_second(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:
+                raise IntegrityError('detalle inválido')
+            return bulk_create(*args, **kwargs)
+
+        with mock.patch.object(PurchaseDetail.objects, 'bulk_create', side_effect=fail_second):
+            with self.assertRaises(IntegrityError):
+                generate_draft_purchases(self.warehouse, self.user)
+
+    def last_number(self):
+        return InvoiceCounter.objects.get(warehouse=self.warehouse, operation_type='purchase').last_number
+
+    def drafts(self):
+        return sorted(Purchase.objects.filter(status='draft').values_list('invoice_number', flat=True))
+
+    def test_gapless_store_allocates_inside_each_order(self):
+        self.set_gapless(True)
+
+        self.generate_failing_second_order()
+        self.assertEqual(self.last_number(), 1)
+
+        generate_draft_purchases(self.warehouse, self.user)
+        self.assertEqual([number[-4:] for number in self.drafts()], ['0001', '0002'])
+
+    def test_regular_store_preallocates_numbers(self):
+        self.set_gapless(False)
+
+        self.generate_failing_second_order()
+
+        self.assertEqual(self.last_number(), 2)
+        self.assertEqual(len(self.drafts()), 1)
+
+
+class PurchaseCancellationTest(TestCase):
+    def setUp(self):
+        self.store, self.warehouse, self.user, products = make_tenant(products=1, stock=10)
+        self.product = products[0]
+        supplier = Supplier.objects.create(name='Proveedor', contact_name='Ventas', store=self.store)
+        self.purchase = Purchase.objects.create(
+            supplier=supplier, store=self.store, warehouse=self.warehouse, invoice_number='P-1',
+            status='completed', total=40, tax_total=0, discount_total=0, net_total=40,
+        )
+        PurchaseDetail.objects.create(
+            purchase=self.purchase, product=self.product, quantity=8, purchase_price=5, tax_rate=0, discount=0, subtotal=40,
+        )
+
+    def ledger(self):
+        return list(InventoryTransaction.objects.filter(reference_id=self.purchase.id).values_list('type', 'quantity'))
+
+    def test_cancel_removes_purchased_units(self):
+        procesar_cancelacion(self.purchase, self.user)
+
+        self.product.refresh_from_db()
+        self.purchase.refresh_from_db()
+        self.assertEqual(self.product.stock, 2)
+        self.assertEqual(self.purchase.status, 'canceled')
+        self.assertEqual(self.ledger(), [('ajuste', -8)])
+
+    def test_cancel_is_rejected_when_units_were_sold_or_reserved(self):
+        for stock, reserved in ((5, 0), (10, 3)):
+            Product.objects.filter(pk=self.product.pk).update(stock=stock, reserved_stock=reserved)
+
+            with self.assertRaises(serializers.ValidationError) as error:
+                procesar_cancelacion(self.purchase, self.user)
+
+            self.assertIn(f'Disponible: {stock - reserved}', str(error.exception.detail[0]))
+            self.product.refresh_from_db()
+            self.purchase.refresh_from_db()
+            self.assertEqual((self.product.stock, self.product.reserved_stock), (stock, reserved))
+            self.assertEqual(self.purchase.status, 'completed')
+            self.assertEqual(self.ledger(), [])
+
+
+@mock.patch.object(KeysetPagination, 'page_size', 2)
+class PurchaseListPaginationTest(TestCase):
+    def setUp(self):
+        self.store, self.warehouse, self.user, _ = make_tenant(products=0)
+        supplier = Supplier.objects.create(name='Proveedor', contact_name='Ventas', store=self.store)
+        now = timezone.now()
+        # P-2 y P-3 comparten created_at: el id desempata
+        for number, minutes in ((1, 1), (2, 2), (3, 2), (4, 3), (5, 4)):
+            purchase = Purchase.objects.create(
+                supplier=supplier, store=self.store, warehouse=self.warehouse, invoice_number=f'P-{number}',
+                total=1, tax_total=0, discount_total=0, net_total=1,
+            )
+            Purchase.objects.filter(pk=purchase.pk).update(created_at=now - timedelta(minutes=minutes))
+        self.expected = list(
+            Purchase.objects.order_by('-created_at', '-id').values_list('invoice_number', flat=True)
+        )
+        self.client = api_client(self.user)
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        return data, [row['invoice_number'] for row in data['results']]
+
+    def test_cursor_pages_forward_and_back(self):
+        data, first = self.get('/api/purchase/purchases/?cursor=&status=pending')
+        self.assertEqual(first, self.expected[:2])
+        self.assertIsNone(data['previous'])
+        self.assertNotIn('count', data)
+        self.assertIn('status=pending', data['next'])
+
+        pages = [first]
+        while data['next']:
+            data, page = self.get(data['next'])
+            pages.append(page)
+        self.assertEqual(pages, [self.expected[:2], self.expected[2:4], self.expected[4:]])
+
+        back = []
+        while data['previous']:
+            data, page = self.get(data['previous'])
+            back.append(page)
+        self.assertEqual(back, [self.expected[2:4], self.expected[:2]])
+
+    def test_invalid_cursor_is_not_found(self):
+        for cursor in ('nope', 'eyJ0IjogMX0'):  # Base64 roto y {"t": 1}
+            response = self.client.get(f'/api/purchase/purchases/?cursor={cursor}')
+            self.assertEqual(response.status_code, 404)
+
+    def test_estimated_count(self):
+        data, _ = self.get('/api/purchase/purchases/?cursor=&count=estimate')
+        self.assertEqual(data['count'], 5)
+
+        data, page = self.get('/api/purchase/purchases/?page=3&count=estimate')
+        self.assertEqual((data['count'], page), (5, self.expected[4:]))
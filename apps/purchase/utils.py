@@ -1,6 +1,11 @@
-from apps.product.models import ProductPriceHistory, Product
+from apps.product.stock import decrease_stock, increase_stock
+from apps.product.models import ProductPriceHistory
 from apps.inventory.models import InventoryTransaction
+from apps.inventory.ledger import write_ledger
+from utils.db import retry_on_conflict
+from .models import Purchase
 from django.db import transaction
+from rest_framework import serializers
 from decimal import Decimal
 
 def calculate_sale_price(purchase_price, margin_percentage):
@@ -16,85 +21,109 @@ def handle_purchase_price_update(product, new_price, user, config=None):
     auto_update = getattr(config, 'auto_update_price_on_purchase', False)
     margin = getattr(config, 'margin_percentage', 0)
 
-    if auto_update:
-        product.purchase_price = new_price
-        product.sale_price = calculate_sale_price(new_price, margin)
-        product.save(update_fields=['purchase_price', 'sale_price'])
-
     # Registrar historial de precios SIEMPRE
-    ProductPriceHistory.objects.create(
+    history = ProductPriceHistory.objects.create(
+        product=product,
         content_object=product,
         purchase_price=new_price,
-        sale_price=product.sale_price,
+        sale_price=calculate_sale_price(new_price, margin) if auto_update else product.sale_price,
         changed_by=user
     )
 
+    # Último precio en el propio producto; los precios vigentes solo si la tienda lo tiene activado
+    product.last_purchase_price = history.purchase_price
+    product.last_sale_price = history.sale_price
+    product.last_price_changed_at = history.changed_at
+    update_fields = ['last_purchase_price', 'last_sale_price', 'last_price_changed_at']
+    if auto_update:
+        product.purchase_price = new_price
+        product.sale_price = history.sale_price
+        update_fields += ['purchase_price', 'sale_price']
+    product.save(update_fields=update_fields)
+
+def lock_purchase_status(purchase):
+    """
+    Bloquea la compra y recarga su estado: evita sumar o revertir stock dos veces en paralelo.
+    """
+    purchase.status = Purchase.objects.select_for_update().values_list('status', flat=True).get(pk=purchase.pk)
+    return purchase.status
+
+def registrar_entrada(purchase, details, user, config, reason):
+    """
+    Ingresa al stock los detalles de la compra: suma stock, registra las entradas en el kardex
+    y actualiza los precios de compra. Corre dentro de la transacción de quien la llama.
+    """
+    increase_stock([(detail.product_id, detail.quantity) for detail in details])
+
+    inventory_logs = []
+    for detail in details:
+        product = detail.product
+        quantity = detail.quantity
+
+        inventory_logs.append(InventoryTransaction(
+            product=product,
+            quantity=quantity,
+            type='entrada',
+            reason=reason,
+            reference_type='Purchase',
+            reference_id=purchase.id,
+            user=user,
+            warehouse=purchase.warehouse,
+            store=purchase.store
+        ))
+
+        handle_purchase_price_update(
+            product=product,
+            new_price=detail.purchase_price,
+            user=user,
+            config=config
+        )
+
+    write_ledger(inventory_logs)
+
+@retry_on_conflict()
 def procesar_confirmacion(purchase, user):
     """
     Confirma una compra pendiente y actualiza stock.
     """
     with transaction.atomic():
-        inventory_logs = []
-        updated_products = []
-        warehouse = purchase.warehouse
+        if lock_purchase_status(purchase) in ('completed', 'canceled'):
+            raise serializers.ValidationError("La compra ya fue confirmada o cancelada.")
 
-        config = getattr(purchase.store, 'settings', None)
-
-        for detail in purchase.details.select_related('product'):
-            product = detail.product
-            quantity = detail.quantity
-
-            product.stock += quantity
-            # Si manejas stock reservado:
-            updated_products.append(product)
-
-            inventory_logs.append(InventoryTransaction(
-                product=product,
-                quantity=quantity,
-                type='entrada',
-                reason='Confirmación de compra',
-                reference_type='Purchase',
-                reference_id=purchase.id,
-                user=user,
-                warehouse=warehouse,
-                store=purchase.store
-            ))
-
-            handle_purchase_price_update(
-                product=product,
-                new_price=detail.purchase_price,
-                user=user,
-                config=config
-            )
-
-        InventoryTransaction.objects.bulk_create(inventory_logs)
-        Product.objects.bulk_update(updated_products, ['stock'])
+        details = list(purchase.details.select_related('product'))
+        registrar_entrada(purchase, details, user, getattr(purchase.store, 'settings', None), 'Confirmación de compra')
 
         purchase.status = 'completed'
         purchase.save()
 
+@retry_on_conflict()
 def procesar_cancelacion(purchase, user):
     """
-    Cancela una compra. Si estaba completada, revierte el stock.
+    Cancela una compra. Si estaba completada, revierte el stock: exige que las unidades compradas
+    sigan disponibles (no vendidas ni reservadas), así el stock y el kardex retiran lo mismo.
     """
     with transaction.atomic():
-        updated_products = []
+        if lock_purchase_status(purchase) == 'canceled':
+            raise serializers.ValidationError("La compra ya está cancelada.")
+
         inventory_logs = []
         warehouse = purchase.warehouse
         store = purchase.store
 
         if purchase.status == 'completed':
-            for detail in purchase.details.select_related('product'):
+            details = list(purchase.details.select_related('product'))
+
+            # Revertir stock; si parte ya se vendió o está reservada, no se cancela
+            decrease_stock([(detail.product_id, detail.quantity) for detail in details])
+
+            for detail in details:
                 product = detail.product
                 quantity = detail.quantity
 
-                # Revertir stock
-                product.stock = max(0, product.stock - quantity)
-                updated_products.append(product)
-
+                # Ajuste negativo: la cancelación retira del stock lo que la compra ingresó
                 inventory_logs.append(InventoryTransaction(
                     product=product,
-                    quantity=quantity,
+                    quantity=-quantity,
                     type='ajuste',
                     reason='Cancelación de compra',
                     reference_type='Purchase',
@@ -104,8 +133,7 @@ def procesar_cancelacion(purchase, user):
                     store=store
                 ))
 
-            InventoryTransaction.objects.bulk_create(inventory_logs)
-            Product.objects.bulk_update(updated_products, ['stock'])
+            write_ledger(inventory_logs)
 
         purchase.status = 'canceled'
         purchase.save()
@@ -3,30 +3,49 @@ from .serializers import PurchaseListSerializer, PurchaseDetailSerializer
 from .utils import procesar_confirmacion, procesar_cancelacion
 from django_filters.rest_framework import DjangoFilterBackend
 from .serializer_create import PurchaseCreateSerializer
-from apps.warehouse.utils import get_default_warehouse
 from django.db.models.functions import TruncMonth
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from .models import Purchase, PurchaseDetail
 from django.db.models import Sum, Count
 from django.utils.timezone import now
+from utils.tenant import TenantViewMixin
+from utils.pagination import KeysetPagination
+from utils.db import retry_on_conflict
+from utils.export import ExportMixin
 from .filters import PurchaseFilter
+from .reorder import generate_draft_purchases
 from datetime import timedelta
 
 # Create your views here.
-class PurchaseViewSet(viewsets.ModelViewSet):
+class PurchaseViewSet(TenantViewMixin, ExportMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_class = PurchaseFilter  # ✅ Esta es la forma correcta
+    pagination_class = KeysetPagination
     search_fields = ['invoice_number', 'supplier__name', 'total']
     ordering_fields = ['created_at', 'invoice_number', 'purchase_date', 'net_total']
     ordering = ['-created_at']
+    export_name = 'compras'
+    export_columns = [
+        ('Factura', 'invoice_number'), ('Fecha', 'purchase_date'), ('Proveedor', 'supplier__name'),
+        ('Estado', 'status'), ('Total', 'total'), ('Impuestos', 'tax_total'),
+        ('Descuentos', 'discount_total'), ('Neto', 'net_total'), ('Registrada', 'created_at'),
+    ]
 
     def get_queryset(self):
-        user = self.request.user
-        warehouse = get_default_warehouse(user)
-        return Purchase.objects.filter(store=user.store, warehouse=warehouse).prefetch_related('details', 'supplier')
+        tenant = self.tenant
+        return Purchase.objects.filter(store_id=tenant.store_id, warehouse_id=tenant.warehouse_id).prefetch_related('details', 'supplier')
     
+    # Cada intento corre su propia transacción; ante deadlock/serialización se reintenta completo
+    @retry_on_conflict()
+    def perform_create(self, serializer):
+        serializer.save()
+
+    @retry_on_conflict()
+    def perform_update(self, serializer):
+        serializer.save()
+
     def get_serializer_class(self):
         if self.action == 'list':
             return PurchaseListSerializer
@@ -58,6 +77,12 @@ class PurchaseViewSet(viewsets.ModelViewSet):
         self.perform_destroy(instance)
         return Response({'detail': 'Compra eliminada correctamente.'}, status=status.HTTP_204_NO_CONTENT)
         
+    # Reposición: compras en borrador por proveedor para los productos bajo su punto de reorden
+    @action(detail=False, methods=['post'], url_path='generate-drafts')
+    def generate_drafts(self, request):
+        result = generate_draft_purchases(self.tenant.warehouse, user=request.user)
+        return Response(result, status=status.HTTP_201_CREATED if result['purchases'] else status.HTTP_200_OK)
+
     @action(detail=True, methods=['post'], url_path='cancel')
     def cancel(self, request, pk=None):
         user = request.user
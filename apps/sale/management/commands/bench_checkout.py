@@ -0,0 +1,107 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, close_old_connections
+from django.db.models import Sum
+from rest_framework.test import APIRequestFactory, force_authenticate
+from concurrent.futures import ThreadPoolExecutor
+from apps.accounts.models import User, Role
+from apps.stores.models import Store, GeneralSetting
+from apps.warehouse.models import Warehouse, UserWarehouseAccess
+from apps.product.models import Product
+from apps.sale.models import SaleDetail
+from apps.sale.views import SaleViewSet
+import random
+import time
+import uuid
+
+
+class Command(BaseCommand):
+    help = 'Benchmark de ventas concurrentes sobre pocos productos "calientes": throughput, latencia p99 y sobreventa'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Cajas (hilos) en paralelo')
+        parser.add_argument('--sales', type=int, default=200, help='Ventas totales a intentar')
+        parser.add_argument('--skus', type=int, default=3, help='Productos calientes compartidos por todas las cajas')
+        parser.add_argument('--stock', type=int, default=100, help='Stock inicial de cada producto')
+        parser.add_argument('--lines', type=int, default=2, help='Productos por venta')
+        parser.add_argument('--keep', action='store_true', help='No borrar la tienda de prueba al terminar')
+
+    def handle(self, *args, **options):
+        store, user, products = self.crear_tienda(options['skus'], options['stock'])
+        view = SaleViewSet.as_view({'post': 'create'})
+        factory = APIRequestFactory()
+        product_ids = [str(p.id) for p in products]
+        lines = min(options['lines'], len(product_ids))
+
+        def checkout(_):
+            close_old_connections()
+            details = [
+                {'product': product_id, 'quantity': 1, 'discount': 0}
+                for product_id in random.sample(product_ids, lines)
+            ]
+            request = factory.post('/api/sale/sales/', {
+                'status': 'completed', 'payment_method': 'cash', 'details': details,
+            }, format='json')
+            force_authenticate(request, user=user)
+            start = time.perf_counter()
+            try:
+                status = view(request).status_code
+            except Exception:
+                status = 500
+            finally:
+                connection.close()
+            return status, time.perf_counter() - start
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            results = list(pool.map(checkout, range(options['sales'])))
+        elapsed = time.perf_counter() - started
+
+        self.reportar(results, elapsed, products, options['stock'])
+
+        if not options['keep']:
+            store.delete()
+
+    def crear_tienda(self, skus, stock):
+        code = uuid.uuid4().hex[:6].upper()
+        store = Store.objects.create(name=f'Bench {code}', code=f'B{code}')
+        GeneralSetting.objects.create(store=store)
+        warehouse = Warehouse.objects.create(name='Bench', code=f'B{code}', store=store)
+        role, _ = Role.objects.get_or_create(name='Administrador')
+        user = User.objects.create_user(email=f'bench-{code.lower()}@localstock.test', name='Bench', store=store, role=role)
+        UserWarehouseAccess.objects.create(user=user, warehouse=warehouse, role=role, is_default=True)
+        products = [
+            Product.objects.create(
+                name=f'Bench {i}', code=f'B{code}{i}', store=store, warehouse=warehouse,
+                stock=stock, sale_price=10, purchase_price=5,
+            )
+            for i in range(skus)
+        ]
+        return store, user, products
+
+    def reportar(self, results, elapsed, products, initial_stock):
+        latencies = sorted(latency for _, latency in results)
+        ok = sum(1 for status, _ in results if status == 201)
+        rejected = sum(1 for status, _ in results if status == 400)
+        errors = len(results) - ok - rejected
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+        sold = dict(
+            SaleDetail.objects.filter(product__in=products)
+            .values_list('product_id')
+            .annotate(total=Sum('quantity'))
+        )
+        oversell = lost_updates = 0
+        for product in products:
+            product.refresh_from_db()
+            units = sold.get(product.id, 0)
+            oversell += max(0, units - initial_stock)
+            # Stock final distinto de inicial - vendido => alguna actualización se perdió
+            lost_updates += abs(initial_stock - units - product.stock)
+
+        self.stdout.write(f"Ventas: {len(results)} (ok {ok}, sin stock {rejected}, errores {errors}) en {elapsed:.2f}s")
+        self.stdout.write(f"Throughput: {ok / elapsed:.1f} ventas/s")
+        self.stdout.write(f"Latencia p50: {percentile(0.50):.1f} ms | p99: {percentile(0.99):.1f} ms")
+        style = self.style.SUCCESS if oversell == lost_updates == 0 else self.style.ERROR
+        self.stdout.write(style(f"Sobreventa: {oversell} unidades | Actualizaciones perdidas: {lost_updates} unidades"))
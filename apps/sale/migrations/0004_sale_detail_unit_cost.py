@@ -0,0 +1,41 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:55
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill(apps, schema_editor):
+    Sale = apps.get_model('sale', 'Sale')
+    SaleDetail = apps.get_model('sale', 'SaleDetail')
+    Product = apps.get_model('product', 'Product')
+    ProductPriceHistory = apps.get_model('product', 'ProductPriceHistory')
+
+    # Costo vigente a la fecha de la venta según el historial; si no hay, el precio de compra actual
+    as_of_sale = ProductPriceHistory.objects.filter(
+        product=OuterRef('product_id'),
+        changed_at__lte=Subquery(Sale.objects.filter(pk=OuterRef(OuterRef('sale_id'))).values('created_at')[:1]),
+    ).order_by('-changed_at', '-id')
+    current = Product.objects.filter(pk=OuterRef('product_id'))
+    SaleDetail.objects.update(unit_cost=Coalesce(
+        Subquery(as_of_sale.values('purchase_price')[:1]),
+        Subquery(current.values('purchase_price')[:1]),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0005_product_slug_field'),
+        ('sale', '0003_search_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='saledetail',
+            name='unit_cost',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10, validators=[django.core.validators.MinValueValidator(0)]),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -5,11 +5,12 @@ from apps.customer.models import Customer
 from apps.product.models import Product
 from apps.stores.models import Store
 from django.conf import settings
+from utils.search import SearchDocumentMixin
 from django.db import models
-import uuid
+from utils.ids import uuid7
 
 # Create your models here.
-class Sale(SoftDeleteModel):
+class Sale(SearchDocumentMixin, SoftDeleteModel):
     STATUS_CHOICES = [
         ('draft', 'Borrador'),
         ('pending', 'Pendiente'),
@@ -30,7 +31,7 @@ class Sale(SoftDeleteModel):
         ('paid', 'Pagado'),
     ]
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     customer = models.ForeignKey(Customer, on_delete=models.SET_NULL, null=True, blank=True, related_name='sales')
     store = models.ForeignKey(Store, on_delete=models.CASCADE, related_name='sales')
     warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name='sales')
@@ -48,6 +49,9 @@ class Sale(SoftDeleteModel):
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='sales_created')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    search_document = models.TextField(blank=True, default='', editable=False)  # Ver utils/search.py
+
+    search_value_paths = ('sale_number', 'invoice_number', 'customer__name', 'customer__surnames', 'notes')
 
     objects = ActiveManager()
     all_objects = models.Manager()
@@ -57,6 +61,7 @@ class Sale(SoftDeleteModel):
             models.Index(fields=["invoice_number"]),
             models.Index(fields=["customer"]),
             models.Index(fields=["store"]),
+            models.Index(fields=["warehouse", "created_at", "id"]),  # listado y paginación keyset
         ]
 
     def __str__(self):
@@ -70,6 +75,8 @@ class SaleDetail(models.Model):
     tax_rate = models.DecimalField(max_digits=5, decimal_places=2, validators=[MinValueValidator(0), MaxValueValidator(100)], default=0)
     discount = models.DecimalField(max_digits=10, decimal_places=2, default=0, validators=[MinValueValidator(0)])
     subtotal = models.DecimalField(max_digits=12, decimal_places=2, validators=[MinValueValidator(0)], default=0)
+    # Costo unitario al momento de la venta (Product.unit_cost): el margen no depende del historial de precios
+    unit_cost = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)], default=0)
 
     def __str__(self):
         return f"{self.product.name} x{self.quantity}"
@@ -1,7 +1,10 @@
+from apps.analytics.rollup import apply_sale_to_rollup
 from apps.invoicing.utils import generate_invoice_number
-from apps.warehouse.utils import get_default_warehouse
 from apps.inventory.models import InventoryTransaction
-from .utils import generate_sale_number_by_store
+from apps.inventory.ledger import write_ledger
+from .utils import generate_sale_number_by_store, lock_sale_status
+from utils.tenant import get_request_tenant
+from apps.product.stock import decrease_stock, reserve_stock, release_stock, lock_products
 from apps.product.models import Product
 from rest_framework import serializers
 from .models import Sale, SaleDetail
@@ -44,40 +47,48 @@ class SaleCreateSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at', 'store', 'warehouse', 'discount_total'
         ]
 
-    def validar_stock(self, product, quantity, status):
-        if status == 'completed' and product.stock < quantity:
-            raise serializers.ValidationError(f"Stock insuficiente para {product.name}.")
-        if status == 'pending' and product.stock - product.reserved_stock < quantity:
-            raise serializers.ValidationError(f"Stock insuficiente para reservar {product.name}.")
-        
+    def aplicar_stock(self, details_data, status):
+        """
+        Descuenta (completada) o reserva (pendiente) con un UPDATE condicional; falla si no alcanza.
+        """
+        lines = [(detail['product'].id, detail['quantity']) for detail in details_data]
+        if status == 'completed':
+            decrease_stock(lines)
+        elif status == 'pending':
+            reserve_stock(lines)
+
     def create(self, validated_data):
         details_data = validated_data.pop('details')
         request = self.context['request']
         user = request.user
-        store = getattr(user, 'store', None)
+        tenant = get_request_tenant(request)
+        store = tenant.store
 
         if not store:
             raise serializers.ValidationError("El usuario no tiene una tienda asignada.")
 
-        warehouse = get_default_warehouse(user)
+        warehouse = tenant.warehouse
         status = validated_data.get('status', 'completed')
-        invoice_number = generate_invoice_number(warehouse)
-        validated_data['sale_number'] = generate_sale_number_by_store(store)
 
         product_ids = [detail['product'].id for detail in details_data]
         # Validar duplicados
         if len(set(product_ids)) != len(product_ids):
             raise serializers.ValidationError("No se permiten productos duplicados en la compra.")
 
-        products = {product.id: product for product in Product.objects.filter(id__in=product_ids).select_for_update()}
+        # Lectura sin bloqueo: solo se usan nombre y precio, el stock lo valida el UPDATE condicional
+        products = {product.id: product for product in Product.objects.filter(id__in=product_ids)}
+
+        # Sin huecos: el número se asigna dentro de la transacción y se revierte con ella;
+        # si no, se toma del bloque del proceso antes de abrirla
+        gapless = getattr(tenant.settings, 'gapless_invoice_numbers', False)
+        invoice_number = None if gapless else generate_invoice_number(warehouse)
 
-        # Validación previa de stock o reservas
-        for detail in details_data:
-            product = products[detail['product'].id]
-            quantity = detail['quantity']
-            self.validar_stock(product, quantity, status)
-        
         with transaction.atomic():
+            self.aplicar_stock(details_data, status)
+            if gapless:
+                invoice_number = generate_invoice_number(warehouse, gapless=True)
+            validated_data['sale_number'] = generate_sale_number_by_store(store)
+
             # Crear venta
             sale = Sale.objects.create(
                 created_by=user,
@@ -96,9 +107,8 @@ class SaleCreateSerializer(serializers.ModelSerializer):
                 discount = Decimal(str(detail_data['discount']))
                 price = product.sale_price
 
-                # Descontar stock SOLO si la venta está completada
+                # Registrar salida SOLO si la venta está completada
                 if status == 'completed':
-                    product.stock -= quantity
                     inventory_logs.append(InventoryTransaction(
                     product=product,
                     warehouse=warehouse,
@@ -111,19 +121,14 @@ class SaleCreateSerializer(serializers.ModelSerializer):
                     store=store
                 ))  # ✅ Solo lo crea en memoria
 
-                elif status == 'pending':
-                    product.reserved_stock += quantity
-                
                 subtotal = (price * quantity) * (1 - (discount / 100))
                 total += price * quantity
                 discount_total += (price * quantity) - subtotal
-                sale_details.append(SaleDetail(sale=sale, sale_price = price, subtotal = subtotal, **detail_data))
+                sale_details.append(SaleDetail(sale=sale, sale_price = price, subtotal = subtotal, unit_cost=product.unit_cost, **detail_data))
 
             # Bulk create detalles y movimientos
             SaleDetail.objects.bulk_create(sale_details)
-            InventoryTransaction.objects.bulk_create(inventory_logs)
-            # Bulk update productos modificados
-            Product.objects.bulk_update(products.values(), ['stock', 'reserved_stock'])
+            write_ledger(inventory_logs)
             # Calcular totales y guardar
             sale.total = total
             sale.discount_total = discount_total
@@ -132,45 +137,45 @@ class SaleCreateSerializer(serializers.ModelSerializer):
             sale.net_total = total - discount_total
             sale.save()
 
+            if status == 'completed':
+                apply_sale_to_rollup(sale, sale_details)
+
             return sale
     
     def update(self, instance, validated_data):
         request = self.context['request']
         user = request.user
-        store = getattr(user, 'store', None)
+        store = get_request_tenant(request).store
 
         status = validated_data.get('status', instance.status)
 
-        # Solo permitimos editar ventas en estado 'draft' o 'pending'
-        if instance.status not in ['draft', 'pending']:
-            raise serializers.ValidationError("Solo se pueden editar ventas en estado 'Pendiente' o 'Borrador'.")
-
         details_data = validated_data.pop('details', [])
         product_ids = [detail['product'].id for detail in details_data]
 
         if len(set(product_ids)) != len(product_ids):
             raise serializers.ValidationError("No se permiten productos duplicados en la venta.")
 
-        products = {p.id: p for p in Product.objects.filter(id__in=product_ids).select_for_update()}
+        products = {p.id: p for p in Product.objects.filter(id__in=product_ids)}
 
         with transaction.atomic():
-            # Revertir stock/reservas de los detalles anteriores
-            for old_detail in instance.details.select_related('product'):
-                product = old_detail.product
-                if instance.status == 'completed':
-                    product.stock += old_detail.quantity
-                elif instance.status == 'pending':
-                    product.reserved_stock -= old_detail.quantity
-                product.save()
+            # Primero la venta y después los productos: mismo orden de bloqueo que confirmar/cancelar
+            # Solo permitimos editar ventas en estado 'draft' o 'pending'
+            if lock_sale_status(instance) not in ['draft', 'pending']:
+                raise serializers.ValidationError("Solo se pueden editar ventas en estado 'Pendiente' o 'Borrador'.")
+
+            old_lines = list(instance.details.values_list('product_id', 'quantity'))
+            # Bloquear de una vez (en orden de id) los productos anteriores y los nuevos
+            lock_products([product_id for product_id, _ in old_lines] + product_ids)
+
+            # Liberar las reservas de los detalles anteriores (una venta editable nunca descontó stock)
+            if instance.status == 'pending':
+                release_stock(old_lines)
 
             # Borrar detalles antiguos
             instance.details.all().delete()
 
-            # Validar stock para los nuevos productos
-            for detail in details_data:
-                product = products[detail['product'].id]
-                quantity = detail['quantity']
-                self.validar_stock(product, quantity, status)
+            # Descontar o reservar stock para los nuevos productos
+            self.aplicar_stock(details_data, status)
 
             sale_details = []
             inventory_logs = []
@@ -182,9 +187,8 @@ class SaleCreateSerializer(serializers.ModelSerializer):
                 discount = Decimal(detail_data.get('discount', 0))
                 price = product.sale_price
 
-                # Stock actualizado según nuevo estado
+                # Movimiento de salida según nuevo estado
                 if status == 'completed':
-                    product.stock -= quantity
                     inventory_logs.append(InventoryTransaction(
                         product=product,
                         warehouse=product.warehouse,
@@ -196,8 +200,6 @@ class SaleCreateSerializer(serializers.ModelSerializer):
                         user=user,
                         store=store
                     ))
-                elif status == 'pending':
-                    product.reserved_stock += quantity
 
                 subtotal = (price * quantity) * (1 - (discount / 100))
                 total += price * quantity
@@ -209,12 +211,12 @@ class SaleCreateSerializer(serializers.ModelSerializer):
                     quantity=quantity,
                     discount=discount,
                     sale_price=price,
-                    subtotal=subtotal
+                    subtotal=subtotal,
+                    unit_cost=product.unit_cost,
                 ))
 
             SaleDetail.objects.bulk_create(sale_details)
-            InventoryTransaction.objects.bulk_create(inventory_logs)
-            Product.objects.bulk_update(products.values(), ['stock', 'reserved_stock'])
+            write_ledger(inventory_logs)
 
             instance.status = status
             instance.total = total
@@ -228,4 +230,8 @@ class SaleCreateSerializer(serializers.ModelSerializer):
 
             instance.save()
 
+            # Las ventas editables nunca estaban completadas: solo se suma si pasa a completada
+            if status == 'completed':
+                apply_sale_to_rollup(instance, sale_details)
+
             return instance
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save
+from utils.search import refresh_search_documents
+from apps.customer.models import Customer
+from django.dispatch import receiver
+from .models import Sale
+
+# El documento de búsqueda de la venta incluye el nombre del cliente
+
+@receiver(post_save, sender=Customer)
+def refresh_sales_on_customer_change(sender, instance, created, **kwargs):
+    if not created and getattr(instance, 'search_document_changed', False):
+        refresh_search_documents(Sale.all_objects.filter(customer=instance).select_related('customer'))
@@ -1,59 +1,68 @@
+from apps.analytics.rollup import apply_sale_to_rollup
 from apps.inventory.models import InventoryTransaction
-from apps.product.models import Product
+from apps.inventory.ledger import write_ledger
+from apps.product.stock import decrease_stock, increase_stock, release_stock
 from rest_framework import serializers
+from apps.invoicing.utils import next_store_sequence
+from utils.db import retry_on_conflict
 from django.db import transaction
 from .models import Sale
 
-def generate_sale_number_by_store(store):
+def last_sale_number(store):
+    """
+    Último correlativo usado por la tienda; solo se consulta para iniciar su secuencia.
+    """
     prefix = f"{store.code}-SL"
     last_sale = Sale.objects.filter(
         store=store,
         sale_number__startswith=prefix
     ).order_by('-sale_number').first()
-    
+
     if last_sale and last_sale.sale_number:
         try:
-            last_number = int(last_sale.sale_number.split('-')[-1])
+            return int(last_sale.sale_number.split('-')[-1])
         except ValueError:
-            last_number = 0
-    else:
-        last_number = 0
+            return 0
+    return 0
 
-    new_number = last_number + 1
+def generate_sale_number_by_store(store):
+    prefix = f"{store.code}-SL"
+    new_number = next_store_sequence(store, 'sale', seed=lambda: last_sale_number(store))
     return f"{prefix}-{str(new_number).zfill(5)}"
 
+def lock_sale_status(sale):
+    """
+    Bloquea la venta y recarga su estado: dos confirmaciones/cancelaciones simultáneas se serializan.
+    """
+    sale.status = Sale.objects.select_for_update().values_list('status', flat=True).get(pk=sale.pk)
+    return sale.status
+
+@retry_on_conflict()
 def procesar_confirmacion(sale, user):
     """
     Confirma una venta pendiente: descuenta stock y libera reservas.
     """
-    if sale.status == 'completed':
-        raise serializers.ValidationError("La venta ya ha sido confirmada.")
-    if sale.status == 'canceled':
-        raise serializers.ValidationError("No se puede confirmar una venta cancelada.")
-
     with transaction.atomic():
+        status = lock_sale_status(sale)
+        if status == 'completed':
+            raise serializers.ValidationError("La venta ya ha sido confirmada.")
+        if status == 'canceled':
+            raise serializers.ValidationError("No se puede confirmar una venta cancelada.")
+
         inventory_logs = []
-        updated_products = []
         warehouse = sale.warehouse
-        config = getattr(sale.store, 'settings', None)
+        details = list(sale.details.select_related('product'))
 
-        for detail in sale.details.select_related('product'):
+        # Descontar stock (y liberar reservas si estaba pendiente) en un UPDATE condicional
+        decrease_stock(
+            [(detail.product_id, detail.quantity) for detail in details],
+            release_reserved=sale.status == 'pending',
+        )
+
+        for detail in details:
             product = detail.product
             quantity = detail.quantity
 
-            if product.stock < quantity:
-                raise serializers.ValidationError(
-                    f"Stock insuficiente para {product.name}. Quedan {product.stock} unidades."
-                )
-
-            # Liberar reservas si estaba pendiente
-            if sale.status == 'pending':
-                product.reserved_stock = max(0, product.reserved_stock - quantity)
-
-            # Descontar stock
-            product.stock -= quantity
-            updated_products.append(product)
-
             inventory_logs.append(InventoryTransaction(
                 product=product,
                 quantity=quantity,
@@ -66,51 +75,57 @@ def procesar_confirmacion(sale, user):
                 store=sale.store
             ))
 
-        InventoryTransaction.objects.bulk_create(inventory_logs)
-        Product.objects.bulk_update(updated_products, ['stock', 'reserved_stock'])
+        write_ledger(inventory_logs)
 
         sale.status = 'completed'
         sale.save()
 
+        apply_sale_to_rollup(sale, details)
+
+@retry_on_conflict()
 def procesar_cancelacion(sale, user):
     """
     Cancela una venta. Si estaba completada, revierte el stock.
     """
-    if sale.status == 'canceled':
-        raise serializers.ValidationError("La venta ya fue cancelada.")
-
     with transaction.atomic():
-        updated_products = []
+        if lock_sale_status(sale) == 'canceled':
+            raise serializers.ValidationError("La venta ya fue cancelada.")
+
         inventory_logs = []
         warehouse = sale.warehouse
         store = sale.store
-
-        for detail in sale.details.select_related('product'):
-            product = detail.product
-            quantity = detail.quantity
-
-            # Revertir según estado anterior
-            if sale.status == 'pending':
-                product.reserved_stock = max(0, product.reserved_stock - quantity)
-            elif sale.status == 'completed':
-                product.stock = product.stock + quantity  # Reponer stock
-
-            updated_products.append(product)
-
-            inventory_logs.append(InventoryTransaction(
-                product=product,
-                quantity=quantity,
-                type='ajuste',
-                reason='Cancelación de venta',
-                reference_type='Sale',
-                reference_id=sale.id,
-                user=user,
-                warehouse=warehouse,
-                store=store
-            ))
-
-        InventoryTransaction.objects.bulk_create(inventory_logs)
-        Product.objects.bulk_update(updated_products, ['stock', 'reserved_stock'])
+        previous_status = sale.status
+        details = list(sale.details.select_related('product'))
+
+        # Revertir según estado anterior
+        lines = [(detail.product_id, detail.quantity) for detail in details]
+        if previous_status == 'pending':
+            release_stock(lines)
+        elif previous_status == 'completed':
+            increase_stock(lines)  # Reponer stock
+
+        # Solo una venta completada movió stock: una pendiente solo tenía reservas
+        if previous_status == 'completed':
+            for detail in details:
+                product = detail.product
+                quantity = detail.quantity
+
+                inventory_logs.append(InventoryTransaction(
+                    product=product,
+                    quantity=quantity,
+                    type='ajuste',
+                    reason='Cancelación de venta',
+                    reference_type='Sale',
+                    reference_id=sale.id,
+                    user=user,
+                    warehouse=warehouse,
+                    store=store
+                ))
+
+        write_ledger(inventory_logs)
 
         sale.status = 'canceled'
         sale.save()
+
+        if previous_status == 'completed':
+            apply_sale_to_rollup(sale, details, sign=-1)
@@ -2,28 +2,49 @@ from rest_framework import viewsets, filters, status, serializers
 from .serializers import SaleListSerializer, SaleDetailSerializer
 from .utils import procesar_cancelacion, procesar_confirmacion
 from django_filters.rest_framework import DjangoFilterBackend
-from apps.warehouse.utils import get_default_warehouse
 from rest_framework.permissions import IsAuthenticated
 from .serializer_create import SaleCreateSerializer
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from utils.search import DocumentSearchFilter
+from utils.tenant import TenantViewMixin
+from utils.pagination import KeysetPagination
+from utils.db import retry_on_conflict
+from utils.export import ExportMixin
 from .filters import SaleFilter
 from .models import Sale
 
 # Create your views here.
-class SaleViewSet(viewsets.ModelViewSet):
+class SaleViewSet(TenantViewMixin, ExportMixin, viewsets.ModelViewSet):
     permission_classes = [ IsAuthenticated ]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, DocumentSearchFilter]
     filterset_class = SaleFilter
-    search_fields = ['invoice_number', 'customer__name', 'notes', 'sale_number']
+    pagination_class = KeysetPagination
+    # Número de venta, factura, cliente y notas (ver Sale.search_value_paths)
+    search_document_field = 'search_document'
     ordering_fields = ['invoice_number', 'customer__name', 'created_at']
     ordering = ['-created_at']
+    export_name = 'ventas'
+    export_columns = [
+        ('Número', 'sale_number'), ('Factura', 'invoice_number'), ('Fecha', 'sale_date'),
+        ('Cliente', 'customer__name'), ('Estado', 'status'), ('Estado de pago', 'payment_status'),
+        ('Método de pago', 'payment_method'), ('Total', 'total'), ('Impuestos', 'tax_total'),
+        ('Descuentos', 'discount_total'), ('Neto', 'net_total'), ('Registrada', 'created_at'),
+    ]
 
     def get_queryset(self):
-        user = self.request.user
-        warehouse = get_default_warehouse(user)
-        return Sale.objects.filter(store=user.store, warehouse=warehouse).select_related('customer').prefetch_related('details__product')
+        tenant = self.tenant
+        return Sale.objects.filter(store_id=tenant.store_id, warehouse_id=tenant.warehouse_id).select_related('customer').prefetch_related('details__product')
     
+    # Cada intento corre su propia transacción; ante deadlock/serialización se reintenta completo
+    @retry_on_conflict()
+    def perform_create(self, serializer):
+        serializer.save()
+
+    @retry_on_conflict()
+    def perform_update(self, serializer):
+        serializer.save()
+
     def get_serializer_class(self):
         if self.action == 'list':
             return SaleListSerializer
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stores', '0002_alter_plan_max_products_alter_plan_max_users'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generalsetting',
+            name='gapless_invoice_numbers',
+            field=models.BooleanField(default=False),
+        ),
+    ]
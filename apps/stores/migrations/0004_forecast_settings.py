@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stores', '0003_gapless_invoice_numbers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generalsetting',
+            name='forecast_window_days',
+            field=models.PositiveIntegerField(default=28),
+        ),
+        migrations.AddField(
+            model_name='generalsetting',
+            name='lead_time_days',
+            field=models.PositiveIntegerField(default=7),
+        ),
+        migrations.AddField(
+            model_name='generalsetting',
+            name='safety_stock_days',
+            field=models.PositiveIntegerField(default=3),
+        ),
+    ]
@@ -44,8 +44,13 @@ class GeneralSetting(models.Model):
     theme = models.CharField(max_length=20, default='light')
     alerts_stock = models.BooleanField(default=True)
     stock_minimo = models.IntegerField(default=5)
+    # Pronóstico de demanda (apps/inventory/forecast.py): punto de reorden = demanda diaria × (reposición + seguridad)
+    lead_time_days = models.PositiveIntegerField(default=7)
+    safety_stock_days = models.PositiveIntegerField(default=3)
+    forecast_window_days = models.PositiveIntegerField(default=28)
     notification_email = models.BooleanField(default=False)
     auto_update_price_on_purchase = models.BooleanField(default=False)
+    gapless_invoice_numbers = models.BooleanField(default=False)  # Numeración de facturas correlativa sin huecos
     margin_percentage = models.DecimalField(default=Decimal('20.0'), max_digits=5, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -32,9 +32,10 @@ class GeneralSettingSerializer(serializers.ModelSerializer):
         model = GeneralSetting
         fields = [
             'timezone', 'idioma', 'currency', 'tax_enabled',
-            'alerts_stock', 'stock_minimo', 'notification_email',
+            'alerts_stock', 'stock_minimo', 'lead_time_days', 'safety_stock_days',
+            'forecast_window_days', 'notification_email',
             'auto_update_price_on_purchase', 'margin_percentage',
-            'created_at', 'updated_at'
+            'gapless_invoice_numbers', 'created_at', 'updated_at'
         ]
         read_only_fields = ['store']
 
@@ -3,9 +3,10 @@ from rest_framework.response import Response
 from rest_framework.exceptions import NotFound
 from rest_framework.views import APIView
 from .serializers import StoreSerializer, GeneralSettingSerializer, RubroSerializer, StoreUpdateSerializer
-from .models import Store, Plan, Rubro, GeneralSetting
+from .models import Store, Plan, Rubro
 from rest_framework.request import Request
 from django_countries import countries
+from utils.tenant import TenantViewMixin
 
 # Create your views here.
 class RubroListView(generics.ListAPIView):
@@ -13,16 +14,15 @@ class RubroListView(generics.ListAPIView):
     serializer_class = RubroSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class StoreConfigView(APIView):
+class StoreConfigView(TenantViewMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        try:
-            store = request.user.store
-            settings = store.settings
-        except Store.DoesNotExist:
+        store = self.tenant.store
+        settings = self.tenant.settings
+        if store is None:
             raise NotFound('No se encontró la tienda del usuario.')
-        except GeneralSetting.DoesNotExist:
+        if settings is None:
             raise NotFound('No se encontraron los ajustes generales.')
 
         store_data = StoreSerializer(store).data
@@ -34,12 +34,11 @@ class StoreConfigView(APIView):
         })
 
     def put(self, request):
-        try:
-            store = request.user.store
-            settings = store.settings
-        except Store.DoesNotExist:
+        store = self.tenant.store
+        settings = self.tenant.settings
+        if store is None:
             raise NotFound('No se encontró la tienda del usuario.')
-        except AttributeError:
+        if settings is None:
             raise NotFound('No se encontraron los ajustes generales.')
                 
         store_data = request.data.get('store', {})
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from utils.tenant import get_request_tenant
 from .models import Supplier
 
 class SupplierSerializer(serializers.ModelSerializer):
@@ -17,7 +18,7 @@ class SupplierSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Debe proporcionar al menos un teléfono o un correo electrónico de contacto.")
 
         nit = data.get('nit')
-        store = self.context['request'].user.store
+        store = get_request_tenant(self.context['request']).store
 
         if nit is not None:
             qs = Supplier.objects.filter(nit=nit, store=store, soft_deleted=False)
@@ -29,8 +30,7 @@ class SupplierSerializer(serializers.ModelSerializer):
         return data
     
     def create(self, validated_data):
-        user = self.context['request'].user
-        store = getattr(user, 'store', None)
+        store = get_request_tenant(self.context['request']).store
         if not store:
             raise serializers.ValidationError("El usuario no tiene una tienda asociada.")
         return Supplier.objects.create(store=store, **validated_data)
@@ -4,10 +4,11 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q
+from utils.tenant import TenantViewMixin
 from .models import Supplier
 
 # Create your views here.
-class SupplierViewSet(viewsets.ModelViewSet):
+class SupplierViewSet(TenantViewMixin, viewsets.ModelViewSet):
     queryset = Supplier.objects.all()
     serializer_class = SupplierSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -20,13 +21,13 @@ class SupplierViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         return Supplier.objects.filter(
-            store=self.request.user.store,
+            store_id=self.tenant.store_id,
             soft_deleted=False
         )
     
     @action(detail=True, methods=['post'], url_path='restore')
     def restore(self, request, pk=None):
-        supplier = Supplier.all_objects.filter(pk=pk, store=request.user.store).first()
+        supplier = Supplier.all_objects.filter(pk=pk, store_id=self.tenant.store_id).first()
         if supplier and supplier.soft_deleted:
             supplier.soft_deleted = False
             supplier.deleted_at = None
@@ -37,10 +38,8 @@ class SupplierViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path='search-item')
     def search_item(self, request):
         search = request.query_params.get('search', '')
-        user = request.user
-
         queryset = Supplier.objects.filter(
-            store=user.store,
+            store_id=self.tenant.store_id,
             soft_deleted=False,
             is_active=True
         ).filter(
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from utils.tenant import get_request_tenant
 from .models import Warehouse
 
 class WarehouseSerializer(serializers.ModelSerializer):
@@ -10,9 +11,7 @@ class WarehouseSerializer(serializers.ModelSerializer):
         read_only_fields = ['store', 'created_at', 'updated_at']
 
     def validate(self, attrs):
-        request = self.context['request']
-        user = request.user
-        store = getattr(user, 'store', None)
+        store = get_request_tenant(self.context['request']).store
 
         if not store:
             raise serializers.ValidationError("El usuario no tiene una tienda asignada.")
@@ -38,8 +37,7 @@ class WarehouseSerializer(serializers.ModelSerializer):
         return attrs
 
     def create(self, validated_data):
-        user = self.context['request'].user
-        store = getattr(user, 'store', None)
+        store = get_request_tenant(self.context['request']).store
 
         if not store:
             raise serializers.ValidationError("El usuario no tiene una tienda asignada.")
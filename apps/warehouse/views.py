@@ -2,9 +2,10 @@ from rest_framework import viewsets, permissions, filters
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from .serializers import WarehouseSerializer
+from utils.tenant import TenantViewMixin
 from .models import Warehouse
 
-class WarehouseView(viewsets.ModelViewSet):
+class WarehouseView(TenantViewMixin, viewsets.ModelViewSet):
     serializer_class = WarehouseSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -16,9 +17,8 @@ class WarehouseView(viewsets.ModelViewSet):
         """
         Retorna solo los almacenes no eliminados del store del usuario autenticado.
         """
-        user = self.request.user
         return Warehouse.objects.filter(
-            store=user.store,
+            store_id=self.tenant.store_id,
             soft_delete=False  # Excluir eliminados lógicamente
         ).order_by('-created_at')
 
@@ -54,9 +54,8 @@ class WarehouseView(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path='warehouse-search')
     def warehouse_search(self, request):
         search = request.query_params.get('search', '')
-        user = request.user
         queryset = Warehouse.objects.filter(
-                store=user.store,
+                store_id=self.tenant.store_id,
                 name__icontains=search,
                 soft_delete=False,
                 is_active=True
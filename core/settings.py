@@ -72,6 +72,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'utils.tenant.TenantMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -111,6 +112,30 @@ DATABASES = {
     'default': dj_database_url.config(default=config('DATABASE_URL'))
 }
 
+# Cache
+# Memoria local por defecto; para compartirla entre workers define CACHE_BACKEND/CACHE_LOCATION
+# (p.ej. django.core.cache.backends.redis.RedisCache y redis://host:6379/1).
+# Con la caché local, las lecturas con JWT consultan siempre la BD (ver utils/tenant.py) y cada
+# worker puede servir dashboards hasta TENANT_CACHE_TIMEOUT segundos después de que otro escriba
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='localstock'),
+    }
+}
+
+# Segundos que viven los resultados del dashboard/inventario (se invalidan antes al escribir;
+# con caché local solo en el worker que escribió)
+TENANT_CACHE_TIMEOUT = config('TENANT_CACHE_TIMEOUT', default=300, cast=int)
+
+# Números de factura que cada proceso reserva de una vez (hi-lo); 1 = reservar de uno en uno
+INVOICE_NUMBER_BLOCK_SIZE = config('INVOICE_NUMBER_BLOCK_SIZE', default=20, cast=int)
+
+# Caché de códigos de barras del POS: productos por almacén y almacenes por proceso
+BARCODE_CACHE_SIZE = config('BARCODE_CACHE_SIZE', default=5000, cast=int)
+BARCODE_CACHE_WAREHOUSES = config('BARCODE_CACHE_WAREHOUSES', default=32, cast=int)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -175,7 +200,7 @@ REST_FRAMEWORK = {
         'rest_framework.filters.OrderingFilter',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.accounts.authentication.TenantJWTAuthentication',
         # 'rest_framework.authentication.TokenAuthentication',
         # 'rest_framework.authentication.SessionAuthentication',
     ],
@@ -197,6 +222,9 @@ SIMPLE_JWT = {
 
     'AUTH_HEADER_TYPES': ('Bearer',),
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
+    # Tienda, almacén por defecto y rol viajan como claims del token
+    'TOKEN_OBTAIN_SERIALIZER': 'apps.accounts.serializers.TenantTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'apps.accounts.serializers.TenantTokenRefreshSerializer',
 }
 
 ACCOUNT_SIGNUP_FIELDS = ['email*', 'password1*', 'password2*']  # Asegúrate de que el email esté presente
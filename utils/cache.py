@@ -0,0 +1,82 @@
+from django.core.cache import cache
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+import hashlib
+import time
+
+# Cachés propias de cada proceso: lo que escribe un worker no lo ven los demás
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_is_shared():
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES
+
+
+def tenant_version_key(warehouse_id):
+    return f"tenant-version:{warehouse_id}"
+
+
+def get_tenant_version(warehouse_id):
+    """
+    Versión de los datos del almacén. Cambia cada vez que se escribe una venta, compra,
+    movimiento o producto, así las entradas anteriores quedan huérfanas. Con una caché compartida
+    ningún worker las vuelve a servir; con la caché local por defecto (LocMem) el cambio solo lo ve
+    el proceso que escribió y los demás siguen sirviendo su copia hasta TENANT_CACHE_TIMEOUT.
+    """
+    key = tenant_version_key(warehouse_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_tenant_version(warehouse_id):
+    """
+    Invalida la caché del almacén al confirmar la transacción actual.
+    """
+    if warehouse_id is None:
+        return
+    transaction.on_commit(lambda: cache.set(tenant_version_key(warehouse_id), time.time_ns(), None))
+
+
+def tenant_cache_key(warehouse_id, name, params=None):
+    suffix = ''
+    if params:
+        raw = '&'.join(f"{k}={params[k]}" for k in sorted(params))
+        suffix = ':' + hashlib.md5(raw.encode()).hexdigest()
+    return f"tenant:{warehouse_id}:v{get_tenant_version(warehouse_id)}:{name}{suffix}"
+
+
+def cached_tenant_data(warehouse_id, name, compute, params=None, timeout=None):
+    """
+    Devuelve el valor cacheado para el almacén o lo calcula y lo guarda.
+    El timeout acota cuánto puede servir un worker datos viejos si la caché no es compartida.
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'TENANT_CACHE_TIMEOUT', 300)
+    key = tenant_cache_key(warehouse_id, name, params)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout)
+    return value
+
+
+def cached_daily_data(warehouse_id, name, compute, params=None):
+    """
+    Como cached_tenant_data pero fijo durante el día: no depende de la versión del almacén.
+    Para reportes sobre días ya cerrados, que se calculan una vez por día y almacén.
+    """
+    today = timezone.localdate()
+    raw = '&'.join(f"{k}={params[k]}" for k in sorted(params or {}))
+    key = f"tenant-daily:{warehouse_id}:{today}:{name}:{hashlib.md5(raw.encode()).hexdigest()}"
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, 24 * 60 * 60)
+    return value
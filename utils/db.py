@@ -0,0 +1,65 @@
+from django.db import connection, OperationalError
+from functools import wraps
+import random
+import time
+
+# SQLSTATE de Postgres que indican que la transacción puede reintentarse tal cual
+RETRYABLE_SQLSTATES = ('40001', '40P01')  # serialization_failure, deadlock_detected
+
+
+def is_retryable_error(exc):
+    """
+    True si el error es un conflicto de concurrencia (serialización, deadlock o BD bloqueada en SQLite).
+    """
+    cause = exc.__cause__
+    sqlstate = getattr(cause, 'pgcode', None) or getattr(cause, 'sqlstate', None)
+    if sqlstate:
+        return sqlstate in RETRYABLE_SQLSTATES
+    return 'database is locked' in str(exc)
+
+
+def retry_on_conflict(attempts=3, backoff=0.05):
+    """
+    Reintenta la función si la transacción falla por un conflicto de concurrencia.
+    La función debe abrir y cerrar su propia transacción: dentro de un bloque atómico externo
+    no se reintenta, porque la transacción ya quedó abortada y debe fallar completa.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            for attempt in range(1, attempts + 1):
+                try:
+                    return func(*args, **kwargs)
+                except OperationalError as exc:
+                    if attempt == attempts or connection.in_atomic_block or not is_retryable_error(exc):
+                        raise
+                    # Espera creciente con jitter para que las transacciones en conflicto no choquen de nuevo
+                    time.sleep(backoff * attempt * (1 + random.random()))
+        return wrapper
+    return decorator
+
+
+def copy_to(cursor, sql, file):
+    """
+    COPY ... TO STDOUT de Postgres volcado a un archivo binario, con psycopg2 o psycopg 3.
+    """
+    raw = getattr(cursor, 'cursor', cursor)
+    if hasattr(raw, 'copy_expert'):  # psycopg2
+        raw.copy_expert(sql, file)
+        return
+    with raw.copy(sql) as copy:  # psycopg 3
+        for data in copy:
+            file.write(data)
+
+
+def copy_from(cursor, sql, file):
+    """
+    COPY ... FROM STDIN de Postgres leyendo un archivo (texto o binario), con psycopg2 o psycopg 3.
+    """
+    raw = getattr(cursor, 'cursor', cursor)
+    if hasattr(raw, 'copy_expert'):  # psycopg2
+        raw.copy_expert(sql, file)
+        return
+    with raw.copy(sql) as copy:  # psycopg 3
+        while data := file.read(64 * 1024):
+            copy.write(data)
@@ -0,0 +1,38 @@
+"""
+UUID versión 7 (RFC 9562): 48 bits de timestamp Unix en milisegundos, luego aleatorios.
+Como las claves nuevas crecen con el tiempo, los inserts caen al final del índice B-tree de la pk
+en vez de repartirse por todas sus páginas como con uuid4 (menos splits, índice más compacto y
+caché más efectiva). Dentro del mismo milisegundo un contador de 12 bits (rand_a) mantiene el
+orden en el proceso. Siguen siendo UUID válidos: conviven con los uuid4 ya guardados.
+"""
+import threading
+import secrets
+import time
+import uuid
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7():
+    global _last_ms, _counter
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            _last_ms = ms
+            _counter = secrets.randbits(11)  # Mitad baja: deja margen para seguir contando
+        else:
+            _counter += 1
+            if _counter > 0xFFF:
+                # Contador agotado: se toma prestado el milisegundo siguiente
+                _last_ms += 1
+                _counter = 0
+        ms, counter = _last_ms, _counter
+
+    value = (ms & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76                      # versión
+    value |= counter << 64                  # rand_a
+    value |= 0b10 << 62                     # variante RFC
+    value |= secrets.randbits(62)           # rand_b
+    return uuid.UUID(int=value)
@@ -0,0 +1,142 @@
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from django.utils.functional import cached_property
+from django.utils.dateparse import parse_datetime
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.db import connections
+from collections import OrderedDict
+from urllib import parse
+import base64
+import json
+
+# Por debajo de este total estimado se hace el COUNT(*) exacto: es barato y el estimado puede desviarse
+EXACT_COUNT_BELOW = 1000
+
+
+def estimate_count(queryset):
+    """
+    Total de filas según el planificador de Postgres (EXPLAIN), sin recorrer la tabla.
+    En otros motores, o si la estimación es pequeña, devuelve el COUNT(*) exacto.
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.count()
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    if isinstance(plan, list):
+        plan = plan[0]
+    estimate = int(plan['Plan']['Plan Rows'])
+    return queryset.count() if estimate < EXACT_COUNT_BELOW else estimate
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        return estimate_count(self.object_list)
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Paginación por número de página (compatible con el frontend actual) con dos modos opcionales:
+    - ?cursor=            paginación keyset sobre (created_at, id): cada página es un
+                          WHERE (created_at, id) < (...) con índice, sin COUNT(*) ni OFFSET.
+                          Las respuestas traen next/previous con el cursor ya codificado.
+    - ?count=estimate     el total (count) sale de la estimación del planificador en vez de COUNT(*).
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.estimate = request.query_params.get(self.count_query_param) == 'estimate'
+        self.keyset = self.cursor_query_param in request.query_params
+        if self.keyset:
+            return self.paginate_keyset(queryset, request)
+        if self.estimate:
+            self.django_paginator_class = EstimatedCountPaginator
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        response = OrderedDict()
+        if self.estimate:
+            response['count'] = self.count
+        response['next'] = self.get_next_link()
+        response['previous'] = self.get_previous_link()
+        response['results'] = data
+        return Response(response)
+
+    # Modo keyset
+
+    def paginate_keyset(self, queryset, request):
+        page_size = self.get_page_size(request)
+        created_at, pk, reverse = self.decode_cursor(request)
+        self.count = estimate_count(queryset) if self.estimate else None
+
+        if created_at is None:
+            queryset = queryset.order_by('-created_at', '-id')
+        elif reverse:
+            # Página anterior: se recorre hacia atrás y se invierte el resultado
+            queryset = queryset.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+            ).order_by('created_at', 'id')
+        else:
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+            ).order_by('-created_at', '-id')
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        self.has_next = has_more if not reverse else True
+        self.has_previous = created_at is not None and (has_more if reverse else True)
+        self.first_row = rows[0] if rows else None
+        self.last_row = rows[-1] if rows else None
+        return rows
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, None, False
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            created_at = parse_datetime(data['t'])
+            if created_at is None:
+                raise ValueError(data['t'])
+            return created_at, data['id'], bool(data.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound("Cursor inválido.")
+
+    def encode_cursor(self, row, reverse):
+        data = {'t': row.created_at.isoformat(), 'id': str(row.pk)}
+        if reverse:
+            data['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(data).encode('ascii')).decode('ascii').rstrip('=')
+        return self.cursor_url(encoded)
+
+    def cursor_url(self, encoded):
+        url = self.request.build_absolute_uri()
+        scheme, netloc, path, query, fragment = parse.urlsplit(url)
+        params = parse.parse_qs(query, keep_blank_values=True)
+        params[self.cursor_query_param] = [encoded]
+        params.pop(self.page_query_param, None)
+        return parse.urlunsplit((scheme, netloc, path, parse.urlencode(params, doseq=True), fragment))
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next or self.last_row is None:
+            return None
+        return self.encode_cursor(self.last_row, reverse=False)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if not self.has_previous or self.first_row is None:
+            return None
+        return self.encode_cursor(self.first_row, reverse=True)
@@ -0,0 +1,159 @@
+"""
+Búsqueda por documento: cada entidad guarda en `search_document` el texto normalizado
+(minúsculas, sin tildes) de todos sus campos buscables, incluidos los de sus relaciones.
+La búsqueda es un LIKE '%término%' por palabra sobre esa única columna, sin JOINs:
+en Postgres lo resuelve un índice GIN pg_trgm; en SQLite (tests) funciona igual sin índice.
+Los resultados se ordenan por relevancia: coincidencia al inicio del documento, luego al inicio
+de una palabra (prefijo) y por último en cualquier posición.
+"""
+from django.db.models import Case, When, Value, IntegerField
+from rest_framework.filters import SearchFilter, OrderingFilter
+from functools import reduce
+import unicodedata
+import operator
+
+SEARCH_DOCUMENT_FIELD = 'search_document'
+
+
+def normalize_search_text(*values):
+    """
+    Une los valores en un texto en minúsculas, sin tildes y con espacios simples.
+    """
+    text = ' '.join(str(value) for value in values if value not in (None, ''))
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(text.lower().split())
+
+
+class SearchDocumentMixin:
+    """
+    Mixin de modelo: mantiene `search_document` al guardar.
+    El modelo declara search_value_paths con los campos a indexar ('brand__name' sigue relaciones).
+    """
+    search_value_paths = ()
+
+    def get_search_values(self):
+        values = []
+        for path in self.search_value_paths:
+            value = self
+            for attr in path.split('__'):
+                value = getattr(value, attr, None)
+                if value is None:
+                    break
+            values.append(value)
+        return values
+
+    def build_search_document(self):
+        return normalize_search_text(*self.get_search_values())
+
+    def save(self, *args, **kwargs):
+        document = self.build_search_document()
+        self.search_document_changed = document != self.search_document
+        if self.search_document_changed:
+            self.search_document = document
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, SEARCH_DOCUMENT_FIELD}
+        super().save(*args, **kwargs)
+
+
+def refresh_search_documents(queryset, batch_size=500):
+    """
+    Recalcula el documento de búsqueda de las filas del queryset y guarda solo los que cambiaron.
+    Se usa al renombrar relaciones (marca, categoría, cliente) y para el backfill.
+    """
+    model = queryset.model
+    changed = []
+    updated = 0
+    for obj in queryset.iterator(chunk_size=batch_size):
+        document = obj.build_search_document()
+        if document != obj.search_document:
+            obj.search_document = document
+            changed.append(obj)
+        if len(changed) >= batch_size:
+            model._base_manager.bulk_update(changed, [SEARCH_DOCUMENT_FIELD])
+            updated += len(changed)
+            changed = []
+    if changed:
+        model._base_manager.bulk_update(changed, [SEARCH_DOCUMENT_FIELD])
+        updated += len(changed)
+    return updated
+
+
+def search_documents(queryset, text, field=SEARCH_DOCUMENT_FIELD):
+    """
+    Filtra por todas las palabras de `text` y anota `search_rank` (mayor = más relevante).
+    """
+    terms = normalize_search_text(text).split()
+    if not terms:
+        return queryset.annotate(search_rank=Value(0, output_field=IntegerField()))
+    for term in terms:
+        queryset = queryset.filter(**{f'{field}__contains': term})
+    ranks = [
+        Case(
+            When(**{f'{field}__startswith': term}, then=Value(3)),
+            When(**{f'{field}__contains': f' {term}'}, then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+        for term in terms
+    ]
+    return queryset.annotate(search_rank=reduce(operator.add, ranks))
+
+
+class DocumentSearchFilter(SearchFilter):
+    """
+    SearchFilter sobre el documento de búsqueda de la vista (search_document_field).
+    Si no se pide ?ordering explícito, ordena por relevancia conservando el orden por defecto
+    como desempate; por eso debe ir después de OrderingFilter en filter_backends.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        field = getattr(view, 'search_document_field', None)
+        if field is None:
+            return super().filter_queryset(request, queryset, view)
+
+        text = request.query_params.get(self.search_param, '')
+        if not normalize_search_text(text):
+            return queryset
+        queryset = search_documents(queryset, text, field)
+        if request.query_params.get(OrderingFilter.ordering_param):
+            return queryset
+        return queryset.order_by('-search_rank', *queryset.query.order_by)
+
+
+def create_trigram_index(apps, schema_editor, app_label, model_name, field=SEARCH_DOCUMENT_FIELD):
+    """
+    Índice GIN pg_trgm sobre el documento (solo Postgres): acelera LIKE '%término%'.
+    Para usar en migraciones con RunPython.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = apps.get_model(app_label, model_name)._meta.db_table
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {table}_{field}_trgm ON {table} USING gin ({field} gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor, app_label, model_name, field=SEARCH_DOCUMENT_FIELD):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = apps.get_model(app_label, model_name)._meta.db_table
+    schema_editor.execute(f'DROP INDEX IF EXISTS {table}_{field}_trgm')
+
+
+def backfill_search_documents(apps, schema_editor, app_label, model_name, paths, batch_size=1000):
+    """
+    Calcula el documento de las filas existentes con values_list (sirve con modelos históricos).
+    """
+    model = apps.get_model(app_label, model_name)
+    rows = model._base_manager.values_list('pk', *paths)
+    batch = []
+    for pk, *values in rows.iterator(chunk_size=batch_size):
+        batch.append(model(pk=pk, search_document=normalize_search_text(*values)))
+        if len(batch) >= batch_size:
+            model._base_manager.bulk_update(batch, [SEARCH_DOCUMENT_FIELD])
+            batch = []
+    if batch:
+        model._base_manager.bulk_update(batch, [SEARCH_DOCUMENT_FIELD])
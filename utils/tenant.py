@@ -0,0 +1,235 @@
+from rest_framework.exceptions import PermissionDenied
+from apps.warehouse.models import UserWarehouseAccess, Warehouse
+from utils.cache import cached_tenant_data, cache_is_shared
+from django.core.cache import cache
+from django.conf import settings
+
+TENANT_CLAIMS = ('store_id', 'warehouse_id', 'role')
+
+
+def get_default_access(user_id):
+    """
+    Acceso por defecto del usuario con almacén, tienda, ajustes y rol en una sola consulta.
+    """
+    return (
+        UserWarehouseAccess.objects
+        .filter(user_id=user_id, is_default=True)
+        .select_related('warehouse__store__settings', 'role')
+        .first()
+    )
+
+
+def build_tenant_claims(user, access=None):
+    """
+    Claims de tenant que viajan en el JWT: tienda, almacén por defecto y rol.
+    """
+    if access is None:
+        access = get_default_access(user.pk)
+    role = access.role if access else getattr(user, 'role', None)
+    return {
+        'store_id': str(user.store_id) if user.store_id else None,
+        'warehouse_id': str(access.warehouse_id) if access else None,
+        'role': role.name if role else None,
+    }
+
+
+def tenant_claims_cache_key(user_id):
+    return f"tenant-claims:{user_id}"
+
+
+def remember_tenant_claims(user_id, claims):
+    """
+    Guarda los claims vigentes del usuario; el TTL es la vida del access token.
+    """
+    timeout = settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds()
+    cache.set(tenant_claims_cache_key(user_id), claims, timeout)
+
+
+def forget_tenant_claims(user_id):
+    """
+    Invalida los claims del usuario: los tokens emitidos antes dejan de usarse sin consultar la BD.
+    """
+    cache.delete(tenant_claims_cache_key(user_id))
+
+
+def stateless_auth_enabled():
+    """
+    La autenticación sin BD solo es segura si todos los workers comparten la caché de claims:
+    con una caché local, una baja o un cambio de almacén hecho en otro worker no se vería.
+    """
+    return cache_is_shared()
+
+
+def tenant_claims_are_current(token):
+    if not stateless_auth_enabled():
+        return False
+    claims = {name: token.get(name) for name in TENANT_CLAIMS}
+    user_id = token.get(settings.SIMPLE_JWT.get('USER_ID_CLAIM', 'user_id'))
+    return cache.get(tenant_claims_cache_key(user_id)) == claims
+
+
+class TenantContext:
+    """
+    Contexto de tenant de una petición: usuario -> tienda -> almacén por defecto -> ajustes.
+    Se resuelve de forma perezosa la primera vez que se usa y queda memorizado,
+    así una petición hace una sola consulta sin importar cuántas vistas o serializers lo lean.
+    Si se construye desde los claims del JWT, los ids no requieren consultar la BD.
+    """
+
+    def __init__(self, request, claims=None):
+        self.request = request
+        self.claims = claims
+        self._user_id = None
+        self._resolved = False
+        self._access = None
+        self._store = None
+        self._warehouse = None
+        self._settings = None
+
+    @property
+    def user(self):
+        return self.request.user
+
+    def _resolve(self):
+        user = self.user
+        # Si el usuario cambió (p.ej. autenticación DRF posterior al middleware) se vuelve a resolver
+        if self._resolved and self._user_id == user.pk:
+            return
+        self._user_id = user.pk
+        self._resolved = True
+        self._access = None
+        self._store = None
+        self._warehouse = None
+        self._settings = None
+
+        if not user.is_authenticated:
+            return
+
+        if self.claims is not None:
+            self._resolve_from_claims()
+            return
+
+        self._access = get_default_access(user.pk)
+        if self._access:
+            self._warehouse = self._access.warehouse
+        if self._warehouse and self._warehouse.store_id == user.store_id:
+            self._store = self._warehouse.store
+        else:
+            self._store = getattr(user, 'store', None)
+
+        if self._store is not None:
+            self._settings = getattr(self._store, 'settings', None)
+        # Los datos recién leídos de la BD son la versión vigente de los claims
+        remember_tenant_claims(user.pk, build_tenant_claims(user, self._access))
+
+    def _resolve_from_claims(self):
+        warehouse_id = self.claims.get('warehouse_id')
+        if not warehouse_id:
+            return
+        self._warehouse = Warehouse.objects.select_related('store__settings').filter(pk=warehouse_id).first()
+        if self._warehouse and str(self._warehouse.store_id) == self.claims.get('store_id'):
+            self._store = self._warehouse.store
+            self._settings = getattr(self._store, 'settings', None)
+
+    @property
+    def access(self):
+        self._resolve()
+        return self._access
+
+    @property
+    def store(self):
+        self._resolve()
+        return self._store
+
+    @property
+    def store_id(self):
+        if self.claims is not None:
+            return self.claims.get('store_id')
+        store = self.store
+        return store.pk if store else None
+
+    @property
+    def warehouse(self):
+        self._resolve()
+        if not self._warehouse:
+            raise PermissionDenied("No tienes un almacén asignado por defecto.")
+        return self._warehouse
+
+    @property
+    def warehouse_id(self):
+        if self.claims is not None:
+            if not self.claims.get('warehouse_id'):
+                raise PermissionDenied("No tienes un almacén asignado por defecto.")
+            return self.claims['warehouse_id']
+        return self.warehouse.pk
+
+    @property
+    def settings(self):
+        self._resolve()
+        return self._settings
+
+    @property
+    def role(self):
+        if self.claims is not None:
+            return self.claims.get('role')
+        access = self.access
+        role = access.role if access else getattr(self.user, 'role', None)
+        return role.name if role else None
+
+
+def get_request_tenant(request):
+    """
+    Devuelve el TenantContext de la petición (DRF o Django), creándolo si el middleware no lo hizo.
+    """
+    http_request = getattr(request, '_request', request)
+    tenant = getattr(http_request, 'tenant', None)
+    if tenant is None:
+        tenant = TenantContext(http_request)
+        http_request.tenant = tenant
+    return tenant
+
+
+class TenantMiddleware:
+    """
+    Adjunta un TenantContext perezoso a cada petición (request.tenant).
+    La resolución ocurre tras la autenticación JWT de DRF, que actualiza request.user.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.tenant = TenantContext(request)
+        return self.get_response(request)
+
+
+class TenantViewMixin:
+    """
+    Mixin para vistas/viewsets: expone self.tenant, self.store y self.warehouse
+    y pasa el tenant al contexto de los serializers.
+    En peticiones de solo lectura acepta autenticación sin BD a partir de los claims del JWT.
+    """
+    stateless_tenant_auth = True
+
+    @property
+    def tenant(self):
+        return get_request_tenant(self.request)
+
+    @property
+    def store(self):
+        return self.tenant.store
+
+    @property
+    def warehouse(self):
+        return self.tenant.warehouse
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['tenant'] = self.tenant
+        return context
+
+    def cached(self, name, compute, params=None):
+        """
+        Resultado cacheado por almacén; se invalida al escribir ventas, compras, movimientos o productos.
+        """
+        return cached_tenant_data(self.tenant.warehouse_id, name, compute, params)
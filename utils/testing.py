@@ -0,0 +1,44 @@
+"""
+Datos mínimos para las pruebas: tienda con configuración, almacén, usuario administrador con
+acceso por defecto al almacén y productos con stock.
+"""
+from rest_framework.test import APIClient
+from apps.accounts.models import User, Role
+from apps.brand.models import Unit
+from apps.stores.models import Store, GeneralSetting
+from apps.warehouse.models import Warehouse, UserWarehouseAccess
+from apps.product.models import Product
+import tempfile
+import uuid
+
+# Para override_settings(CACHES=...): caché compartida entre procesos o local de cada uno
+SHARED_CACHE = {'default': {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': tempfile.mkdtemp(prefix='localstock-cache-'),
+}}
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def make_tenant(products=2, stock=100, **product_fields):
+    code = uuid.uuid4().hex[:6].upper()
+    store = Store.objects.create(name=f'Tienda {code}', code=code)
+    GeneralSetting.objects.create(store=store)
+    warehouse = Warehouse.objects.create(name='Principal', code=f'W{code}', store=store)
+    role, _ = Role.objects.get_or_create(name='Administrador')
+    user = User.objects.create_user(email=f'{code.lower()}@localstock.test', name='Admin', store=store, role=role)
+    UserWarehouseAccess.objects.create(user=user, warehouse=warehouse, role=role, is_default=True)
+    unit, _ = Unit.objects.get_or_create(name='Unidad', defaults={'abbreviation': 'u'})
+    items = [
+        Product.objects.create(
+            name=f'Producto {i}', code=f'{code}{i}', store=store, warehouse=warehouse, unit=unit,
+            stock=stock, sale_price=10, purchase_price=5, **product_fields,
+        )
+        for i in range(products)
+    ]
+    return store, warehouse, user, items
+
+
+def api_client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client